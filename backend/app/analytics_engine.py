@@ -4,84 +4,87 @@ Loads a directed graph and computes degree, eigenvector, and authority centralit
 then quantifies systemic risk per GWU thesis methodology.
 """
 import json
-import networkx as nx
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services import graph_snapshot, streaming_loader
+from app.services.sparse_analytics import SparseAnalyticsEngine
+from app.services import risk_scoring
+from app.services.edge_store import EdgeStore
 
 NODES_FILE = "usaspending_nodes.json"
 EDGES_FILE = "usaspending_edges.json"
 
 
 def build_graph(nodes_path=NODES_FILE, edges_path=EDGES_FILE):
-    G = nx.DiGraph()
-    # Validate nodes file
-    with open(nodes_path) as f:
-        nodes = json.load(f)
-        for node in nodes:
-            if "id" not in node or "type" not in node or "name" not in node:
-                raise ValueError(f"Node missing required fields: {node}")
-            node_id = node.pop("id")
-            G.add_node(node_id, **node)
-    # Validate edges file
-    with open(edges_path) as f:
-        edges = json.load(f)
-        for edge in edges:
-            if "source" not in edge or "target" not in edge:
-                raise ValueError(f"Edge missing required fields: {edge}")
-            src = edge.pop("source")
-            tgt = edge.pop("target")
-            G.add_edge(src, tgt, **edge)
-    return G
+    # Streams both files in bounded batches and validates required fields
+    return streaming_loader.load_networkx(nodes_path, edges_path, validate=True)
+
+
+def load_snapshot(nodes_path=NODES_FILE, edges_path=EDGES_FILE, snapshot_path=None):
+    """
+    Open the binary snapshot for the given JSON files, (re)writing it first
+    if it is missing or older than the JSON.
+    """
+    snapshot_path = snapshot_path or graph_snapshot.default_snapshot_path(nodes_path)
+    if not graph_snapshot.is_fresh(snapshot_path, nodes_path, edges_path):
+        graph_snapshot.write_snapshot_from_json(nodes_path, edges_path, snapshot_path)
+    return graph_snapshot.GraphSnapshot.load(snapshot_path)
+
+
+def load_graph(nodes_path=NODES_FILE, edges_path=EDGES_FILE, snapshot_path=None):
+    """
+    Same graph as build_graph, but served from the snapshot when one written
+    from the current JSON files exists. Falls back to parsing the JSON.
+    """
+    snapshot_path = snapshot_path or graph_snapshot.default_snapshot_path(nodes_path)
+    if graph_snapshot.is_fresh(snapshot_path, nodes_path, edges_path):
+        return graph_snapshot.GraphSnapshot.load(snapshot_path).to_networkx()
+    return build_graph(nodes_path, edges_path)
+
+def load_edge_store(nodes_path=NODES_FILE, edges_path=EDGES_FILE, snapshot_path=None):
+    """Every award record (not just the last per pair), served from the snapshot."""
+    return EdgeStore.from_snapshot(load_snapshot(nodes_path, edges_path, snapshot_path))
+
 
-def compute_analytics(G):
-    results = {}
-    # Degree centrality
-    results["degree_centrality"] = nx.degree_centrality(G)
-    # Eigenvector centrality (for directed, use G.reverse() if needed)
-    try:
-        results["eigenvector_centrality"] = nx.eigenvector_centrality_numpy(G)
-    except Exception:
-        results["eigenvector_centrality"] = {}
-    # Authority centrality (HITS algorithm)
-    try:
-        hits = nx.hits_numpy(G)
-        results["authority"] = hits[1]
-        results["hub"] = hits[0]
-    except Exception:
-        results["authority"] = {}
-        results["hub"] = {}
+def compute_analytics_tables(G, engine=None, weighted=False, tol=None,
+                             macro_table=None, risk_weights=None):
+    """
+    Column form of compute_analytics: (centrality arrays in engine.nodes
+    order, RiskScores). Pass `engine` to reuse the adjacency built for this
+    graph version; rescore the RiskScores to try other weightings.
+    """
+    engine = engine or SparseAnalyticsEngine.from_networkx(G)
+    arrays = engine.compute(weighted=weighted, tol=tol, as_arrays=True)
+    regions = None
+    if macro_table is not None and macro_table.key != "id":
+        regions = [G.nodes[n].get(macro_table.key) for n in engine.nodes]
+    risk = risk_scoring.score_risk(engine.nodes, arrays, macro_table, risk_weights, regions)
+    return arrays, risk
 
-        # Macro risk schema: overlay macroeconomic attributes
-        # Example attributes: unemployment_rate, financial_health, location_risk, demand_score
-        for node in G.nodes:
-            # Placeholder: in real use, these would be loaded from external data sources
-            G.nodes[node]["unemployment_rate"] = 0.05  # Example static value
-            G.nodes[node]["financial_health"] = 0.8    # Example static value
-            G.nodes[node]["location_risk"] = 0.2       # Example static value
-            G.nodes[node]["demand_score"] = 0.7        # Example static value
 
-        # Risk forecasting prototype: combine centrality and macro attributes
-        for node in G.nodes:
-            deg = results["degree_centrality"].get(node, 0)
-            eig = results["eigenvector_centrality"].get(node, 0)
-            auth = results["authority"].get(node, 0)
-            # Simple weighted sum for demonstration
-            macro = (
-                0.2 * G.nodes[node]["unemployment_rate"] +
-                0.3 * G.nodes[node]["financial_health"] +
-                0.2 * G.nodes[node]["location_risk"] +
-                0.3 * G.nodes[node]["demand_score"]
-            )
-            G.nodes[node]["risk_score"] = float(deg + eig + auth + macro)
-            G.nodes[node]["risk_forecast"] = float(G.nodes[node]["risk_score"] * 1.05)  # Example: forecast = risk_score * 1.05
-        return results
+def compute_analytics(G, engine=None, weighted=False, tol=None, macro_table=None, risk_weights=None):
+    """
+    Degree, eigenvector, HITS and PageRank centrality from one sparse
+    adjacency, plus macro risk scores and forecasts, as per-node dicts.
+    With weighted=True the contract-value-weighted variants are added
+    under "*_weighted" keys.
+    """
+    engine = engine or SparseAnalyticsEngine.from_networkx(G)
+    arrays, risk = compute_analytics_tables(G, engine, weighted, tol, macro_table, risk_weights)
+    results = {k: {} if v is None else engine.to_dict(v) for k, v in arrays.items()}
+    results.update(risk.to_dicts())
+    return results
 
 if __name__ == "__main__":
     G = build_graph()
     analytics = compute_analytics(G)
     # Print top 5 nodes by risk score
-    top = sorted(G.nodes(data=True), key=lambda x: x[1].get("risk_score", 0), reverse=True)[:5]
+    top = sorted(analytics["risk_score"].items(), key=lambda x: x[1], reverse=True)[:5]
     print("Top nodes by risk score:")
-    for node, data in top:
-        print(f"{node}: {data.get('risk_score', 0):.3f}")
+    for node, score in top:
+        print(f"{node}: {score:.3f}")
     # Optionally, save analytics to file
     with open("analytics_results.json", "w") as f:
         json.dump(analytics, f, indent=2)
@@ -1,7 +1,6 @@
 
 
 import os
-import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import ingestion, graph, neo4j, analytics, risk, nodes, edges
@@ -10,6 +9,10 @@ from app.utils.rate_limit import limiter
 from slowapi.errors import RateLimitExceeded
 from fastapi.responses import PlainTextResponse
 from app.utils.exceptions import add_global_exception_handlers
+from app.services.neo4j_pool import neo4j_pool
+from app.services.http_client import http_client
+from app.services.process_pool import process_pool
+from contextlib import asynccontextmanager
 
 # Finnhub API settings (require env vars, no defaults)
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
@@ -31,17 +34,25 @@ async def finnhub_get(endpoint: str, params: dict = None):
     headers = get_finnhub_headers()
     params = params or {}
     params["token"] = FINNHUB_API_KEY
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
+    response = await http_client.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    return response.json()
 
 
 
 
 
 
-app = FastAPI(title="Supply Chain Network Analytics API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # One Neo4j driver (and connection pool) for the app's lifetime
+    await neo4j_pool.close()
+    await http_client.close()
+    process_pool.shutdown()
+
+
+app = FastAPI(title="Supply Chain Network Analytics API", lifespan=lifespan)
 app.state.limiter = limiter
 
 # Rate limit error handler
@@ -1,30 +1,20 @@
 """
 NetworkX Graph Builder for Industrial Network
-Loads nodes and edges from JSON (output of ingest_usaspending.py) and builds a directed graph.
+Streams nodes and edges from JSON/NDJSON (output of ingest_usaspending.py) and builds a directed graph.
 """
-import json
+import os
+import sys
 import networkx as nx
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services import streaming_loader
+
 NODES_FILE = "usaspending_nodes.json"
 EDGES_FILE = "usaspending_edges.json"
 
 
 def build_graph(nodes_path=NODES_FILE, edges_path=EDGES_FILE):
-    G = nx.DiGraph()
-    # Load nodes
-    with open(nodes_path) as f:
-        nodes = json.load(f)
-        for node in nodes:
-            node_id = node.pop("id")
-            G.add_node(node_id, **node)
-    # Load edges
-    with open(edges_path) as f:
-        edges = json.load(f)
-        for edge in edges:
-            src = edge.pop("source")
-            tgt = edge.pop("target")
-            G.add_edge(src, tgt, **edge)
-    return G
+    return streaming_loader.load_networkx(nodes_path, edges_path, validate=False)
 
 if __name__ == "__main__":
     G = build_graph()
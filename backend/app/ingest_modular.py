@@ -1,56 +1,89 @@
 """
 Modular ingestion interface for supply chain network sources.
-Each source implements a class with ingest() method returning nodes/edges.
+Each source implements a class with a records() generator yielding
+("node" | "edge", record) pairs; ingest() collects them into nodes/edges.
 """
-import json
 import decimal
-from typing import List, Dict, Tuple
+import os
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services import graph_snapshot
+from app.services.http_cache import install_requests_cache
+from app.services.ingest_pipeline import collect, iter_async, records_from, run_pipeline
+from app.services.usaspending_fetcher import USAspendingFetcher, build_records
+from app.services.wikidata_enrichment import enrich_stage
 
 class IngestionSource:
+    def records(self) -> Iterator[Tuple[str, Dict]]:
+        yield from records_from(*self.ingest())
     def ingest(self) -> Tuple[List[Dict], List[Dict]]:
         raise NotImplementedError
 
 class USAspendingIngestion(IngestionSource):
     def __init__(self, fy=2023, agency="Department of Defense", limit=10):
         from usaspending import USASpendingClient
+        install_requests_cache()
         self.fy = fy
         self.agency = agency
         self.limit = limit
         self.client = USASpendingClient()
     def ingest(self) -> Tuple[List[Dict], List[Dict]]:
-        g_nodes = {}
-        g_edges = []
-        def add_node(node_id, node_type, **attrs):
-            g_nodes[node_id] = {"id": node_id, "type": node_type, **attrs}
-        def add_edge(source, target, edge_type, **attrs):
-            g_edges.append({"source": source, "target": target, "type": edge_type, **attrs})
+        return collect(self.records())
+    def records(self) -> Iterator[Tuple[str, Dict]]:
+        def node(node_id, node_type, **attrs):
+            return "node", {"id": node_id, "type": node_type, **attrs}
+        def edge(source, target, edge_type, **attrs):
+            return "edge", {"source": source, "target": target, "type": edge_type, **attrs}
         awards = self.client.awards.search() \
             .agency(self.agency) \
             .contracts() \
             .fiscal_year(self.fy) \
             .order_by("Award Amount", "desc") \
-            .limit(self.limit).all()
+            .limit(self.limit)
+        # Iterating the query pages through the results instead of loading them all
         for award in awards:
             fa_name = getattr(award.awarding_agency, "name", "Unknown Agency")
             fa_id = f"agency:{fa_name}"
-            add_node(fa_id, "funding_agency", name=fa_name)
+            yield node(fa_id, "funding_agency", name=fa_name)
             prog_office = getattr(award, "awarding_agency", None)
             if prog_office and getattr(prog_office, "subtier_agency", None):
                 po_id = f"program:{prog_office.subtier_agency.abbreviation}"
-                add_node(po_id, "program_office", name=prog_office.subtier_agency.name, parent=fa_id)
+                yield node(po_id, "program_office", name=prog_office.subtier_agency.name, parent=fa_id)
             else:
                 po_id = fa_id
             if award.recipient:
                 prime_id = f"prime:{award.recipient.duns or award.recipient.uei or award.recipient.name}"
-                add_node(prime_id, "prime_contractor", name=award.recipient.name)
-                add_edge(po_id, prime_id, "prime_contract", value=award.total_obligation, award_id=award.award_identifier)
+                yield node(prime_id, "prime_contractor", name=award.recipient.name)
+                yield edge(po_id, prime_id, "prime_contract", value=award.total_obligation, award_id=award.award_identifier)
                 if getattr(award, "subaward_count", 0) > 0:
                     for subaward in award.subawards:
                         if subaward.recipient:
                             sub_id = f"supplier:{subaward.recipient.duns or subaward.recipient.uei or subaward.recipient.name}"
-                            add_node(sub_id, "supplier", name=subaward.recipient.name)
-                            add_edge(prime_id, sub_id, "subcontract", value=getattr(subaward, "amount", None), subaward_id=getattr(subaward, "subaward_number", None))
-        return list(g_nodes.values()), g_edges
+                            yield node(sub_id, "supplier", name=subaward.recipient.name)
+                            yield edge(prime_id, sub_id, "subcontract", value=getattr(subaward, "amount", None), subaward_id=getattr(subaward, "subaward_number", None))
+
+class USAspendingConcurrentIngestion(IngestionSource):
+    """USAspending awards and subawards over several fiscal years / agencies, fetched concurrently."""
+    def __init__(self, fiscal_years=(2023,), agencies=("Department of Defense",), limit=10,
+                 concurrency=8, rate=5.0, window=4):
+        self.fiscal_years = list(fiscal_years)
+        self.agencies = list(agencies)
+        self.limit = limit
+        self.concurrency = concurrency
+        self.rate = rate
+        self.window = window
+        self.stats = None
+    def ingest(self) -> Tuple[List[Dict], List[Dict]]:
+        return collect(self.records())
+    def records(self) -> Iterator[Tuple[str, Dict]]:
+        # Partitions are yielded as they complete; at most `window` are fetched or queued at once
+        fetcher = USAspendingFetcher(concurrency=self.concurrency, rate=self.rate)
+        self.stats = fetcher.stats
+        partitions = fetcher.iter_partitions(self.fiscal_years, self.agencies, self.limit, window=self.window)
+        for fy, agency, rows in iter_async(partitions, maxsize=self.window):
+            yield from records_from(*build_records([(fy, agency, award, subs) for award, subs in rows]))
 
 def decimal_default(obj):
     if isinstance(obj, decimal.Decimal):
@@ -58,15 +91,13 @@ def decimal_default(obj):
     raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
 
 if __name__ == "__main__":
-    # Example usage: modular ingestion
-    sources = [USAspendingIngestion()]
-    all_nodes, all_edges = [], []
-    for src in sources:
-        nodes, edges = src.ingest()
-        all_nodes.extend(nodes)
-        all_edges.extend(edges)
-    with open("usaspending_nodes.json", "w") as f:
-        json.dump(all_nodes, f, indent=2, default=decimal_default)
-    with open("usaspending_edges.json", "w") as f:
-        json.dump(all_edges, f, indent=2, default=decimal_default)
-    print(f"Extracted {len(all_nodes)} nodes and {len(all_edges)} edges.")
+    # Example usage: stream every source into gzip NDJSON, chunk by chunk
+    sources = [USAspendingConcurrentIngestion()]
+    stages = []
+    if os.getenv("WIKIDATA_ENRICH", "").lower() in ("1", "true", "yes"):
+        # Headquarters, parent company and industry for primes and suppliers
+        stages.append(enrich_stage)
+    nodes_path, edges_path = "usaspending_nodes.ndjson.gz", "usaspending_edges.ndjson.gz"
+    stats = run_pipeline([src.records() for src in sources], nodes_path, edges_path, stages=stages)
+    graph_snapshot.write_snapshot_from_json(nodes_path, edges_path)
+    print(f"Extracted {stats.nodes} nodes and {stats.edges} edges: {stats.to_dict()}")
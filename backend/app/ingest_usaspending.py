@@ -4,8 +4,18 @@ Extracts funding agencies, program offices, primes, and suppliers from USAspendi
 and outputs normalized nodes and edges for network construction.
 """
 from usaspending import USASpendingClient
+import asyncio
 import json
 import decimal
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services import graph_snapshot
+from app.services.http_cache import install_requests_cache
+from app.services.usaspending_fetcher import fetch_records
+from app.services.incremental_ingest import IngestState, ingest_incremental
 
 # Node and edge containers
 g_nodes = {}
@@ -18,6 +28,7 @@ def add_edge(source, target, edge_type, **attrs):
     g_edges.append({"source": source, "target": target, "type": edge_type, **attrs})
 
 def extract_awards(fy=2023, agency="Department of Defense", limit=10):
+    install_requests_cache()
     with USASpendingClient() as client:
         awards = client.awards.search() \
             .agency(agency) \
@@ -55,16 +66,47 @@ def extract_awards(fy=2023, agency="Department of Defense", limit=10):
                             add_node(sub_id, "supplier", name=subaward.recipient.name)
                             add_edge(prime_id, sub_id, "subcontract", value=getattr(subaward, "amount", None), subaward_id=getattr(subaward, "subaward_number", None))
 
+def extract_awards_concurrent(fiscal_years=(2023,), agencies=("Department of Defense",), limit=10,
+                              concurrency=8, rate=5.0):
+    """Same records as extract_awards, fetched concurrently over fiscal years, agencies and pages."""
+    nodes, edges, stats = asyncio.run(fetch_records(
+        list(fiscal_years), list(agencies), limit, concurrency=concurrency, rate=rate))
+    for node in nodes:
+        add_node(node["id"], node["type"], **{k: v for k, v in node.items() if k not in ("id", "type")})
+    g_edges.extend(edges)
+    print(f"Fetched {stats.awards} awards and {stats.subawards} subawards "
+          f"in {stats.requests} requests ({stats.seconds:.1f}s).")
+
+def extract_awards_incremental(fiscal_years=(2023,), agencies=("Department of Defense",), limit=10,
+                               state_path="usaspending_ingest_state.json", delta_path=None):
+    """
+    Fetch only awards new or modified since the last run (see
+    app/services/incremental_ingest.py) and load the checkpointed records.
+    """
+    delta_path = delta_path or f"usaspending_delta_{time.strftime('%Y%m%dT%H%M%S')}.json"
+    delta, stats = asyncio.run(ingest_incremental(
+        list(fiscal_years), list(agencies), limit, state_path=state_path, delta_path=delta_path))
+    nodes, edges = IngestState.load(state_path).records()
+    for node in nodes:
+        add_node(node["id"], node["type"], **{k: v for k, v in node.items() if k not in ("id", "type")})
+    g_edges.extend(edges)
+    print(f"Incremental run: {stats.awards} new/changed awards in {stats.requests} requests "
+          f"({stats.seconds:.1f}s); delta {delta['run']['counts']} written to {delta_path}.")
+
 def decimal_default(obj):
     if isinstance(obj, decimal.Decimal):
         return float(obj)
     raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
 
 if __name__ == "__main__":
-    extract_awards()
+    if "--incremental" in sys.argv:
+        extract_awards_incremental()
+    else:
+        extract_awards_concurrent()
     # Output as JSON for next steps
     with open("usaspending_nodes.json", "w") as f:
         json.dump(list(g_nodes.values()), f, indent=2, default=decimal_default)
     with open("usaspending_edges.json", "w") as f:
         json.dump(g_edges, f, indent=2, default=decimal_default)
+    graph_snapshot.write_snapshot_from_json("usaspending_nodes.json", "usaspending_edges.json")
     print(f"Extracted {len(g_nodes)} nodes and {len(g_edges)} edges.")
@@ -1,49 +1,5 @@
-@app.get("/neo4j/consistency-check")
-async def neo4j_consistency_check():
-    """
-    Check if NetworkX graph and Neo4j database are in sync (node/edge counts).
-    """
-    try:
-        nodes_file = os.getenv("NODES_FILE", os.path.join(os.path.dirname(__file__), "usaspending_nodes.json"))
-        edges_file = os.getenv("EDGES_FILE", os.path.join(os.path.dirname(__file__), "usaspending_edges.json"))
-        G = analytics_engine.build_graph(nodes_path=nodes_file, edges_path=edges_file)
-        nx_nodes = G.number_of_nodes()
-        nx_edges = G.number_of_edges()
-        # Query Neo4j for counts
-        node_query = "MATCH (n) RETURN count(n) AS node_count"
-        edge_query = "MATCH ()-[r]->() RETURN count(r) AS edge_count"
-        neo4j_node_count = neo4j_conn.execute_query(node_query)[0]["node_count"]
-        neo4j_edge_count = neo4j_conn.execute_query(edge_query)[0]["edge_count"]
-        return {
-            "networkx": {"nodes": nx_nodes, "edges": nx_edges},
-            "neo4j": {"nodes": neo4j_node_count, "edges": neo4j_edge_count},
-            "in_sync": nx_nodes == neo4j_node_count and nx_edges == neo4j_edge_count
-        }
-    except Exception as e:
-        logger.error(f"Neo4j consistency check error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Neo4j consistency check error: {str(e)}")
-@app.post("/neo4j/refresh")
-async def neo4j_refresh():
-    """
-    Refresh Neo4j database from latest ingested NetworkX graph.
-    """
-    try:
-        nodes_file = os.getenv("NODES_FILE", os.path.join(os.path.dirname(__file__), "usaspending_nodes.json"))
-        edges_file = os.getenv("EDGES_FILE", os.path.join(os.path.dirname(__file__), "usaspending_edges.json"))
-        G = analytics_engine.build_graph(nodes_path=nodes_file, edges_path=edges_file)
-        # Import sync_to_neo4j and run sync
-        import sync_to_neo4j
-        sync_to_neo4j.sync_graph_to_neo4j(G)
-        logger.info("Neo4j database refreshed from NetworkX graph.")
-        return {"status": "success", "message": "Neo4j database refreshed from NetworkX graph."}
-    except Exception as e:
-        logger.error(f"Neo4j refresh error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Neo4j refresh error: {str(e)}")
-
-
 import os
 from dotenv import load_dotenv
-import httpx
 import logging
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
@@ -51,7 +7,6 @@ from pydantic import BaseModel
 from typing import List, Dict, Optional
 from contextlib import asynccontextmanager
 import networkx as nx
-from neo4j import GraphDatabase
 import analytics_engine
 
 # Load environment variables from .env if present
@@ -81,23 +36,26 @@ async def finnhub_get(endpoint: str, params: dict = None):
     headers = get_finnhub_headers()
     params = params or {}
     params["token"] = FINNHUB_API_KEY
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
+    response = await http_client.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    return response.json()
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from contextlib import asynccontextmanager
 import networkx as nx
-from neo4j import GraphDatabase
 import os
 
 # Import analytics engine
 import sys
 sys.path.append(os.path.dirname(__file__))
 import analytics_engine
+from fastapi.concurrency import run_in_threadpool
+from app.services.betweenness import betweenness_centrality
+from app.services.neo4j_pool import neo4j_pool
+from app.services.http_client import http_client
+
 
 
 
@@ -114,31 +72,33 @@ if not NEO4J_PASSWORD or NEO4J_PASSWORD == "password":
 
 
 class Neo4jConnection:
-    def __init__(self):
-        self.driver = None
-    
-    def connect(self):
+    """Thin wrapper over the shared async pool; queries never block the event loop."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @property
+    def driver(self):
+        return self.pool.driver if self.pool.connected else None
+
+    async def connect(self):
         try:
-            self.driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+            await self.pool.verify()
             return True
         except Exception as e:
             print(f"Failed to connect to Neo4j: {e}")
             return False
-    
-    def close(self):
-        if self.driver:
-            self.driver.close()
-    
-    def execute_query(self, query, parameters=None):
-        if not self.driver:
-            self.connect()
-        
-        with self.driver.session() as session:
-            result = session.run(query, parameters or {})
-            return [record.data() for record in result]
+
+    async def close(self):
+        await self.pool.close()
+
+    async def execute_query(self, query, parameters=None, write=False):
+        if write:
+            return await self.pool.write(query, parameters)
+        return await self.pool.read(query, parameters)
 
 
-neo4j_conn = Neo4jConnection()
+neo4j_conn = Neo4jConnection(neo4j_pool)
 
 
 # Pydantic models
@@ -170,10 +130,11 @@ class ShortestPathRequest(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Initialize connections
-    neo4j_conn.connect()
+    await neo4j_conn.connect()
     yield
     # Shutdown: Close connections
-    neo4j_conn.close()
+    await neo4j_conn.close()
+    await http_client.close()
 
 
 app = FastAPI(
@@ -311,9 +272,18 @@ async def shortest_path(request: ShortestPathRequest):
 
 
 @app.post("/network/centrality")
-async def calculate_centrality(network_data: NetworkData):
+async def calculate_centrality(
+    network_data: NetworkData,
+    betweenness_mode: str = Query("exact", pattern="^(exact|approximate|budget)$"),
+    k: Optional[int] = Query(None, ge=1),
+    epsilon: Optional[float] = Query(None, gt=0, le=1),
+    time_budget: Optional[float] = Query(None, gt=0),
+    seed: int = 0,
+):
     """
-    Calculate various centrality metrics for supply chain network
+    Calculate various centrality metrics for supply chain network.
+    Betweenness is exact by default; approximate samples k sources (or
+    enough for error epsilon) and budget samples until time_budget seconds.
     """
     try:
         # Create NetworkX graph
@@ -327,7 +297,9 @@ async def calculate_centrality(network_data: NetworkData):
         
         # Calculate centrality metrics
         degree_cent = nx.degree_centrality(G)
-        betweenness_cent = nx.betweenness_centrality(G)
+        betweenness = await run_in_threadpool(
+            betweenness_centrality, G, betweenness_mode, k, epsilon, time_budget, seed)
+        betweenness_cent = betweenness.to_dict()
         
         # Convert to list format
         centrality_data = []
@@ -343,7 +315,8 @@ async def calculate_centrality(network_data: NetworkData):
         
         return {
             "status": "success",
-            "centrality_metrics": centrality_data
+            "centrality_metrics": centrality_data,
+            "betweenness_info": betweenness.info()
         }
     
     except Exception as e:
@@ -357,7 +330,7 @@ async def get_neo4j_nodes():
     """
     try:
         query = "MATCH (n) RETURN n LIMIT 100"
-        results = neo4j_conn.execute_query(query)
+        results = await neo4j_conn.execute_query(query)
         return {
             "status": "success",
             "nodes": results
@@ -372,22 +345,20 @@ async def create_sample_data():
     Create sample supply chain data in Neo4j
     """
     try:
-        # Clear existing data
-        neo4j_conn.execute_query("MATCH (n) DETACH DELETE n")
-        
-        # Create sample nodes
+        # Idempotent MERGEs instead of clearing the database first, so
+        # existing data stays in place and queryable
         queries = [
-            "CREATE (s:Supplier {id: 'SUP1', name: 'Raw Materials Inc'})",
-            "CREATE (m:Manufacturer {id: 'MAN1', name: 'Assembly Corp'})",
-            "CREATE (d:Distributor {id: 'DIS1', name: 'Logistics Ltd'})",
-            "CREATE (r:Retailer {id: 'RET1', name: 'Retail Store'})",
-            "MATCH (s:Supplier {id: 'SUP1'}), (m:Manufacturer {id: 'MAN1'}) CREATE (s)-[:SUPPLIES {weight: 1.0}]->(m)",
-            "MATCH (m:Manufacturer {id: 'MAN1'}), (d:Distributor {id: 'DIS1'}) CREATE (m)-[:SHIPS_TO {weight: 1.5}]->(d)",
-            "MATCH (d:Distributor {id: 'DIS1'}), (r:Retailer {id: 'RET1'}) CREATE (d)-[:DELIVERS_TO {weight: 2.0}]->(r)"
+            "MERGE (s:Supplier {id: 'SUP1'}) SET s.name = 'Raw Materials Inc'",
+            "MERGE (m:Manufacturer {id: 'MAN1'}) SET m.name = 'Assembly Corp'",
+            "MERGE (d:Distributor {id: 'DIS1'}) SET d.name = 'Logistics Ltd'",
+            "MERGE (r:Retailer {id: 'RET1'}) SET r.name = 'Retail Store'",
+            "MATCH (s:Supplier {id: 'SUP1'}), (m:Manufacturer {id: 'MAN1'}) MERGE (s)-[r:SUPPLIES]->(m) SET r.weight = 1.0",
+            "MATCH (m:Manufacturer {id: 'MAN1'}), (d:Distributor {id: 'DIS1'}) MERGE (m)-[r:SHIPS_TO]->(d) SET r.weight = 1.5",
+            "MATCH (d:Distributor {id: 'DIS1'}), (r:Retailer {id: 'RET1'}) MERGE (d)-[rel:DELIVERS_TO]->(r) SET rel.weight = 2.0"
         ]
         
         for query in queries:
-            neo4j_conn.execute_query(query)
+            await neo4j_conn.execute_query(query, write=True)
         
         return {
             "status": "success",
@@ -402,88 +373,6 @@ async def create_sample_data():
 import os
 from fastapi import Request
 
-# --- Advanced Analytics Endpoint ---
-
-@app.get("/analytics/metrics")
-async def get_advanced_analytics(
-    node_type: str = Query(None, description="Filter by node type"),
-    page: int = Query(1, ge=1, description="Page number for pagination"),
-    page_size: int = Query(50, ge=1, le=500, description="Page size for pagination")
-):
-    """
-    Compute and return advanced analytics (degree, eigenvector, authority centrality, risk scores)
-    using the ingested USAspending data. Automatically runs ingestion if files are missing.
-    """
-    import os
-    nodes_file = os.getenv("NODES_FILE", os.path.join(os.path.dirname(__file__), "usaspending_nodes.json"))
-    edges_file = os.getenv("EDGES_FILE", os.path.join(os.path.dirname(__file__), "usaspending_edges.json"))
-    # Check if files exist, run ingestion if missing
-    if not (os.path.exists(nodes_file) and os.path.exists(edges_file)):
-        try:
-            logger.info("Ingested data files missing. Running ingestion script...")
-            import subprocess
-            result = subprocess.run([
-                "python", os.path.join(os.path.dirname(__file__), "ingest_usaspending.py")
-            ], capture_output=True, text=True)
-            logger.info(f"Ingestion script output: {result.stdout}")
-            if result.returncode != 0:
-                logger.error(f"Ingestion failed: {result.stderr}")
-                raise Exception(f"Ingestion failed: {result.stderr}")
-        except Exception as e:
-            logger.error(f"Data ingestion error: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Data ingestion error: {str(e)}")
-    try:
-        logger.info("Building graph from ingested data files...")
-        G = analytics_engine.build_graph(nodes_path=nodes_file, edges_path=edges_file)
-        logger.info(f"Graph loaded: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges.")
-        results = analytics_engine.compute_analytics(G)
-        logger.info("Analytics computed successfully.")
-        # Collect node analytics with all attributes
-        node_data = []
-        for node in G.nodes:
-            if node_type and G.nodes[node].get("type") != node_type:
-                continue
-            node_info = {
-                "id": node,
-                "type": G.nodes[node].get("type"),
-                "name": G.nodes[node].get("name"),
-                "degree_centrality": results["degree_centrality"].get(node, 0),
-                "eigenvector_centrality": results["eigenvector_centrality"].get(node, 0),
-                "authority": results["authority"].get(node, 0),
-                "hub": results["hub"].get(node, 0),
-                "risk_score": G.nodes[node].get("risk_score", 0),
-                "risk_forecast": G.nodes[node].get("risk_forecast", 0),
-                "macro": {
-                    "unemployment_rate": G.nodes[node].get("unemployment_rate"),
-                    "financial_health": G.nodes[node].get("financial_health"),
-                    "location_risk": G.nodes[node].get("location_risk"),
-                    "demand_score": G.nodes[node].get("demand_score"),
-                }
-            }
-            node_data.append(node_info)
-        # Pagination
-        total = len(node_data)
-        start = (page - 1) * page_size
-        end = start + page_size
-        paged_nodes = node_data[start:end]
-        # Summary stats
-        summary = {
-            "total_nodes": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
-        }
-        return {
-            "status": "success",
-            "summary": summary,
-            "nodes": paged_nodes
-        }
-    except ValueError as ve:
-        logger.error(f"Validation error: {str(ve)}")
-        raise HTTPException(status_code=400, detail=f"Validation error: {str(ve)}")
-    except Exception as e:
-        logger.error(f"Analytics error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Analytics error: {str(e)}")
 @app.post("/webhook/finnhub")
 async def finnhub_webhook(request: Request):
     # Acknowledge receipt with 2xx before processing
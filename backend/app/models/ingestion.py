@@ -1,5 +1,13 @@
-from pydantic import BaseModel
-from typing import List, Optional
+import os
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+# Symbols per /ingest/companies call: as many as Finnhub's rate limit lets
+# through in ENRICH_SECONDS, so a call ends well inside a request timeout
+# (30 at the free tier's 60/minute). Longer lists go in several calls.
+ENRICH_SECONDS = 30
+MAX_ENRICH_SYMBOLS = int(os.getenv("FINNHUB_MAX_SYMBOLS", 0)) or \
+    max(1, int(float(os.getenv("FINNHUB_RATE_PER_MIN", 60)) / 60 * ENRICH_SECONDS))
 
 class NodeModel(BaseModel):
     id: str
@@ -20,3 +28,22 @@ class IngestionRequest(BaseModel):
 class IngestionResponse(BaseModel):
     nodes: List[NodeModel]
     edges: List[EdgeModel]
+
+class EnrichRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=MAX_ENRICH_SYMBOLS)
+
+class EnrichResponse(BaseModel):
+    profiles: dict
+    errors: dict
+    stats: dict
+
+class RefreshRequest(BaseModel):
+    # source name -> params, e.g. {"usaspending": {"fiscal_years": [2023]}, "finnhub": {"symbols": ["LMT"]}}
+    # wikidata enriches the graph's companies, so it runs once the other sources are merged
+    sources: Dict[str, dict] = Field(default_factory=lambda: {"usaspending": {}, "wikidata": {}}, min_length=1)
+    precedence: Optional[List[str]] = None  # highest first; defaults to the orchestrator's
+
+class RefreshResponse(BaseModel):
+    sources: List[dict]
+    merge: dict
+    seconds: float
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Optional
+
+Probability = Annotated[float, Field(ge=0.0, le=1.0)]
+
+class SimulationRequest(BaseModel):
+    scenarios: int = Field(10000, ge=1, le=1_000_000)
+    seed: int = Field(0, ge=0)  # SeedSequence rejects negative seeds
+    # Failure probabilities by node id; defaults to risk_score scaled so the
+    # riskiest node fails with max_probability
+    probabilities: Optional[Dict[str, Probability]] = None
+    max_probability: float = Field(0.05, ge=0.0, le=1.0)
+    sources: Optional[List[str]] = None  # defaults to the funding agencies
+    batch_size: int = Field(256, ge=1, le=4096)
+    workers: Optional[int] = Field(None, ge=1, le=64)
+    rel_tol: Optional[float] = Field(None, gt=0.0)
+    min_scenarios: int = Field(1000, ge=1)
+    time_budget: Optional[float] = Field(None, gt=0.0)
+    top_k: int = Field(10, ge=1, le=1000)
@@ -1,29 +1,81 @@
-from fastapi import APIRouter, HTTPException, Depends
+import os
+import subprocess
+import sys
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from app.utils.auth import get_api_key
 from app.utils.logging import get_logger
 
 logger = get_logger("analytics")
 
-from app.shared_graph import graph_builder
+from app import analytics_engine
+from app.shared_graph import get_cached_graph, graph_builder, ingested_files
 import networkx as nx
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from app.services.analytics_table import AnalyticsTable, SORTABLE
+from app.services.betweenness import betweenness_centrality
+from app.services.risk_scoring import MacroTable
+from app.services.sparse_analytics import SparseAnalyticsEngine
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+# Optional macro attribute table (CSV or JSON records) joined on node id or region
+MACRO_TABLE_FILE = os.getenv("MACRO_TABLE_FILE")
+macro_table = (MacroTable.from_file(MACRO_TABLE_FILE, key=os.getenv("MACRO_TABLE_KEY", "id"))
+               if MACRO_TABLE_FILE else MacroTable())
+
+def _betweenness(snapshot, mode, k, epsilon, time_budget, seed):
+    # A finished exact run answers every mode; budget runs are only cached
+    # when they got through every source
+    exact = snapshot.cached("betweenness:exact")
+    if exact is not None:
+        return exact
+    if mode == "exact":
+        return snapshot.derived("betweenness:exact", betweenness_centrality)
+    if mode == "approximate":
+        return snapshot.derived(
+            f"betweenness:approximate:{k}:{epsilon}:{seed}",
+            lambda G: betweenness_centrality(G, "approximate", k=k, epsilon=epsilon, seed=seed))
+    result = betweenness_centrality(snapshot.graph, "budget", time_budget=time_budget, seed=seed)
+    if result.complete:
+        snapshot.derived("betweenness:exact", lambda G: result)
+    return result
+
+
 @router.get("/centrality")
-def get_centrality(api_key: str = Depends(get_api_key)):
-    G = graph_builder.to_networkx()
-    if G.number_of_nodes() == 0:
+def get_centrality(
+    betweenness_mode: str = Query("exact", pattern="^(exact|approximate|budget)$"),
+    k: Optional[int] = Query(None, ge=1, description="Sampled sources for approximate mode"),
+    epsilon: Optional[float] = Query(None, gt=0, le=1, description="Target error for approximate mode"),
+    time_budget: Optional[float] = Query(None, gt=0, description="Seconds for budget mode"),
+    seed: int = 0,
+    api_key: str = Depends(get_api_key),
+):
+    if graph_builder.snapshot().graph.number_of_nodes() == 0:
         logger.warning("Centrality requested on empty graph")
         raise HTTPException(status_code=400, detail="Graph is empty")
+    if betweenness_mode == "approximate" and k is None and epsilon is None:
+        raise HTTPException(status_code=422, detail="approximate mode needs k or epsilon")
+    if betweenness_mode == "budget" and time_budget is None:
+        raise HTTPException(status_code=422, detail="budget mode needs time_budget")
     try:
-        degree = nx.degree_centrality(G)
-        eigen = nx.eigenvector_centrality(G, max_iter=1000)
-        betweenness = nx.betweenness_centrality(G)
+        # Degrees are maintained per update; spectral metrics warm-start
+        # from the previous version's vectors. Betweenness runs on the
+        # snapshot those metrics were computed from, not a later one.
+        snapshot, metrics = graph_builder.analytics.centrality_snapshot()
+        if not metrics["eigenvector_centrality"]:
+            raise nx.PowerIterationFailedConvergence(graph_builder.analytics.max_iter)
+        betweenness = _betweenness(snapshot, betweenness_mode, k, epsilon, time_budget, seed)
         result = {
-            "degree_centrality": degree,
-            "eigenvector_centrality": eigen,
-            "betweenness_centrality": betweenness
+            "degree_centrality": metrics["degree_centrality"],
+            "eigenvector_centrality": metrics["eigenvector_centrality"],
+            "pagerank": metrics["pagerank"],
+            "hub": metrics["hub"],
+            "authority": metrics["authority"],
+            "betweenness_centrality": betweenness.to_dict(),
+            "betweenness_info": betweenness.info(),
+            "version": snapshot.version,
         }
         logger.info("Centrality computed successfully")
         return result
@@ -31,6 +83,11 @@ def get_centrality(api_key: str = Depends(get_api_key)):
         logger.error(f"Centrality computation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/summary")
+def get_summary(api_key: str = Depends(get_api_key)) -> Dict[str, Any]:
+    """Node/edge/type counts and how the last analytics refresh was done."""
+    return graph_builder.analytics.summary()
+
 @router.get("/node_metrics/{node_id}")
 def get_node_metrics(node_id: str, api_key: str = Depends(get_api_key)) -> Dict[str, Any]:
     G = graph_builder.to_networkx()
@@ -43,3 +100,65 @@ def get_node_metrics(node_id: str, api_key: str = Depends(get_api_key)) -> Dict[
         "out_degree": G.out_degree(node_id),
         "neighbors": list(G.neighbors(node_id))
     }
+
+
+def _ingest_if_missing(nodes_file, edges_file):
+    if os.path.exists(nodes_file) and os.path.exists(edges_file):
+        return
+    logger.info("Ingested data files missing. Running ingestion script...")
+    script = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ingest_usaspending.py")
+    result = subprocess.run([sys.executable, script], capture_output=True, text=True)
+    logger.info(f"Ingestion script output: {result.stdout}")
+    if result.returncode != 0:
+        raise RuntimeError(f"Ingestion failed: {result.stderr}")
+
+
+@router.get("/metrics")
+async def get_advanced_analytics(
+    node_type: Optional[str] = Query(None, description="Filter by node type"),
+    page: int = Query(1, ge=1, description="Page number for pagination"),
+    page_size: int = Query(50, ge=1, le=500, description="Page size for pagination"),
+    sort_by: Optional[str] = Query(None, pattern=f"^({'|'.join(SORTABLE)})$",
+                                   description="Sort descending by this metric (default: node order)"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    api_key: str = Depends(get_api_key),
+):
+    """
+    Degree, eigenvector and authority centrality and risk scores of the
+    ingested USAspending data, running ingestion first if the files are
+    missing. Results are materialised once per graph version as an
+    AnalyticsTable, so filtering, sorting and paging are index lookups.
+    """
+    nodes_file, edges_file = ingested_files()
+    try:
+        await run_in_threadpool(_ingest_if_missing, nodes_file, edges_file)
+    except Exception as e:
+        logger.error(f"Data ingestion error: {e}")
+        raise HTTPException(status_code=500, detail=f"Data ingestion error: {e}")
+    try:
+        cached = await run_in_threadpool(get_cached_graph, nodes_file, edges_file)
+        # Weights are summed over every award record of a pair rather than
+        # taking whichever record the DiGraph kept last
+        store = await run_in_threadpool(
+            cached.derived, "edge_store", lambda graph: analytics_engine.load_edge_store(nodes_file, edges_file))
+        engine = await run_in_threadpool(
+            cached.derived, "sparse_engine", lambda graph: SparseAnalyticsEngine.from_edge_store(store))
+        arrays, risk = await run_in_threadpool(
+            cached.derived, "analytics",
+            lambda graph: analytics_engine.compute_analytics_tables(graph, engine=engine, macro_table=macro_table))
+        table = await run_in_threadpool(
+            cached.derived, "analytics_table",
+            lambda graph: AnalyticsTable.from_results(graph, engine.nodes, arrays, risk))
+        wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        rows, total = table.page((page - 1) * page_size, page_size, sort_by=sort_by,
+                                 node_type=node_type, ascending=order == "asc")
+        summary = {"total_nodes": total, "page": page, "page_size": page_size,
+                   "total_pages": (total + page_size - 1) // page_size}
+        return {"status": "success", "summary": summary, "nodes": table.records(rows, wanted)}
+    except ValueError as e:
+        logger.error(f"Analytics validation error: {e}")
+        raise HTTPException(status_code=400, detail=f"Validation error: {e}")
+    except Exception as e:
+        logger.error(f"Analytics error: {e}")
+        raise HTTPException(status_code=500, detail=f"Analytics error: {e}")
@@ -1,21 +1,36 @@
-from fastapi import APIRouter, Query
-from app.services.graph_builder import GraphBuilder
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query
+from app.shared_graph import graph_builder
+from app.services.graph_index import GraphIndex
+from typing import List, Dict, Any, Optional
 
 router = APIRouter(prefix="/edges", tags=["edges"])
 
-graph_builder = GraphBuilder()
-
 @router.get("/")
-def list_edges(skip: int = Query(0, ge=0), limit: int = Query(100, le=1000)) -> Dict[str, Any]:
-    G = graph_builder.to_networkx()
-    edges = list(G.edges(data=True))
-    paginated = edges[skip:skip+limit]
+def list_edges(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides skip"),
+    type: Optional[str] = Query(None, description="Only edges of this type"),
+    min_value: Optional[float] = Query(None, description="Contract value lower bound (inclusive)"),
+    max_value: Optional[float] = Query(None, description="Contract value upper bound (inclusive)"),
+) -> Dict[str, Any]:
+    """Edges in (source, target) order, or by ascending value when a value range is given."""
+    snapshot = graph_builder.snapshot()
+    index = snapshot.derived("graph_index", GraphIndex.from_graph)
+    try:
+        page = index.page_edges(limit, cursor=cursor, edge_type=type,
+                                min_value=min_value, max_value=max_value, skip=skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    G = snapshot.graph
+    endpoints = [index.edge_endpoints(row) for row in page.rows.tolist()]
     return {
-        "total": len(edges),
+        "total": page.total,
         "skip": skip,
         "limit": limit,
-        "edges": [{"source": u, "target": v, **attrs} for u, v, attrs in paginated]
+        "next_cursor": page.next_cursor,
+        "graph_version": snapshot.version,
+        "edges": [{"source": u, "target": v, **G.edges[u, v]} for u, v in endpoints]
     }
 
 @router.get("/{source}/{target}")
@@ -1,39 +1,42 @@
-from app.models.ingestion import IngestionRequest, IngestionResponse, NodeModel, EdgeModel
-from app.services.usaspending_service import USASpendingService
-from app.services.edgar_service import EdgarService
-from app.services.finnhub_service import FinnhubService
-from app.services.wikidata_service import WikidataService
+from app.models.ingestion import (
+    IngestionRequest, IngestionResponse, EnrichRequest, EnrichResponse, RefreshRequest, RefreshResponse,
+)
+from app.services.finnhub_service import enrich_companies
+from app.services.ingest_orchestrator import run_source, to_models
+from app.shared_graph import graph_builder, ingest_orchestrator
 from fastapi import APIRouter, HTTPException
-from typing import Any
 
 router = APIRouter(prefix="/ingest", tags=["ingestion"])
 
 @router.post("/", response_model=IngestionResponse)
 async def ingest_data(request: IngestionRequest) -> IngestionResponse:
-    if request.source == "usaspending":
-        service = USASpendingService()
-        contracts = service.get_contracts(**request.params)
-        # Transform contracts to NodeModel/EdgeModel lists (pseudo-code)
-        nodes, edges = [], []
-        # ... populate nodes, edges ...
-        return IngestionResponse(nodes=nodes, edges=edges)
-    elif request.source == "edgar":
-        service = EdgarService()
-        filings = service.get_filings(**request.params)
-        nodes, edges = [], []
-        # ... populate nodes, edges ...
-        return IngestionResponse(nodes=nodes, edges=edges)
-    elif request.source == "finnhub":
-        service = FinnhubService()
-        profile = await service.get_company_profile(**request.params)
-        nodes, edges = [], []
-        # ... populate nodes, edges ...
-        return IngestionResponse(nodes=nodes, edges=edges)
-    elif request.source == "wikidata":
-        service = WikidataService()
-        data = await service.query(request.params.get("sparql_query", ""))
-        nodes, edges = [], []
-        # ... populate nodes, edges ...
-        return IngestionResponse(nodes=nodes, edges=edges)
-    else:
+    """Nodes and edges from one source; blocking SDKs run on a worker thread."""
+    source = ingest_orchestrator.sources.get(request.source)
+    if source is None:
         raise HTTPException(status_code=400, detail="Unknown data source")
+    run = await run_source(source, request.params, graph_builder.to_networkx())
+    if not run.ok:
+        raise HTTPException(status_code=502, detail=f"{request.source} ingestion failed: {run.error}")
+    nodes, edges = to_models(run.nodes, run.edges)
+    return IngestionResponse(nodes=nodes, edges=edges)
+
+
+@router.post("/refresh", response_model=RefreshResponse)
+async def refresh_graph(request: RefreshRequest) -> RefreshResponse:
+    """
+    Run several sources concurrently and upsert their records into the
+    shared graph, resolving attribute conflicts by source precedence.
+    Reports each source's status, record counts and time.
+    """
+    try:
+        result = await ingest_orchestrator.refresh(request.sources, precedence=request.precedence)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RefreshResponse(**result)
+
+
+@router.post("/companies", response_model=EnrichResponse)
+async def enrich_company_profiles(request: EnrichRequest) -> EnrichResponse:
+    """Finnhub profiles for many symbols, fetched concurrently within Finnhub's rate limits."""
+    profiles, errors, stats = await enrich_companies(request.symbols)
+    return EnrichResponse(profiles=profiles, errors=errors, stats=stats.to_dict())
@@ -1,19 +1,103 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+import json
 import logging
+from pydantic import ValidationError
 from app.models.ingestion import NodeModel, EdgeModel
+from app.services.consistency import DEFAULT_MAX_ROWS, GraphChecksums, check_consistency
+from app.services.neo4j_pool import neo4j_pool
 from app.services.neo4j_service import Neo4jService
+from app.shared_graph import get_cached_graph, ingested_files
 from typing import List
 
 router = APIRouter(prefix="/neo4j", tags=["neo4j"])
 
 @router.post("/persist")
-def persist_graph(nodes: List[NodeModel], edges: List[EdgeModel]):
+async def persist_graph(nodes: List[NodeModel], edges: List[EdgeModel]):
     service = Neo4jService()
     try:
-        service.persist_graph(nodes, edges)
-        return {"message": "Graph persisted to Neo4j successfully"}
+        stats = await service.persist_graph(nodes, edges)
+        return {"message": "Graph persisted to Neo4j successfully", "stats": stats.to_dict()}
     except Exception as e:
         logging.error(f"Neo4j persist error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        service.close()
+
+
+class _BadLine(ValueError):
+    pass
+
+
+async def _ndjson_rows(request: Request):
+    """NodeModel/EdgeModel per NDJSON line of the body, parsed as chunks arrive."""
+    buffer = b""
+    line_no = 0
+
+    def parse(line):
+        try:
+            data = json.loads(line)
+            return EdgeModel(**data) if "source" in data else NodeModel(**data)
+        except (ValueError, TypeError, ValidationError) as e:
+            raise _BadLine(f"line {line_no}: {e}") from e
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield parse(line)
+    if buffer.strip():
+        line_no += 1
+        yield parse(buffer)
+
+
+@router.post("/persist/stream")
+async def persist_graph_stream(request: Request):
+    """
+    Persist an NDJSON body, one node ({"id", "type", "name", ...}) or edge
+    ({"source", "target", ...}) per line, nodes first. Rows are written in
+    batches while the body is still being received.
+    """
+    service = Neo4jService()
+    try:
+        stats = await service.persist_rows(_ndjson_rows(request))
+        return {"message": "Graph persisted to Neo4j successfully", "stats": stats.to_dict()}
+    except _BadLine as e:
+        raise HTTPException(status_code=400, detail=f"Invalid row, {e}")
+    except Exception as e:
+        logging.error(f"Neo4j persist error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/refresh")
+async def refresh_from_ingested(mode: str = Query("diff", pattern="^(diff|full)$")):
+    """
+    Refresh Neo4j from the latest ingested graph. The default differential
+    mode writes only what changed since the last sync and keeps the
+    database queryable; mode=full clears and rewrites it.
+    """
+    from app import sync_to_neo4j
+    try:
+        G = (await run_in_threadpool(get_cached_graph, *ingested_files())).graph
+        stats = await sync_to_neo4j.sync_graph_async(G, pool=neo4j_pool, mode=mode)
+        logging.info(f"Neo4j refreshed from the ingested graph ({mode}): {stats.to_dict()}")
+        return {"message": "Neo4j database refreshed from NetworkX graph.", "mode": mode, "stats": stats.to_dict()}
+    except Exception as e:
+        logging.error(f"Neo4j refresh error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/consistency-check")
+async def consistency_check(max_rows: int = Query(DEFAULT_MAX_ROWS, ge=0, le=100000)):
+    """
+    Compare per-bucket checksums of the ingested graph and Neo4j, listing
+    the missing/extra/changed ids in the buckets that differ.
+    """
+    try:
+        cached = await run_in_threadpool(get_cached_graph, *ingested_files())
+        # Hashed once per graph version; later checks only run the aggregate queries
+        expected = await run_in_threadpool(cached.derived, "checksums", GraphChecksums.from_graph)
+        return await check_consistency(neo4j_pool, expected, max_rows=max_rows)
+    except Exception as e:
+        logging.error(f"Neo4j consistency check error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,21 +1,32 @@
-from fastapi import APIRouter, Query
-from app.services.graph_builder import GraphBuilder
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query
+from app.shared_graph import graph_builder
+from app.services.graph_index import GraphIndex
+from typing import List, Dict, Any, Optional
 
 router = APIRouter(prefix="/nodes", tags=["nodes"])
 
-graph_builder = GraphBuilder()
-
 @router.get("/")
-def list_nodes(skip: int = Query(0, ge=0), limit: int = Query(100, le=1000)) -> Dict[str, Any]:
-    G = graph_builder.to_networkx()
-    nodes = list(G.nodes(data=True))
-    paginated = nodes[skip:skip+limit]
+def list_nodes(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides skip"),
+    type: Optional[str] = Query(None, description="Only nodes of this type"),
+) -> Dict[str, Any]:
+    snapshot = graph_builder.snapshot()
+    index = snapshot.derived("graph_index", GraphIndex.from_graph)
+    try:
+        page = index.page_nodes(limit, cursor=cursor, node_type=type, skip=skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    G = snapshot.graph
+    node_ids = [index.node_ids[i] for i in page.rows.tolist()]
     return {
-        "total": len(nodes),
+        "total": page.total,
         "skip": skip,
         "limit": limit,
-        "nodes": [{"id": n, **attrs} for n, attrs in paginated]
+        "next_cursor": page.next_cursor,
+        "graph_version": snapshot.version,
+        "nodes": [{"id": n, **G.nodes[n]} for n in node_ids]
     }
 
 @router.get("/{node_id}")
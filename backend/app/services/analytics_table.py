@@ -0,0 +1,123 @@
+"""
+Analytics results materialised as a column table, once per graph version.
+
+Centralities, risk scores and macro attributes are stored as one array per
+column in engine node order, next to id/type/name. Row lists per node type
+and descending sort orders for the SORTABLE metrics are built up front;
+orders within one type are derived from the global rank on first use and
+then cached. A page, sort or top-k query is a slice of one of those index
+arrays plus materialising the requested fields for the rows on the page.
+"""
+import threading
+import numpy as np
+
+from app.services.risk_scoring import MACRO_COLUMNS
+
+SORTABLE = ("risk_score", "risk_forecast", "eigenvector_centrality", "authority", "hub", "degree_centrality")
+METRIC_COLUMNS = ("degree_centrality", "eigenvector_centrality", "authority", "hub", "risk_score", "risk_forecast")
+FIELDS = ("id", "type", "name") + METRIC_COLUMNS + ("macro",)
+
+
+class AnalyticsTable:
+    def __init__(self, ids, types, names, columns, macro):
+        """
+        ids/types/names: per-row lists; columns: {metric: float array};
+        macro: (rows x len(MACRO_COLUMNS)) array
+        """
+        self.ids = list(ids)
+        self.types = list(types)
+        self.names = list(names)
+        self.columns = columns
+        self.macro = macro
+        n = len(self.ids)
+        self.type_rows = {}
+        for i, t in enumerate(self.types):
+            self.type_rows.setdefault(t, []).append(i)
+        self.type_rows = {t: np.asarray(rows, dtype=np.int64) for t, rows in self.type_rows.items()}
+        self.orders = {}
+        self.ranks = {}
+        for name in SORTABLE:
+            # Descending by value, ties in row order
+            order = np.lexsort((np.arange(n), -self.columns[name]))
+            self.orders[(name, None)] = order
+            rank = np.empty(n, dtype=np.int64)
+            rank[order] = np.arange(n)
+            self.ranks[name] = rank
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_results(cls, G, node_ids, arrays, risk):
+        """Build from compute_analytics_tables output for graph G (node_ids in engine order)."""
+        n = len(node_ids)
+        attrs = [G.nodes[v] if v in G else {} for v in node_ids]
+
+        def column(values):
+            return np.zeros(n) if values is None else np.asarray(values, dtype=float)
+
+        columns = {
+            "degree_centrality": column(arrays.get("degree_centrality")),
+            "eigenvector_centrality": column(risk.column("eigenvector_centrality")),
+            "authority": column(risk.column("authority")),
+            "hub": column(arrays.get("hub")),
+            "risk_score": column(risk.risk_score),
+            "risk_forecast": column(risk.risk_forecast),
+        }
+        return cls(node_ids, [a.get("type") for a in attrs], [a.get("name") for a in attrs],
+                   columns, np.asarray(risk.macro, dtype=float))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, sort_by=None, node_type=None):
+        """Row order for a sort metric (None = node order) and optional type filter."""
+        if sort_by is not None and sort_by not in SORTABLE:
+            raise ValueError(f"Cannot sort by {sort_by!r}; expected one of {SORTABLE}")
+        if sort_by is None:
+            return np.arange(len(self)) if node_type is None else self.type_rows.get(node_type, _EMPTY)
+        key = (sort_by, node_type)
+        order = self.orders.get(key)
+        if order is None:
+            rows = self.type_rows.get(node_type, _EMPTY)
+            order = rows[np.argsort(self.ranks[sort_by][rows], kind="stable")]
+            with self._lock:
+                order = self.orders.setdefault(key, order)
+        return order
+
+    def page(self, offset=0, limit=50, sort_by=None, node_type=None, ascending=False):
+        """(row ids for the page, total matching rows)."""
+        rows = self.rows(sort_by, node_type)
+        total = len(rows)
+        if ascending and sort_by is not None:
+            # Reverse of the descending order: the slice is taken from the end
+            stop = total - offset
+            start = max(stop - limit, 0)
+            return rows[start:max(stop, 0)][::-1], total
+        return rows[offset:offset + limit], total
+
+    def top_k(self, metric, k=10, node_type=None):
+        return self.page(0, k, sort_by=metric, node_type=node_type)[0]
+
+    def records(self, rows, fields=None):
+        fields = FIELDS if fields is None else fields
+        unknown = [f for f in fields if f not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields {unknown}; expected some of {FIELDS}")
+        rows = np.asarray(rows, dtype=np.int64)
+        out = [{} for _ in range(len(rows))]
+        for field in fields:
+            if field == "id":
+                values = [self.ids[i] for i in rows.tolist()]
+            elif field == "type":
+                values = [self.types[i] for i in rows.tolist()]
+            elif field == "name":
+                values = [self.names[i] for i in rows.tolist()]
+            elif field == "macro":
+                values = [dict(zip(MACRO_COLUMNS, r)) for r in self.macro[rows].tolist()]
+            else:
+                values = self.columns[field][rows].tolist()
+            for record, value in zip(out, values):
+                record[field] = value
+        return out
+
+
+_EMPTY = np.zeros(0, dtype=np.int64)
@@ -0,0 +1,195 @@
+"""
+Exact, sampled and time-boxed betweenness centrality.
+
+All three modes run the same Brandes accumulation over a set of source
+("pivot") nodes, split into chunks across the app-wide process pool;
+partial dependency sums are merged and rescaled as
+nx.betweenness_centrality does.
+
+- exact: every node is a source.
+- approximate: k sources sampled uniformly (k given, or derived from a
+  target error epsilon); sums are scaled by n / k.
+- budget: sources in random order until time_budget runs out; what was
+  processed is rescaled like a k-pivot sample, or is exact if it finished.
+
+For sampled results, error_bound is a Hoeffding + union bound on the
+normalized scores: with probability at least `confidence`, every node's
+estimate is within error_bound of its exact normalized betweenness.
+"""
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+import numpy as np
+
+from app.services.process_pool import process_pool
+
+MODES = ("exact", "approximate", "budget")
+DEFAULT_CONFIDENCE = 0.9
+DEFAULT_WORKERS = int(os.getenv("BETWEENNESS_WORKERS", "0")) or min(os.cpu_count() or 1, 8)
+# Graphs below this many nodes are not worth shipping to the process pool
+MIN_PARALLEL_NODES = 2000
+
+
+def _dependencies(succ, sources):
+    """Brandes dependency sums over `sources`, unweighted shortest paths."""
+    n = len(succ)
+    bc = np.zeros(n)
+    for s in sources:
+        sigma = [0] * n
+        dist = [-1] * n
+        sigma[s] = 1
+        dist[s] = 0
+        preds = {}
+        order = []
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            order.append(v)
+            dv = dist[v] + 1
+            for w in succ[v]:
+                if dist[w] < 0:
+                    dist[w] = dv
+                    queue.append(w)
+                if dist[w] == dv:
+                    sigma[w] += sigma[v]
+                    preds.setdefault(w, []).append(v)
+        delta = dict.fromkeys(order, 0.0)
+        for w in reversed(order):
+            coeff = (1.0 + delta[w]) / sigma[w]
+            for v in preds.get(w, ()):
+                delta[v] += sigma[v] * coeff
+            if w != s:
+                bc[w] += delta[w]
+    return bc
+
+
+def _chunk_dependencies(succ, sources):
+    return _dependencies(succ, sources), len(sources)
+
+
+def pivots_for_error(n, epsilon, confidence=DEFAULT_CONFIDENCE):
+    """Sources needed for every normalized score to be within epsilon."""
+    scale = n / (n - 1) if n > 1 else 1.0
+    return min(n, math.ceil(scale ** 2 * math.log(2 * n / (1 - confidence)) / (2 * epsilon ** 2)))
+
+
+def error_bound(n, k, confidence=DEFAULT_CONFIDENCE):
+    """Inverse of pivots_for_error: the epsilon guaranteed by k sampled sources."""
+    if k >= n:
+        return 0.0
+    if k == 0:
+        return 1.0
+    scale = n / (n - 1) if n > 1 else 1.0
+    return scale * math.sqrt(math.log(2 * n / (1 - confidence)) / (2 * k))
+
+
+class BetweennessResult:
+    def __init__(self, nodes, values, mode, pivots, elapsed, confidence):
+        self.nodes = nodes
+        self.values = values
+        self.mode = mode
+        self.pivots = pivots
+        self.elapsed = elapsed
+        self.confidence = confidence
+
+    @property
+    def complete(self):
+        return self.pivots >= len(self.nodes)
+
+    def to_dict(self):
+        return dict(zip(self.nodes, self.values.tolist()))
+
+    def info(self):
+        return {
+            "mode": self.mode,
+            "pivots": self.pivots,
+            "num_nodes": len(self.nodes),
+            "exact": self.complete,
+            "error_bound": error_bound(len(self.nodes), self.pivots, self.confidence),
+            "confidence": self.confidence,
+            "elapsed_seconds": self.elapsed,
+        }
+
+
+def _rescale(bc, n, k, normalized, directed):
+    if normalized:
+        scale = 1.0 / ((n - 1) * (n - 2)) if n > 2 else None
+    else:
+        scale = None if directed else 0.5
+    if k < n and k > 0:
+        scale = (scale or 1.0) * n / k
+    return bc * scale if scale is not None else bc
+
+
+def betweenness_centrality(G, mode="exact", k=None, epsilon=None, time_budget=None, seed=0,
+                           normalized=True, workers=None, confidence=DEFAULT_CONFIDENCE):
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+    start = time.perf_counter()
+    nodes = list(G)
+    n = len(nodes)
+    index = {v: i for i, v in enumerate(nodes)}
+    succ = [[index[w] for w in G.neighbors(v)] for v in nodes]
+    rng = np.random.default_rng(seed)
+    if mode == "exact":
+        sources = np.arange(n)
+    elif mode == "approximate":
+        if k is None:
+            if epsilon is None:
+                raise ValueError("approximate mode needs k or epsilon")
+            k = pivots_for_error(n, epsilon, confidence)
+        sources = rng.choice(n, size=min(k, n), replace=False)
+    else:
+        if time_budget is None:
+            raise ValueError("budget mode needs time_budget")
+        sources = rng.permutation(n)
+
+    workers = DEFAULT_WORKERS if workers is None else max(1, workers)
+    if n < MIN_PARALLEL_NODES:
+        workers = 1
+    # Small chunks under a budget, so the deadline is overshot by little
+    per_chunk = 16 if mode == "budget" else max(1, math.ceil(len(sources) / (workers * 4)))
+    chunks = [sources[i:i + per_chunk].tolist() for i in range(0, len(sources), per_chunk)]
+    deadline = start + time_budget if mode == "budget" else None
+
+    bc = np.zeros(n)
+    done = 0
+    if workers == 1:
+        for chunk in chunks:
+            bc += _dependencies(succ, chunk)
+            done += len(chunk)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+    else:
+        with process_pool.shared(succ) as state:
+            remaining = iter(chunks)
+            pending = set()
+            for chunk in remaining:
+                pending.add(process_pool.submit(state, _chunk_dependencies, chunk))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    partial, count = future.result()
+                    bc += partial
+                    done += count
+                if deadline is not None and time.perf_counter() >= deadline:
+                    for future in pending:
+                        future.cancel()
+                    # Keep whatever already finished; cancelled ones are dropped
+                    for future in pending:
+                        if not future.cancelled():
+                            partial, count = future.result()
+                            bc += partial
+                            done += count
+                    break
+                for chunk in remaining:
+                    pending.add(process_pool.submit(state, _chunk_dependencies, chunk))
+                    if len(pending) >= 2 * workers:
+                        break
+
+    values = _rescale(bc, n, done, normalized, G.is_directed())
+    return BetweennessResult(nodes, values, mode, done, time.perf_counter() - start, confidence)
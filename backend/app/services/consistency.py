@@ -0,0 +1,148 @@
+"""
+Bucketed checksum comparison between a NetworkX graph and Neo4j.
+
+Rows are partitioned by (sync_bucket, label): the bucket is a hash of the
+node id / edge key, the label the node type or relationship type. Per
+partition both sides reduce to (row count, sum of sync_hash). On the graph
+side that is a vectorised hash plus a grouped sum, computed once per graph
+version; on the Neo4j side it is one aggregate query per kind over the
+sync_bucket / sync_hash properties stamped by the bulk loader. Only the
+buckets whose partitions disagree are fetched row by row to list the
+missing, extra and changed keys, so an in-sync check costs two aggregate
+queries.
+
+The Neo4j-side checksums are the ones written at sync time: the check
+finds rows missing from, extra in, or stale in Neo4j relative to the
+graph, not property edits made in Neo4j by other writers.
+"""
+import numpy as np
+
+from app.services.neo4j_bulk import (
+    NODE_LABEL, DEFAULT_NODE_TYPE, DEFAULT_REL_TYPE, NUM_BUCKETS, checksums, edge_key, properties,
+)
+
+DEFAULT_MAX_ROWS = 1000
+
+NODE_PARTITIONS_QUERY = (
+    f"MATCH (n:{NODE_LABEL}) "
+    f"RETURN n.sync_bucket AS bucket, coalesce(n.type, '{DEFAULT_NODE_TYPE}') AS label, "
+    f"count(*) AS rows, sum(coalesce(n.sync_hash, 0)) AS checksum"
+)
+EDGE_PARTITIONS_QUERY = (
+    f"MATCH (:{NODE_LABEL})-[r]->(:{NODE_LABEL}) "
+    f"RETURN r.sync_bucket AS bucket, type(r) AS label, "
+    f"count(*) AS rows, sum(coalesce(r.sync_hash, 0)) AS checksum"
+)
+NODE_ROWS_QUERY = (
+    f"MATCH (n:{NODE_LABEL}) WHERE n.sync_bucket IN $buckets OR ($unbucketed AND n.sync_bucket IS NULL) "
+    f"RETURN n.id AS key, coalesce(n.type, '{DEFAULT_NODE_TYPE}') AS label, n.sync_hash AS hash"
+)
+EDGE_ROWS_QUERY = (
+    f"MATCH (a:{NODE_LABEL})-[r]->(b:{NODE_LABEL}) "
+    f"WHERE r.sync_bucket IN $buckets OR ($unbucketed AND r.sync_bucket IS NULL) "
+    f"RETURN a.id AS source, b.id AS target, type(r) AS label, r.sync_hash AS hash"
+)
+
+
+class _Side:
+    """Keys, labels, buckets and checksums of one kind of row (nodes or edges)."""
+
+    def __init__(self, keys, labels, props, hash_keys=None):
+        self.keys = list(keys)
+        self.labels = list(labels)
+        self.buckets, self.hashes = checksums(hash_keys or self.keys, self.labels, props)
+
+    def partitions(self):
+        """{(bucket, label): (rows, checksum)} via one grouped sum."""
+        if not self.keys:
+            return {}
+        names, label_codes = np.unique(np.asarray(self.labels, dtype=object), return_inverse=True)
+        group = self.buckets * len(names) + label_codes
+        groups, inverse = np.unique(group, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(groups))
+        sums = np.zeros(len(groups), dtype=np.int64)
+        np.add.at(sums, inverse, self.hashes)
+        return {(int(g // len(names)), names[g % len(names)]): (int(c), int(s))
+                for g, c, s in zip(groups.tolist(), counts.tolist(), sums.tolist())}
+
+    def rows_in(self, buckets):
+        """{key: (label, hash)} for rows in the given buckets."""
+        selected = np.flatnonzero(np.isin(self.buckets, list(buckets)))
+        return {self.keys[i]: (self.labels[i], int(self.hashes[i])) for i in selected.tolist()}
+
+
+class GraphChecksums:
+    """Checksums of one graph version; cache it per version and reuse across checks."""
+
+    def __init__(self, nodes, edges):
+        self.nodes = nodes
+        self.edges = edges
+
+    @classmethod
+    def from_graph(cls, G):
+        node_labels = [a.get("type") or DEFAULT_NODE_TYPE for _, a in G.nodes(data=True)]
+        nodes = _Side(list(G), node_labels, [properties(a) for _, a in G.nodes(data=True)])
+        edge_labels = [a.get("type") or DEFAULT_REL_TYPE for _, _, a in G.edges(data=True)]
+        edges = _Side(
+            [(u, v, rel) for (u, v), rel in zip(G.edges(), edge_labels)], edge_labels,
+            [properties(a, skip=("type",)) for _, _, a in G.edges(data=True)],
+            hash_keys=[edge_key(u, v, rel) for (u, v), rel in zip(G.edges(), edge_labels)],
+        )
+        return cls(nodes, edges)
+
+
+def _mismatched(graph_parts, db_parts):
+    return sorted((k for k in set(graph_parts) | set(db_parts) if graph_parts.get(k) != db_parts.get(k)),
+                  key=lambda k: (k[0] is None, k[0] or 0, k[1]))
+
+
+def _compare(graph_rows, db_rows, max_rows):
+    missing = [k for k in graph_rows if k not in db_rows]
+    extra = [k for k in db_rows if k not in graph_rows]
+    changed = [k for k, v in graph_rows.items() if k in db_rows and db_rows[k] != v]
+    return {
+        "missing": missing[:max_rows], "extra": extra[:max_rows], "changed": changed[:max_rows],
+        "counts": {"missing": len(missing), "extra": len(extra), "changed": len(changed)},
+    }
+
+
+async def _check_kind(pool, side, partitions_query, rows_query, row_key, max_rows):
+    db_parts = {(r["bucket"], r["label"]): (r["rows"], r["checksum"])
+                for r in await pool.read(partitions_query)}
+    graph_parts = side.partitions()
+    mismatched = _mismatched(graph_parts, db_parts)
+    report = {
+        "networkx": len(side.keys),
+        "neo4j": sum(rows for rows, _ in db_parts.values()),
+        "partitions": len(set(graph_parts) | set(db_parts)),
+        "mismatched_partitions": [{"bucket": b, "label": l} for b, l in mismatched],
+    }
+    if mismatched:
+        buckets = sorted({b for b, _ in mismatched if b is not None})
+        unbucketed = any(b is None for b, _ in mismatched)
+        records = await pool.read(rows_query, {"buckets": buckets, "unbucketed": unbucketed})
+        db_rows = {row_key(r): (r["label"], r["hash"]) for r in records}
+        report.update(_compare(side.rows_in(buckets), db_rows, max_rows))
+    else:
+        report.update({"missing": [], "extra": [], "changed": [],
+                       "counts": {"missing": 0, "extra": 0, "changed": 0}})
+    return report
+
+
+async def check_consistency(pool, expected, max_rows=DEFAULT_MAX_ROWS):
+    """
+    Compare the GraphChecksums `expected` with the database behind `pool`;
+    lists of differing keys are capped at max_rows (totals are in "counts").
+    """
+    nodes = await _check_kind(pool, expected.nodes, NODE_PARTITIONS_QUERY, NODE_ROWS_QUERY,
+                              lambda r: r["key"], max_rows)
+    edges = await _check_kind(pool, expected.edges, EDGE_PARTITIONS_QUERY, EDGE_ROWS_QUERY,
+                              lambda r: (r["source"], r["target"], r["label"]), max_rows)
+    return {
+        "networkx": {"nodes": nodes["networkx"], "edges": edges["networkx"]},
+        "neo4j": {"nodes": nodes["neo4j"], "edges": edges["neo4j"]},
+        "in_sync": not nodes["mismatched_partitions"] and not edges["mismatched_partitions"],
+        "buckets": NUM_BUCKETS,
+        "nodes": nodes,
+        "edges": edges,
+    }
@@ -0,0 +1,305 @@
+"""
+Monte Carlo disruption simulation.
+
+Each scenario fails a random set of nodes, drawn independently from
+per-node failure probabilities (e.g. scaled risk scores), and measures how
+much reachability and contract value every funding source loses. Scenarios
+are evaluated in batches: the batch's reachable sets are the columns of one
+dense (nodes x scenarios*sources) matrix propagated with sparse products
+over a shared adjacency, so a batch costs about depth * E * batch_size
+flops instead of one BFS per scenario.
+
+Batch k always draws from SeedSequence(seed, spawn_key=(k,)) and stopping
+rules are checked in batch order, so results do not depend on how many
+worker processes ran them. Parallel runs use the app-wide process pool.
+"""
+import os
+import time
+from concurrent.futures import wait
+import numpy as np
+import scipy.sparse as sps
+
+from app.services.criticality import default_roots
+from app.services.process_pool import process_pool
+
+DEFAULT_BATCH_SIZE = 256
+# Cap on the cells of one propagation matrix; sources are split to fit
+MAX_STATE_CELLS = 1 << 24
+DEFAULT_MAX_PROBABILITY = 0.05
+DEFAULT_WORKERS = int(os.getenv("SIM_WORKERS", "0")) or min(os.cpu_count() or 1, 8)
+PERCENTILES = (95, 99)
+
+
+def failure_probabilities(scores, max_probability=DEFAULT_MAX_PROBABILITY):
+    """Scale non-negative scores (e.g. risk_score) so the riskiest node fails with max_probability."""
+    scores = np.clip(np.nan_to_num(np.asarray(scores, dtype=float)), 0.0, None)
+    peak = scores.max() if len(scores) else 0.0
+    if peak == 0:
+        return np.zeros(len(scores))
+    return np.clip(scores / peak * max_probability, 0.0, 1.0)
+
+
+class DisruptionModel:
+    def __init__(self, nodes, adjacency, weighted, probabilities, sources, protect_sources=True):
+        """
+        nodes: node ids in matrix order
+        adjacency / weighted: CSR matrices, A[i, j] for an edge i -> j
+        probabilities: per-node failure probability in node order
+        sources: integer indices of the funding sources (agencies/primes)
+        protect_sources: sources never fail, so losses are downstream only
+        """
+        self.nodes = list(nodes)
+        self.sources = np.asarray(sources, dtype=np.int64)
+        self.p = np.asarray(probabilities, dtype=float).copy()
+        if protect_sources:
+            self.p[self.sources] = 0.0
+        # Transposes so propagation is a row-wise sparse @ dense product
+        self.AT = sps.csr_array(adjacency, dtype=np.float32).T.tocsr()
+        self.WT = sps.csr_array(weighted, dtype=float).T.tocsr()
+        everyone = np.ones((len(self.nodes), 1), dtype=bool)
+        self.baseline_reach, self.baseline_value = self.evaluate(everyone)
+        reach, value = self.evaluate_union(everyone)
+        self.baseline_union_reach, self.baseline_union_value = int(reach[0]), float(value[0])
+
+    @classmethod
+    def from_networkx(cls, G, probabilities, sources=None, weight="value", protect_sources=True):
+        """probabilities: dict of node id -> probability, or an array in G's node order."""
+        from app.services.sparse_analytics import SparseAnalyticsEngine
+        engine = SparseAnalyticsEngine.from_networkx(G, weight=weight)
+        return cls.from_engine(engine, probabilities, sources or default_roots(G), protect_sources)
+
+    @classmethod
+    def from_engine(cls, engine, probabilities, sources, protect_sources=True):
+        """Reuse a SparseAnalyticsEngine's adjacency (binary plus weighted)."""
+        index = {n: i for i, n in enumerate(engine.nodes)}
+        if isinstance(probabilities, dict):
+            probabilities = [probabilities.get(n, 0.0) for n in engine.nodes]
+        missing = [s for s in sources if s not in index]
+        if missing:
+            raise ValueError(f"Unknown source nodes: {missing}")
+        weighted = engine.W if engine.W is not None else engine.A
+        return cls(engine.nodes, engine.A, weighted, probabilities,
+                   [index[s] for s in sources], protect_sources)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _propagate(self, X, alive):
+        # Grow the reached sets one hop at a time until nothing changes;
+        # supply chains are shallow, so this is a handful of products
+        while True:
+            X_next = X | (((self.AT @ X.astype(np.float32)) > 0) & alive)
+            if (X_next == X).all():
+                return X
+            X = X_next
+
+    def _measure(self, X):
+        Xf = X.astype(float)
+        return X.sum(axis=0), (Xf * (self.WT @ Xf)).sum(axis=0)
+
+    def evaluate(self, alive):
+        """
+        alive: (n x B) bool, the surviving nodes of B scenarios. Returns
+        (reach, value), each (B x S): nodes reached and contract value
+        delivered along edges between reached nodes, per scenario and source.
+        """
+        n, B = alive.shape
+        S = len(self.sources)
+        reach = np.zeros((B, S), dtype=np.int64)
+        value = np.zeros((B, S))
+        chunk = max(1, MAX_STATE_CELLS // max(n * B, 1))
+        for lo in range(0, S, chunk):
+            src = self.sources[lo:lo + chunk]
+            # Column b * len(src) + j holds scenario b seen from source j
+            cols = np.repeat(alive, len(src), axis=1)
+            X = np.zeros_like(cols)
+            rows = np.tile(src, B)
+            idx = np.arange(cols.shape[1])
+            X[rows, idx] = cols[rows, idx]
+            r, v = self._measure(self._propagate(X, cols))
+            reach[:, lo:lo + len(src)] = r.reshape(B, len(src))
+            value[:, lo:lo + len(src)] = v.reshape(B, len(src))
+        return reach, value
+
+    def evaluate_union(self, alive):
+        """Like evaluate, but for the union of everything any source reaches."""
+        X = np.zeros_like(alive)
+        X[self.sources] = alive[self.sources]
+        return self._measure(self._propagate(X, alive))
+
+    def run_batch(self, batch, size, seed):
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(batch,)))
+        failed = rng.random((len(self), size)) < self.p[:, None]
+        alive = ~failed
+        reach, value = self.evaluate(alive)
+        union_reach, union_value = self.evaluate_union(alive)
+        lost_value = self.baseline_union_value - union_value
+        lost_reach = self.baseline_union_reach - union_reach
+        F = failed.astype(float)
+        return {
+            "lost_value": lost_value,
+            "lost_reach": lost_reach.astype(float),
+            "lost_value_by_source": self.baseline_value - value,
+            "lost_reach_by_source": (self.baseline_reach - reach).astype(float),
+            # Loss totals over the scenarios each node failed in, for contributions
+            "failed_count": failed.sum(axis=1),
+            "failed_lost_value": F @ lost_value,
+            "failed_lost_reach": F @ lost_reach.astype(float),
+        }
+
+
+def _run_batch(model, batch, size, seed):
+    return model.run_batch(batch, size, seed)
+
+
+def _summary(values):
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return {"mean": 0.0, "std_error": 0.0, **{f"p{q}": 0.0 for q in PERCENTILES}}
+    out = {
+        "mean": float(values.mean()),
+        "std_error": float(values.std(ddof=1) / np.sqrt(len(values))) if len(values) > 1 else 0.0,
+    }
+    for q in PERCENTILES:
+        out[f"p{q}"] = float(np.percentile(values, q))
+    return out
+
+
+class SimulationResult:
+    def __init__(self, model, batches, elapsed, stop_reason):
+        self.model = model
+        self.elapsed = elapsed
+        self.stop_reason = stop_reason
+        self.num_batches = len(batches)
+
+        def cat(key):
+            return np.concatenate([b[key] for b in batches]) if batches else np.zeros(0)
+
+        def total(key):
+            return sum(b[key] for b in batches) if batches else np.zeros(len(model))
+
+        self.lost_value = cat("lost_value")
+        self.lost_reach = cat("lost_reach")
+        S = len(model.sources)
+        self.lost_value_by_source = (np.concatenate([b["lost_value_by_source"] for b in batches])
+                                     if batches else np.zeros((0, S)))
+        self.lost_reach_by_source = (np.concatenate([b["lost_reach_by_source"] for b in batches])
+                                     if batches else np.zeros((0, S)))
+        self.failed_count = total("failed_count")
+        self.failed_lost_value = total("failed_lost_value")
+        self.failed_lost_reach = total("failed_lost_reach")
+
+    @property
+    def num_scenarios(self):
+        return len(self.lost_value)
+
+    def contributions(self):
+        """
+        Per node: mean loss in scenarios where it failed minus the mean where
+        it survived (NaN where a node never, or always, failed).
+        """
+        n = self.num_scenarios
+        k = self.failed_count.astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            value = (self.failed_lost_value / k
+                     - (self.lost_value.sum() - self.failed_lost_value) / (n - k))
+            reach = (self.failed_lost_reach / k
+                     - (self.lost_reach.sum() - self.failed_lost_reach) / (n - k))
+        return value, reach
+
+    def to_dict(self, top_k=10):
+        model = self.model
+        value, reach = self.contributions()
+        ranked = np.argsort(-np.nan_to_num(value, nan=-np.inf), kind="stable")
+        ranked = [i for i in ranked[:top_k].tolist() if not np.isnan(value[i])]
+        return {
+            "scenarios": self.num_scenarios,
+            "batches": self.num_batches,
+            "elapsed_seconds": self.elapsed,
+            "stop_reason": self.stop_reason,
+            "baseline": {"reach": model.baseline_union_reach, "value": model.baseline_union_value},
+            "lost_value": _summary(self.lost_value),
+            "lost_reach": _summary(self.lost_reach),
+            "by_source": [
+                {
+                    "id": model.nodes[s],
+                    "baseline_reach": int(model.baseline_reach[0, j]),
+                    "baseline_value": float(model.baseline_value[0, j]),
+                    "lost_value": _summary(self.lost_value_by_source[:, j]),
+                    "lost_reach": _summary(self.lost_reach_by_source[:, j]),
+                }
+                for j, s in enumerate(model.sources.tolist())
+            ],
+            "contributions": [
+                {
+                    "id": model.nodes[i],
+                    "failure_probability": float(model.p[i]),
+                    "failures": int(self.failed_count[i]),
+                    "value": float(value[i]),
+                    "reach": float(reach[i]),
+                }
+                for i in ranked
+            ],
+        }
+
+
+def simulate(model, scenarios=10000, seed=0, batch_size=DEFAULT_BATCH_SIZE, workers=None,
+             rel_tol=None, min_scenarios=1000, time_budget=None):
+    """
+    Run up to `scenarios` scenarios. Stops early once the standard error of
+    the mean lost value falls below rel_tol * mean (checked after each batch,
+    once min_scenarios have run) or when time_budget seconds have passed.
+    """
+    workers = DEFAULT_WORKERS if workers is None else max(1, workers)
+    sizes = [batch_size] * (scenarios // batch_size)
+    if scenarios % batch_size:
+        sizes.append(scenarios % batch_size)
+    start = time.perf_counter()
+    done = []
+    stop_reason = "completed"
+    total = total_sq = 0.0
+    count = 0
+
+    def should_stop(result):
+        nonlocal total, total_sq, count
+        total += result["lost_value"].sum()
+        total_sq += (result["lost_value"] ** 2).sum()
+        count += len(result["lost_value"])
+        if rel_tol is not None and count >= min(min_scenarios, scenarios) and count > 1:
+            mean = total / count
+            var = max(total_sq / count - mean * mean, 0.0) * count / (count - 1)
+            if np.sqrt(var / count) <= rel_tol * abs(mean):
+                return "converged"
+        if time_budget is not None and time.perf_counter() - start >= time_budget:
+            return "time_budget"
+        return None
+
+    if workers == 1 or len(sizes) <= 1:
+        for k, size in enumerate(sizes):
+            done.append(model.run_batch(k, size, seed))
+            reason = should_stop(done[-1])
+            if reason:
+                stop_reason = reason
+                break
+    else:
+        with process_pool.shared(model) as state:
+            pending = {}
+            next_batch = 0
+            # Keep a couple of batches per worker in flight; results are
+            # consumed strictly in batch order
+            while next_batch < len(sizes) or pending:
+                while next_batch < len(sizes) and len(pending) < 2 * workers:
+                    pending[next_batch] = process_pool.submit(state, _run_batch, next_batch,
+                                                              sizes[next_batch], seed)
+                    next_batch += 1
+                k = len(done)
+                done.append(pending.pop(k).result())
+                reason = should_stop(done[-1])
+                if reason:
+                    stop_reason = reason
+                    for future in pending.values():
+                        future.cancel()
+                    # Batches already running still read the state file
+                    wait(pending.values())
+                    break
+    return SimulationResult(model, done, time.perf_counter() - start, stop_reason)
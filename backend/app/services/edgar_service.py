@@ -2,9 +2,12 @@
 # Service for integrating with EDGAR/edgartools
 import edgar
 
+from app.services.http_cache import install_requests_cache
+
 
 class EdgarService:
     def __init__(self):
+        install_requests_cache()
         self.client = edgar.tools.Client()
 
     def get_filings(self, cik, filing_type="10-K"):
@@ -0,0 +1,232 @@
+"""
+Columnar store of every award/subaward record, with per-pair aggregates.
+
+nx.DiGraph keeps one edge per (source, target), so building it from the
+edges file silently drops all but the last record for a pair. EdgeStore
+keeps every record in columnar arrays and computes per-pair aggregates
+(sum, count, min, max, latest value) in bulk with a NumPy sort + reduceat.
+The sort order doubles as an index from a pair to its raw records.
+"""
+import json
+import numpy as np
+import scipy.sparse as sps
+
+from app.services.graph_snapshot import MISSING, StringTable, encode_column, decode_column
+
+AGGREGATES = ("sum", "count", "min", "max", "latest")
+
+
+class PairAggregates:
+    """One row per distinct (source, target) pair, sorted by pair key."""
+
+    def __init__(self, num_nodes, src, tgt, value):
+        self.num_nodes = num_nodes
+        keys = src.astype(np.int64) * max(num_nodes, 1) + tgt
+        # Stable sort keeps record order within a pair, so the last record
+        # of each group is the latest one
+        self.order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self.order]
+        if len(sorted_keys):
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        self.offsets = np.r_[starts, len(sorted_keys)].astype(np.int64)
+        self.keys = sorted_keys[starts]
+        self.src = (self.keys // max(num_nodes, 1)).astype(np.int32)
+        self.tgt = (self.keys % max(num_nodes, 1)).astype(np.int32)
+
+        values = value[self.order]
+        valued = ~np.isnan(values)
+        self.count = np.diff(self.offsets)
+        if len(starts):
+            self.valued_count = np.add.reduceat(valued.astype(np.int64), starts)
+            self.sum = np.add.reduceat(np.where(valued, values, 0.0), starts)
+            self.min = np.fmin.reduceat(values, starts)
+            self.max = np.fmax.reduceat(values, starts)
+            self.latest = values[self.offsets[1:] - 1]
+        else:
+            self.valued_count = np.zeros(0, dtype=np.int64)
+            self.sum = self.min = self.max = self.latest = np.zeros(0)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def column(self, name):
+        if name not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {name!r}; expected one of {AGGREGATES}")
+        return getattr(self, name)
+
+    def find(self, u, v):
+        """Row of pair (u, v) by integer node index, or -1."""
+        key = int(u) * max(self.num_nodes, 1) + int(v)
+        i = int(np.searchsorted(self.keys, key))
+        return i if i < len(self.keys) and self.keys[i] == key else -1
+
+    def record_indices(self, row):
+        return self.order[self.offsets[row]:self.offsets[row + 1]]
+
+    def to_csr(self, weight="sum"):
+        """Pair weights as an n x n CSR matrix (missing values count as 0)."""
+        n = self.num_nodes
+        data = np.ones(len(self)) if weight is None else np.nan_to_num(self.column(weight).astype(float))
+        return sps.csr_array((data, (self.src, self.tgt)), shape=(n, n))
+
+
+class EdgeStore:
+    def __init__(self, node_ids, src, tgt, value, columns=None, strings=None):
+        """
+        node_ids: node id per integer index
+        src, tgt: integer endpoints per record; value: float64 (NaN = missing)
+        columns: other edge attributes as {name: (kind, array, mask)} in the
+            graph_snapshot encoding, decoded against `strings` (a callable
+            returning the string table)
+        """
+        self.node_ids = list(node_ids)
+        self.node_index = None
+        self.src = np.asarray(src, dtype=np.int32)
+        self.tgt = np.asarray(tgt, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.columns = columns or {}
+        self._strings = strings or (lambda: [])
+        self._aggregates = None
+
+    @classmethod
+    def from_records(cls, edges, nodes=()):
+        """Build from ingestion-style dicts; unknown endpoints become new nodes."""
+        index = {}
+        for node in nodes:
+            index.setdefault(node["id"], len(index))
+        src, tgt, rows = [], [], []
+        for edge in edges:
+            if "source" not in edge or "target" not in edge:
+                raise ValueError(f"Edge missing required fields: {edge}")
+            src.append(index.setdefault(edge["source"], len(index)))
+            tgt.append(index.setdefault(edge["target"], len(index)))
+            rows.append(edge)
+        value = np.fromiter(
+            (np.nan if r.get("value") is None else float(r["value"]) for r in rows),
+            dtype=np.float64, count=len(rows))
+        strings = StringTable()
+        columns = {}
+        keys = dict.fromkeys(k for r in rows for k in r if k not in ("source", "target", "value"))
+        for key in keys:
+            columns[key] = encode_column(rows, key, strings)
+        return cls(list(index), src, tgt, value, columns, lambda: strings.values)
+
+    @classmethod
+    def from_batches(cls, edge_batches, node_batches=()):
+        """
+        Build from an iterable of record batches (see streaming_loader),
+        keeping only the encoded columns of each batch. Non-value attributes
+        are stored with the "json" kind so their type can vary by batch.
+        """
+        index = {}
+        for batch in node_batches:
+            for node in batch:
+                index.setdefault(node["id"], len(index))
+        strings = StringTable()
+        src_parts, tgt_parts, value_parts = [], [], []
+        column_parts = {}
+        total = 0
+        for batch in edge_batches:
+            for edge in batch:
+                if "source" not in edge or "target" not in edge:
+                    raise ValueError(f"Edge missing required fields: {edge}")
+            n = len(batch)
+            src_parts.append(np.fromiter((index.setdefault(e["source"], len(index)) for e in batch),
+                                         dtype=np.int32, count=n))
+            tgt_parts.append(np.fromiter((index.setdefault(e["target"], len(index)) for e in batch),
+                                         dtype=np.int32, count=n))
+            value_parts.append(np.fromiter(
+                (np.nan if e.get("value") is None else float(e["value"]) for e in batch),
+                dtype=np.float64, count=n))
+            keys = dict.fromkeys(k for e in batch for k in e if k not in ("source", "target", "value"))
+            for key in keys:
+                if key not in column_parts:
+                    # Rows from earlier batches did not have this attribute
+                    column_parts[key] = ([np.full(total, MISSING, dtype=np.int32)],
+                                         [np.zeros(total, dtype=bool)])
+            for key, (arrays, masks) in column_parts.items():
+                arrays.append(np.fromiter(
+                    (MISSING if e.get(key) is None else strings.intern(json.dumps(e[key], sort_keys=True))
+                     for e in batch), dtype=np.int32, count=n))
+                masks.append(np.fromiter((key in e for e in batch), dtype=bool, count=n))
+            total += n
+
+        def concat(parts, dtype):
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        columns = {}
+        for key, (arrays, masks) in column_parts.items():
+            mask = concat(masks, bool)
+            columns[key] = ("json", concat(arrays, np.int32), None if mask.all() else mask)
+        return cls(list(index), concat(src_parts, np.int32), concat(tgt_parts, np.int32),
+                   concat(value_parts, np.float64), columns, lambda: strings.values)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Zero-parse view over a GraphSnapshot's CSR and edge columns."""
+        specs = snapshot.manifest["columns"]["edge"]
+        if "value" in specs and specs["value"]["kind"] in ("float", "int"):
+            value = np.asarray(snapshot.column("edge", "value"), dtype=np.float64)
+            if specs["value"]["masked"]:
+                value = np.where(snapshot.array("edge.value.mask"), value, np.nan)
+        else:
+            value = np.full(snapshot.num_edges, np.nan)
+        columns = {}
+        for key, spec in specs.items():
+            if key == "value":
+                continue
+            mask = snapshot.array(f"edge.{key}.mask") if spec["masked"] else None
+            columns[key] = (spec["kind"], snapshot.column("edge", key), mask)
+        return cls(snapshot.node_ids(), snapshot.sources(), snapshot.indices, value,
+                   columns, snapshot.strings)
+
+    def __len__(self):
+        return len(self.src)
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def aggregates(self):
+        if self._aggregates is None:
+            self._aggregates = PairAggregates(self.num_nodes, self.src, self.tgt, self.value)
+        return self._aggregates
+
+    def _index_of(self, node_id):
+        if self.node_index is None:
+            self.node_index = {n: i for i, n in enumerate(self.node_ids)}
+        return self.node_index.get(node_id, -1)
+
+    def records(self, source, target):
+        """Every raw record for (source, target), in ingestion order."""
+        u, v = self._index_of(source), self._index_of(target)
+        if u < 0 or v < 0:
+            return []
+        row = self.aggregates.find(u, v)
+        if row < 0:
+            return []
+        idx = self.aggregates.record_indices(row)
+        out = [{"source": source, "target": target, "value": None if val != val else val}
+               for val in self.value[idx].tolist()]
+        for key, (kind, raw, mask) in self.columns.items():
+            values = decode_column(kind, raw[idx], self._strings)
+            present = [True] * len(idx) if mask is None else mask[idx].tolist()
+            for rec, val, p in zip(out, values, present):
+                if p:
+                    rec[key] = val
+        return out
+
+    def pair_summary(self, source, target):
+        u, v = self._index_of(source), self._index_of(target)
+        row = self.aggregates.find(u, v) if u >= 0 and v >= 0 else -1
+        if row < 0:
+            return None
+        agg = self.aggregates
+        summary = {name: agg.column(name)[row].item() for name in AGGREGATES}
+        for name in ("sum", "min", "max", "latest"):
+            if summary[name] != summary[name]:
+                summary[name] = None
+        return {"source": source, "target": target, **summary}
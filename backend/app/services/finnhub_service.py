@@ -1,20 +1,65 @@
 # Service for integrating with Wikidata and Finnhub
-import httpx
+import asyncio
 import os
+import time
+
+import httpx
+
+from app.services.http_client import http_client
 
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
 
 class FinnhubService:
-    def __init__(self, api_key=FINNHUB_API_KEY):
+    def __init__(self, api_key=FINNHUB_API_KEY, client=None):
         self.api_key = api_key
+        self.client = client or http_client
 
     async def get_company_profile(self, symbol: str):
         url = f"{FINNHUB_BASE_URL}/stock/profile2"
         params = {"symbol": symbol, "token": self.api_key}
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+
+class EnrichStats:
+    def __init__(self):
+        self.requested = 0
+        self.found = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {"requested": self.requested, "found": self.found, "failed": self.failed,
+                "seconds": round(self.seconds, 3),
+                "profiles_per_sec": round(self.requested / self.seconds, 1) if self.seconds else 0.0}
+
+
+async def enrich_companies(symbols, service=None):
+    """
+    Company profiles for many ticker symbols at once. Every lookup is started
+    immediately; the shared client's per-host scheduler paces them to
+    Finnhub's limits. Returns (profiles, errors, EnrichStats): profiles maps
+    symbol -> profile ({} when Finnhub has none), errors symbol -> message.
+    """
+    service = service or FinnhubService()
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+    stats = EnrichStats()
+    stats.requested = len(symbols)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(service.get_company_profile(s) for s in symbols), return_exceptions=True)
+    stats.seconds = time.perf_counter() - start
+    profiles, errors = {}, {}
+    for symbol, result in zip(symbols, results):
+        if isinstance(result, (httpx.HTTPError, ValueError)):
+            errors[symbol] = str(result) or type(result).__name__
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            profiles[symbol] = result
+    stats.found = sum(1 for p in profiles.values() if p)
+    stats.failed = len(errors)
+    return profiles, errors, stats
 
 # Wikidata integration can be added similarly using httpx and SPARQL queries.
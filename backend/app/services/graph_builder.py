@@ -1,30 +1,148 @@
+import threading
 import networkx as nx
 from app.models.ingestion import NodeModel, EdgeModel
+from app.services.incremental_analytics import IncrementalAnalytics
 from typing import List, Optional
 
+
+class GraphVersionSnapshot:
+    """
+    One published, immutable version of the shared graph, plus the results
+    derived from it. Readers hold on to a snapshot for the whole request, so
+    they never see a half-applied update and never need a lock.
+    """
+
+    def __init__(self, version: int, graph: nx.DiGraph):
+        self.version = version
+        self.graph = nx.freeze(graph)
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def cached(self, name: str):
+        """The cached result for this version, or None."""
+        with self._lock:
+            return self._derived.get(name)
+
+    def derived(self, name: str, compute):
+        """Return compute(graph) for this version, reusing a cached result."""
+        with self._lock:
+            if name in self._derived:
+                return self._derived[name]
+        value = compute(self.graph)
+        with self._lock:
+            return self._derived.setdefault(name, value)
+
+
+def _copy_on_write(G: nx.DiGraph) -> nx.DiGraph:
+    # Shallow copies of the outer node/adjacency dicts only; the inner
+    # per-node dicts stay shared with the previous version until written
+    H = G.__class__()
+    H.graph = dict(G.graph)
+    H._node = dict(G._node)
+    H._adj = H._succ = dict(G._adj)
+    H._pred = dict(G._pred)
+    return H
+
+
+class _Writer:
+    """Applies node/edge additions to a copy-on-write graph."""
+
+    def __init__(self, base: nx.DiGraph):
+        self.base = base
+        self.graph = _copy_on_write(base)
+        self._owned = set()  # nodes whose adjacency dicts were already copied
+
+    def _own(self, n):
+        if n not in self._owned:
+            self.graph._adj[n] = dict(self.graph._adj[n])
+            self.graph._pred[n] = dict(self.graph._pred[n])
+            self._owned.add(n)
+
+    def add_node(self, n, attrs):
+        G = self.graph
+        if n in G._node:
+            G._node[n] = {**G._node[n], **attrs}
+        else:
+            G._node[n] = dict(attrs)
+            G._adj[n] = {}
+            G._pred[n] = {}
+            self._owned.add(n)
+
+    def add_edge(self, u, v, attrs):
+        """Returns True if (u, v) is a new edge."""
+        G = self.graph
+        for n in (u, v):
+            if n not in G._node:
+                self.add_node(n, {})
+        self._own(u)
+        self._own(v)
+        old = G._adj[u].get(v)
+        data = dict(attrs) if old is None else {**old, **attrs}
+        G._adj[u][v] = data
+        G._pred[v][u] = data
+        return old is None
+
+
 class GraphBuilder:
+    """
+    Versioned, copy-on-write store for the shared graph. Writers are
+    serialised and publish a new GraphVersionSnapshot atomically; readers
+    take snapshot() (or to_networkx()) and keep working on that version
+    while later updates are applied.
+    """
+
     def __init__(self):
-        self.graph = nx.DiGraph()
+        self._write_lock = threading.Lock()
+        self._current = GraphVersionSnapshot(0, nx.DiGraph())
+        self.analytics = IncrementalAnalytics()
+        self.analytics.apply([], [], self._current)
+
+    def snapshot(self) -> GraphVersionSnapshot:
+        return self._current
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        return self._current.graph
+
+    @property
+    def version(self) -> int:
+        return self._current.version
+
+    def _apply(self, nodes: Optional[List[NodeModel]], edges: Optional[List[EdgeModel]]):
+        with self._write_lock:
+            writer = _Writer(self._current.graph)
+            added_nodes, added_edges = [], []
+            for node in nodes or []:
+                writer.add_node(node.id, {**(node.attributes or {}), "type": node.type, "name": node.name})
+                added_nodes.append((node.id, node.type))
+            for edge in edges or []:
+                new = writer.add_edge(edge.source, edge.target, {**(edge.attributes or {}), "value": edge.value})
+                added_edges.append((edge.source, edge.target, new))
+            snapshot = GraphVersionSnapshot(self._current.version + 1, writer.graph)
+            # Only a batch that was applied in full reaches the analytics, in one step
+            self.analytics.apply(added_nodes, added_edges, snapshot)
+            self._current = snapshot
+            return snapshot.graph
 
     def add_nodes(self, nodes: List[NodeModel]):
-        for node in nodes:
-            self.graph.add_node(node.id, **(node.attributes or {}), type=node.type, name=node.name)
+        return self._apply(nodes, None)
 
     def add_edges(self, edges: List[EdgeModel]):
-        for edge in edges:
-            self.graph.add_edge(edge.source, edge.target, **(edge.attributes or {}), value=edge.value)
+        return self._apply(None, edges)
+
+    def cached(self, name: str):
+        """The cached result for the current version, or None."""
+        return self._current.cached(name)
+
+    def derived(self, name: str, compute):
+        """Return compute(graph) for the current version, reusing a cached result."""
+        return self._current.derived(name, compute)
 
     def build_from_data(self, nodes: List[NodeModel], edges: List[EdgeModel]):
-        self.add_nodes(nodes)
-        self.add_edges(edges)
-        return self.graph
+        return self._apply(nodes, edges)
 
     def update_graph(self, nodes: Optional[List[NodeModel]] = None, edges: Optional[List[EdgeModel]] = None):
-        if nodes:
-            self.add_nodes(nodes)
-        if edges:
-            self.add_edges(edges)
-        return self.graph
+        return self._apply(nodes, edges)
 
     def to_networkx(self):
-        return self.graph
+        return self._current.graph
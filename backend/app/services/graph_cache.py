@@ -0,0 +1,150 @@
+"""
+Process-wide graph cache.
+
+Graphs built from the ingested nodes/edges files are cached under a version
+key made of each file's path, size and mtime (or a content hash). Every
+lookup re-stats the files, so when ingestion rewrites them the next request
+builds a new version. Builds are single-flight: concurrent lookups for the
+same version wait for one build instead of each parsing the files.
+
+Derived results (analytics, indexes, ...) hang off the cached version and
+are built the same way, so they are computed once per graph version.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from app.utils.monitoring import (
+    GRAPH_CACHE_HITS,
+    GRAPH_CACHE_MISSES,
+    GRAPH_CACHE_COALESCED,
+    GRAPH_CACHE_BUILD_SECONDS,
+)
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def _hash_key(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return (os.path.abspath(path), digest.hexdigest())
+
+
+class _SingleFlight:
+    """Run each keyed build at most once at a time; later callers share the result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def do(self, key, kind, build):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            GRAPH_CACHE_COALESCED.labels(kind).inc()
+            return future.result()
+        GRAPH_CACHE_MISSES.labels(kind).inc()
+        start = time.perf_counter()
+        try:
+            result = build()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            GRAPH_CACHE_BUILD_SECONDS.labels(kind).observe(time.perf_counter() - start)
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+class GraphVersion:
+    """One cached graph plus the results derived from it."""
+
+    def __init__(self, key, version, graph):
+        self.key = key
+        self.version = version
+        self.graph = graph
+        self._derived = {}
+        self._lock = threading.Lock()
+        self._flights = _SingleFlight()
+
+    def derived(self, name, compute):
+        """Return compute(graph) for this version, computing it at most once."""
+        with self._lock:
+            if name in self._derived:
+                GRAPH_CACHE_HITS.labels(name).inc()
+                return self._derived[name]
+
+        def build():
+            with self._lock:
+                if name in self._derived:
+                    return self._derived[name]
+            value = compute(self.graph)
+            with self._lock:
+                self._derived[name] = value
+            return value
+
+        return self._flights.do(name, name, build)
+
+
+class GraphCache:
+    def __init__(self, use_content_hash=False):
+        self.use_content_hash = use_content_hash
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._versions = 0
+        self._flights = _SingleFlight()
+
+    def fingerprint(self, nodes_path, edges_path):
+        key_fn = _hash_key if self.use_content_hash else _stat_key
+        return (key_fn(nodes_path), key_fn(edges_path))
+
+    def get(self, nodes_path, edges_path, loader):
+        """
+        Return the GraphVersion for the files as they are now, calling
+        loader(nodes_path, edges_path) only if no cached version matches.
+        """
+        slot = (os.path.abspath(nodes_path), os.path.abspath(edges_path))
+        key = self.fingerprint(nodes_path, edges_path)
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is not None and entry.key == key:
+                GRAPH_CACHE_HITS.labels("graph").inc()
+                return entry
+
+        def build():
+            with self._lock:
+                entry = self._entries.get(slot)
+                if entry is not None and entry.key == key:
+                    return entry
+            graph = loader(nodes_path, edges_path)
+            with self._lock:
+                self._versions += 1
+                entry = GraphVersion(key, self._versions, graph)
+                # Readers still holding the previous version keep it alive
+                self._entries[slot] = entry
+            return entry
+
+        return self._flights.do((slot, key), "graph", build)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+graph_cache = GraphCache(
+    use_content_hash=os.getenv("GRAPH_CACHE_CONTENT_HASH", "").lower() in ("1", "true", "yes")
+)
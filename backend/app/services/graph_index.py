@@ -0,0 +1,177 @@
+"""
+Ordered and secondary indexes over one graph version, for paging.
+
+Nodes are keyed by insertion position and edges by (source position,
+target position); the store only ever appends nodes, so these keys are
+stable across versions and a cursor ("after key K") keeps working after
+updates. Secondary indexes hold the sorted keys per node type, per edge
+type, and edges ordered by (value, key) for contract value ranges. A page
+is a binary search for the cursor plus a slice: O(log N + page size).
+"""
+import base64
+import json
+import numpy as np
+
+# Edge key = source position << KEY_SHIFT | target position, independent of
+# the node count so keys (and cursors) survive nodes being appended
+KEY_SHIFT = 32
+_EMPTY = np.zeros(0, dtype=np.int64)
+MAX_KEY = 2 ** 63 - 1
+# Key parts per cursor kind: "key" is an int64 node / edge key, "value" a number
+CURSOR_SHAPES = {"node": ("key",), "edge": ("key",), "edge-value": ("value", "key")}
+
+
+def encode_cursor(kind, *key):
+    raw = json.dumps([kind, *key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, kind):
+    """The key stored in a cursor of `kind`; ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(decoded, list) or not decoded or decoded[0] != kind:
+        raise ValueError(f"Cursor is not a {kind} cursor")
+    key = decoded[1:]
+    shape = CURSOR_SHAPES[kind]
+    if len(key) != len(shape) or not all(_valid_part(part, p) for part, p in zip(shape, key)):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def _valid_part(part, value):
+    if isinstance(value, bool):
+        return False
+    if part == "key":
+        return isinstance(value, int) and 0 <= value <= MAX_KEY
+    return isinstance(value, (int, float)) and np.isfinite(value)
+
+
+class Page:
+    def __init__(self, rows, total, next_cursor):
+        self.rows = rows            # integer row ids into the index
+        self.total = total          # rows matching the filter
+        self.next_cursor = next_cursor
+
+
+class GraphIndex:
+    def __init__(self, node_ids, node_types, src, tgt, edge_types, edge_values):
+        self.node_ids = list(node_ids)
+        self.num_nodes = len(self.node_ids)
+        self.node_type_index = _group(np.asarray(node_types, dtype=object), np.arange(len(self.node_ids)))
+
+        keys = (np.asarray(src, dtype=np.int64) << KEY_SHIFT) | np.asarray(tgt, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        self.edge_keys = keys[order]
+        self.edge_src = np.asarray(src, dtype=np.int64)[order]
+        self.edge_tgt = np.asarray(tgt, dtype=np.int64)[order]
+        self.edge_values = np.asarray(edge_values, dtype=float)[order]
+        edge_types = np.asarray(edge_types, dtype=object)[order]
+        # Row numbers (positions in the key order) grouped by edge type
+        self.edge_type_index = {t: (rows, self.edge_keys[rows])
+                                for t, rows in _group(edge_types, np.arange(len(keys))).items()}
+
+        # (value, key) order over edges with a value, overall and per type;
+        # values and keys are materialised so a lookup never gathers
+        valued = np.flatnonzero(~np.isnan(self.edge_values))
+        value_order = valued[np.lexsort((self.edge_keys[valued], self.edge_values[valued]))]
+        self.value_index = {t: (rows, self.edge_values[rows], self.edge_keys[rows])
+                            for t, rows in _group(edge_types[value_order], value_order).items()}
+        self.value_index_all = (value_order, self.edge_values[value_order], self.edge_keys[value_order])
+
+    @classmethod
+    def from_graph(cls, G):
+        node_ids = list(G)
+        position = {v: i for i, v in enumerate(node_ids)}
+        node_types = [t for _, t in G.nodes(data="type")]
+        m = G.number_of_edges()
+        src = np.empty(m, dtype=np.int64)
+        tgt = np.empty(m, dtype=np.int64)
+        values = np.empty(m)
+        edge_types = []
+        for i, (u, v, data) in enumerate(G.edges(data=True)):
+            src[i] = position[u]
+            tgt[i] = position[v]
+            value = data.get("value")
+            values[i] = np.nan if value is None else float(value)
+            edge_types.append(data.get("type"))
+        return cls(node_ids, node_types, src, tgt, edge_types, values)
+
+    @property
+    def num_edges(self):
+        return len(self.edge_keys)
+
+    def page_nodes(self, limit, cursor=None, node_type=None, skip=0):
+        """Node positions for one page, in insertion order."""
+        rows = self.node_type_index.get(node_type, _EMPTY) if node_type is not None else None
+        total = self.num_nodes if rows is None else len(rows)
+        if cursor is not None:
+            (after,) = decode_cursor(cursor, "node")
+            start = (after + 1 if rows is None
+                     else int(np.searchsorted(rows, after, side="right")))
+        else:
+            start = skip
+        end = min(start + limit, total)
+        page = np.arange(start, end) if rows is None else rows[start:end]
+        next_cursor = encode_cursor("node", int(page[-1])) if end < total and len(page) else None
+        return Page(page, total, next_cursor)
+
+    def page_edges(self, limit, cursor=None, edge_type=None, min_value=None, max_value=None, skip=0):
+        """
+        Edge rows for one page: in (source, target) order, or in
+        (value, source, target) order when a value range is given.
+        """
+        if min_value is None and max_value is None:
+            if edge_type is None:
+                keys, rows = self.edge_keys, None
+            else:
+                rows, keys = self.edge_type_index.get(edge_type, (_EMPTY, _EMPTY))
+            total = len(keys)
+            if cursor is not None:
+                (after,) = decode_cursor(cursor, "edge")
+                start = int(np.searchsorted(keys, after, side="right"))
+            else:
+                start = skip
+            end = min(start + limit, total)
+            page = np.arange(start, end) if rows is None else rows[start:end]
+            next_cursor = (encode_cursor("edge", int(self.edge_keys[page[-1]]))
+                           if end < total and len(page) else None)
+            return Page(page, total, next_cursor)
+
+        rows, values, keys = (self.value_index_all if edge_type is None
+                              else self.value_index.get(edge_type, (_EMPTY, _EMPTY, _EMPTY)))
+        lo = 0 if min_value is None else int(np.searchsorted(values, min_value, side="left"))
+        hi = len(rows) if max_value is None else int(np.searchsorted(values, max_value, side="right"))
+        total = max(hi - lo, 0)
+        if cursor is not None:
+            after_value, after_key = decode_cursor(cursor, "edge-value")
+            # Skip the run of equal values up to and including the cursor key
+            run_lo = int(np.searchsorted(values, after_value, side="left"))
+            run_hi = int(np.searchsorted(values, after_value, side="right"))
+            within = int(np.searchsorted(keys[run_lo:run_hi], after_key, side="right"))
+            start = max(lo, run_lo + within)
+        else:
+            start = lo + skip
+        end = min(start + limit, hi)
+        page = rows[start:end] if start < end else _EMPTY
+        next_cursor = None
+        if end < hi and len(page):
+            next_cursor = encode_cursor("edge-value", float(values[end - 1]), int(keys[end - 1]))
+        return Page(page, total, next_cursor)
+
+    def edge_endpoints(self, row):
+        return self.node_ids[self.edge_src[row]], self.node_ids[self.edge_tgt[row]]
+
+
+def _group(labels, rows):
+    """{label: sorted rows with that label}, keeping the order of `rows`."""
+    if not len(rows):
+        return {}
+    codes = {}
+    label_codes = np.fromiter((codes.setdefault(l, len(codes)) for l in labels), dtype=np.int64, count=len(labels))
+    order = np.argsort(label_codes, kind="stable")
+    bounds = np.searchsorted(label_codes[order], np.arange(len(codes) + 1))
+    return {label: np.asarray(rows)[order[bounds[c]:bounds[c + 1]]] for label, c in codes.items()}
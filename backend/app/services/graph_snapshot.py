@@ -0,0 +1,349 @@
+"""
+Binary graph snapshot format.
+
+A snapshot is a directory of ``.npy`` arrays plus a ``manifest.json``:
+
+- ``strings.npy`` / ``string_offsets.npy``: interned UTF-8 string table
+- ``node_id.npy``: string index of each node id (node i -> integer id i)
+- ``indptr.npy`` / ``indices.npy``: CSR adjacency (edges sorted by source,
+  record order preserved within a source, parallel records kept)
+- ``node.<attr>.npy`` / ``edge.<attr>.npy``: columnar attributes, with an
+  optional ``.mask.npy`` marking rows where the attribute was present
+
+Arrays are memory-mapped on load, so opening a snapshot costs a few page
+faults instead of a full JSON parse. The NetworkX view is only built when
+something asks for it.
+"""
+import json
+import os
+import numpy as np
+import networkx as nx
+
+from app.services import streaming_loader
+
+FORMAT_VERSION = 1
+SNAPSHOT_DIR = "usaspending_graph.snapshot"
+MANIFEST = "manifest.json"
+
+MISSING = -1  # string index for None / absent values
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def default_snapshot_path(nodes_path):
+    return os.path.join(os.path.dirname(os.path.abspath(nodes_path)), SNAPSHOT_DIR)
+
+
+class StringTable:
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def intern(self, value):
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.index[value] = idx
+            self.values.append(value)
+        return idx
+
+    def to_arrays(self):
+        encoded = [s.encode("utf-8") for s in self.values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return blob, offsets
+
+
+def _column_kind(values):
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, str) for v in present):
+        return "string"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        if all(isinstance(v, int) for v in present) and len(present) == len(values):
+            return "int"
+        return "float"
+    return "json"
+
+
+def encode_column(rows, key, strings):
+    """Turn one attribute of a list of dicts into (kind, values, mask)."""
+    mask = np.fromiter((key in r for r in rows), dtype=bool, count=len(rows))
+    values = [r.get(key) for r in rows]
+    kind = _column_kind([v for v, p in zip(values, mask) if p])
+    if kind == "string":
+        arr = np.fromiter(
+            (MISSING if v is None else strings.intern(v) for v in values),
+            dtype=np.int32, count=len(values))
+    elif kind == "int":
+        arr = np.fromiter((0 if v is None else v for v in values), dtype=np.int64, count=len(values))
+    elif kind == "float":
+        arr = np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=len(values))
+    else:
+        arr = np.fromiter(
+            (MISSING if v is None else strings.intern(json.dumps(v, sort_keys=True)) for v in values),
+            dtype=np.int32, count=len(values))
+    return kind, arr, (None if mask.all() else mask)
+
+
+def decode_column(kind, raw, strings):
+    """
+    Inverse of encode_column for the rows in `raw`. `strings` is a callable
+    returning the decoded string table, only called for string/json kinds.
+    """
+    if kind == "string":
+        table = strings()
+        return [None if i < 0 else table[i] for i in raw.tolist()]
+    if kind == "json":
+        table = strings()
+        return [None if i < 0 else json.loads(table[i]) for i in raw.tolist()]
+    if kind == "float":
+        return [None if v != v else v for v in raw.tolist()]
+    return raw.tolist()
+
+
+def write_snapshot(nodes, edges, path, sources=None):
+    """
+    Write a snapshot from node/edge dicts (the ingestion JSON schema).
+    Raises ValueError on records missing required fields, like build_graph.
+    """
+    strings = StringTable()
+    node_index = {}
+    node_rows = []
+    for node in nodes:
+        if "id" not in node or "type" not in node or "name" not in node:
+            raise ValueError(f"Node missing required fields: {node}")
+        attrs = {k: v for k, v in node.items() if k != "id"}
+        if node["id"] in node_index:
+            # Later duplicates update attributes, as G.add_node does
+            node_rows[node_index[node["id"]]].update(attrs)
+            continue
+        node_index[node["id"]] = len(node_rows)
+        node_rows.append(attrs)
+
+    src = []
+    tgt = []
+    edge_rows = []
+    for edge in edges:
+        if "source" not in edge or "target" not in edge:
+            raise ValueError(f"Edge missing required fields: {edge}")
+        for endpoint in (edge["source"], edge["target"]):
+            if endpoint not in node_index:
+                node_index[endpoint] = len(node_rows)
+                node_rows.append({})
+        src.append(node_index[edge["source"]])
+        tgt.append(node_index[edge["target"]])
+        edge_rows.append({k: v for k, v in edge.items() if k not in ("source", "target")})
+
+    num_nodes = len(node_rows)
+    src = np.asarray(src, dtype=np.int64)
+    tgt = np.asarray(tgt, dtype=np.int32)
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+    edge_rows = [edge_rows[i] for i in order]
+
+    arrays = {
+        "node_id": np.fromiter((strings.intern(n) for n in node_index), dtype=np.int32, count=num_nodes),
+        "indptr": indptr,
+        "indices": tgt[order],
+    }
+    columns = {"node": {}, "edge": {}}
+    for scope, rows in (("node", node_rows), ("edge", edge_rows)):
+        keys = list(dict.fromkeys(k for r in rows for k in r))
+        for key in keys:
+            kind, arr, mask = encode_column(rows, key, strings)
+            arrays[f"{scope}.{key}"] = arr
+            if mask is not None:
+                arrays[f"{scope}.{key}.mask"] = mask
+            columns[scope][key] = {"kind": kind, "masked": mask is not None}
+    arrays["strings"], arrays["string_offsets"] = strings.to_arrays()
+
+    os.makedirs(path, exist_ok=True)
+    manifest_path = os.path.join(path, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    for name, arr in arrays.items():
+        # Replace rather than truncate, so readers still mapping the old
+        # arrays keep a valid inode
+        target = os.path.join(path, f"{name}.npy")
+        with open(target + ".tmp", "wb") as f:
+            np.save(f, arr)
+        os.replace(target + ".tmp", target)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "num_nodes": num_nodes,
+        "num_edges": int(len(edge_rows)),
+        "num_strings": len(strings.values),
+        "columns": columns,
+        "sources": sources or [],
+    }
+    # Manifest last: a snapshot without one is treated as incomplete
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return path
+
+
+def write_snapshot_from_json(nodes_path, edges_path, path=None):
+    """Snapshot the ingestion files (JSON or NDJSON, optionally compressed), streaming them."""
+    path = path or default_snapshot_path(nodes_path)
+    sources = [file_fingerprint(nodes_path), file_fingerprint(edges_path)]
+    nodes = streaming_loader.iter_records(nodes_path)
+    edges = streaming_loader.iter_records(edges_path)
+    return write_snapshot(nodes, edges, path, sources=sources)
+
+
+def is_fresh(path, nodes_path, edges_path):
+    """True if the snapshot exists and was written from the current JSON files."""
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return False
+    try:
+        current = [file_fingerprint(nodes_path), file_fingerprint(edges_path)]
+    except OSError:
+        return False
+    return manifest.get("sources") == current
+
+
+def _load_array(path):
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Zero-length arrays cannot be memory-mapped
+        return np.load(path)
+
+
+class GraphSnapshot:
+    """Read-only, memory-mapped view of a snapshot directory."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format: {self.manifest.get('format_version')}")
+        self._arrays = {}
+        self._strings = None
+        self._node_ids = None
+        self._graph = None
+
+    @classmethod
+    def load(cls, path):
+        return cls(path)
+
+    def array(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = _load_array(os.path.join(self.path, f"{name}.npy"))
+        return self._arrays[name]
+
+    @property
+    def num_nodes(self):
+        return self.manifest["num_nodes"]
+
+    @property
+    def num_edges(self):
+        return self.manifest["num_edges"]
+
+    @property
+    def indptr(self):
+        return self.array("indptr")
+
+    @property
+    def indices(self):
+        return self.array("indices")
+
+    def sources(self):
+        """Source node index of every edge, in CSR order."""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def in_degree(self):
+        return np.bincount(self.indices, minlength=self.num_nodes)
+
+    def string(self, idx):
+        if idx < 0:
+            return None
+        blob = self.array("strings")
+        offsets = self.array("string_offsets")
+        return bytes(blob[offsets[idx]:offsets[idx + 1]]).decode("utf-8")
+
+    def strings(self):
+        """Decode the full string table (cached)."""
+        if self._strings is None:
+            blob = bytes(self.array("strings"))
+            offsets = self.array("string_offsets").tolist()
+            self._strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8")
+                             for i in range(len(offsets) - 1)]
+        return self._strings
+
+    def node_ids(self):
+        if self._node_ids is None:
+            table = self.strings()
+            self._node_ids = [table[i] for i in self.array("node_id").tolist()]
+        return self._node_ids
+
+    def column_names(self, scope):
+        return list(self.manifest["columns"][scope])
+
+    def column(self, scope, key):
+        """Raw column array for a node or edge attribute."""
+        return self.array(f"{scope}.{key}")
+
+    def decoded_column(self, scope, key):
+        """Column as a list of Python values (None for null or absent rows)."""
+        kind = self.manifest["columns"][scope][key]["kind"]
+        return decode_column(kind, self.column(scope, key), self.strings)
+
+    def _attr_rows(self, scope, count):
+        rows = [{} for _ in range(count)]
+        for key, spec in self.manifest["columns"][scope].items():
+            values = self.decoded_column(scope, key)
+            if spec["masked"]:
+                mask = self.array(f"{scope}.{key}.mask").tolist()
+                for row, v, present in zip(rows, values, mask):
+                    if present:
+                        row[key] = v
+            else:
+                for row, v in zip(rows, values):
+                    row[key] = v
+        return rows
+
+    def to_networkx(self):
+        """Build (once) the nx.DiGraph that build_graph would produce from the same JSON."""
+        if self._graph is None:
+            ids = self.node_ids()
+            G = nx.DiGraph()
+            G.add_nodes_from(zip(ids, self._attr_rows("node", self.num_nodes)))
+            src = self.sources().tolist()
+            tgt = self.indices.tolist()
+            G.add_edges_from(
+                (ids[u], ids[v], attrs)
+                for u, v, attrs in zip(src, tgt, self._attr_rows("edge", self.num_edges))
+            )
+            self._graph = G
+        return self._graph
+
+    @property
+    def graph(self):
+        return self.to_networkx()
+
+
+if __name__ == "__main__":
+    import sys
+    nodes_path = sys.argv[1] if len(sys.argv) > 1 else "usaspending_nodes.json"
+    edges_path = sys.argv[2] if len(sys.argv) > 2 else "usaspending_edges.json"
+    out = write_snapshot_from_json(nodes_path, edges_path)
+    snap = GraphSnapshot.load(out)
+    print(f"Wrote snapshot {out}: {snap.num_nodes} nodes, {snap.num_edges} edges, "
+          f"{snap.manifest['num_strings']} strings.")
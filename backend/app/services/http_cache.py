@@ -0,0 +1,408 @@
+"""
+Content-addressed on-disk cache for responses from the external data sources.
+
+Requests are keyed on their normalised form: method, lower-cased scheme and
+host, the query with credentials (token, api_key) removed and sorted, the
+Accept header, and the body (JSON is canonicalised). Response bodies are
+stored once per content hash under bodies/, so identical payloads behind
+different requests share a file; entries/ holds one small JSON record per
+request key, and its mtime is the LRU clock.
+
+Each source has its own TTL. A stale entry carrying an ETag or
+Last-Modified is revalidated with a conditional request, and a 304 renews
+it without re-downloading. Entries are evicted least-recently-used first
+when the cache outgrows its disk budget. In offline mode every stored
+entry is served regardless of age and a miss raises OfflineCacheMiss
+instead of touching the network, so ingestion and the USAspending / EDGAR
+scripts can be replayed from disk.
+
+httpx clients use CachingTransport (see cached_async_client); libraries
+that create their own requests.Session (usaspending-orm,
+sec-edgar-downloader) are covered by install_requests_cache().
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import anyio
+import httpx
+
+from app.utils.monitoring import HTTP_CACHE_EVICTIONS, HTTP_CACHE_REQUESTS
+
+DEFAULT_DIR = ".http_cache"
+DEFAULT_MAX_BYTES = 1 << 30
+
+# Host (or parent domain) -> source name
+SOURCES = {
+    "finnhub.io": "finnhub",
+    "wikidata.org": "wikidata",
+    "sec.gov": "edgar",
+    "usaspending.gov": "usaspending",
+}
+# Seconds; filings and closed fiscal years do not change, quotes/profiles do
+DEFAULT_TTLS = {
+    "finnhub": 6 * 3600,
+    "wikidata": 7 * 86400,
+    "edgar": 30 * 86400,
+    "usaspending": 86400,
+}
+CACHEABLE_METHODS = {"GET", "POST"}  # POST: the read-only search APIs
+SECRET_PARAMS = {"token", "api_key", "apikey", "key"}
+KEY_HEADERS = ("accept",)
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+
+class OfflineCacheMiss(LookupError):
+    """Offline mode and the request has never been recorded."""
+
+
+def source_for(url):
+    host = (urlsplit(url).hostname or "").lower()
+    for domain, source in SOURCES.items():
+        if host == domain or host.endswith("." + domain):
+            return source
+    return None
+
+
+def normalize_url(url):
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+def _normalize_body(body):
+    if not body:
+        return b""
+    if isinstance(body, str):
+        body = body.encode()
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except (ValueError, UnicodeDecodeError):
+        return bytes(body)
+
+
+def request_key(method, url, headers, body):
+    h = hashlib.sha256()
+    h.update(method.upper().encode() + b"\n" + normalize_url(url).encode() + b"\n")
+    lowered = {k.lower(): v for k, v in (headers or {}).items()}
+    for name in KEY_HEADERS:
+        h.update(f"{name}:{lowered.get(name, '')}\n".encode())
+    h.update(_normalize_body(body))
+    return h.hexdigest()
+
+
+class CachedResponse:
+    def __init__(self, status, headers, content):
+        self.status = status
+        self.headers = headers
+        self.content = content
+
+
+class Lookup:
+    """Cache state of one request: `servable` entries are answered from disk."""
+
+    def __init__(self, key, source, meta, content, servable, result):
+        self.key = key
+        self.source = source
+        self.meta = meta
+        self.content = content
+        self.servable = servable
+        self.result = result
+
+    @property
+    def validators(self):
+        headers = {}
+        if self.meta and self.meta["headers"].get("etag"):
+            headers["If-None-Match"] = self.meta["headers"]["etag"]
+        if self.meta and self.meta["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = self.meta["headers"]["last-modified"]
+        return headers
+
+    def response(self):
+        return CachedResponse(self.meta["status"], dict(self.meta["headers"]), self.content)
+
+
+class HttpCache:
+    def __init__(self, root=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, ttls=None, offline=False, enabled=True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.offline = offline
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._index = None  # key -> [atime, body hash, entry bytes]
+        self._bodies = {}   # body hash -> bytes
+        self._total = 0
+
+    @classmethod
+    def from_env(cls):
+        ttls = {source: float(os.environ[f"HTTP_CACHE_TTL_{source.upper()}"])
+                for source in DEFAULT_TTLS if f"HTTP_CACHE_TTL_{source.upper()}" in os.environ}
+        return cls(
+            root=os.getenv("HTTP_CACHE_DIR", DEFAULT_DIR),
+            max_bytes=int(float(os.getenv("HTTP_CACHE_MAX_MB", DEFAULT_MAX_BYTES >> 20)) * (1 << 20)),
+            ttls=ttls,
+            offline=os.getenv("HTTP_CACHE_OFFLINE", "").lower() in ("1", "true", "yes"),
+            enabled=os.getenv("HTTP_CACHE_DISABLED", "").lower() not in ("1", "true", "yes"),
+        )
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, "entries", key[:2], key + ".json")
+
+    def _body_path(self, digest):
+        return os.path.join(self.root, "bodies", digest[:2], digest)
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        self._index, self._bodies, self._total = {}, {}, 0
+        for kind in ("entries", "bodies"):
+            for dirpath, _, files in os.walk(os.path.join(self.root, kind)):
+                for name in files:
+                    path = os.path.join(dirpath, name)
+                    if name.endswith(".tmp"):
+                        os.remove(path)
+                        continue
+                    st = os.stat(path)
+                    if kind == "bodies":
+                        self._bodies[name] = st.st_size
+                    else:
+                        try:
+                            with open(path) as f:
+                                digest = json.load(f)["body"]
+                        except (OSError, ValueError, KeyError):
+                            os.remove(path)
+                            continue
+                        self._index[name[:-len(".json")]] = [st.st_mtime, digest, st.st_size]
+                    self._total += st.st_size
+
+    def stats(self):
+        with self._lock:
+            self._load_index()
+            return {"entries": len(self._index), "bodies": len(self._bodies), "bytes": self._total,
+                    "max_bytes": self.max_bytes}
+
+    def lookup(self, method, url, headers=None, body=None):
+        """Lookup for a cacheable request, None when the request bypasses the cache."""
+        source = source_for(url)
+        if not self.enabled or source is None or method.upper() not in CACHEABLE_METHODS:
+            return None
+        key = request_key(method, url, headers, body)
+        meta, content = self._read(key)
+        if meta is None:
+            if self.offline:
+                HTTP_CACHE_REQUESTS.labels(source, "offline_miss").inc()
+                raise OfflineCacheMiss(f"{method.upper()} {normalize_url(url)} is not in the HTTP cache")
+            return Lookup(key, source, None, None, False, "miss")
+        if self.offline:
+            result, servable = "offline_hit", True
+        else:
+            servable = time.time() - meta["stored_at"] < self.ttls.get(source, 0)
+            result = "hit" if servable else "miss"
+        if servable:
+            self._touch(key)
+            HTTP_CACHE_REQUESTS.labels(source, result).inc()
+        return Lookup(key, source, meta, content, servable, result)
+
+    def record(self, lookup, method, url, status, headers, content):
+        """
+        Store a network response for `lookup`. Returns the cached response to
+        serve when the origin answered 304, else None (serve the network response).
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+        if status == 304 and lookup.meta is not None:
+            meta = dict(lookup.meta, stored_at=time.time())
+            meta["headers"] = {**meta["headers"],
+                               **{k: headers[k] for k in ("etag", "last-modified") if k in headers}}
+            self._write(lookup.key, meta, None)
+            HTTP_CACHE_REQUESTS.labels(lookup.source, "revalidated").inc()
+            lookup.meta = meta
+            return lookup.response()
+        HTTP_CACHE_REQUESTS.labels(lookup.source, "miss").inc()
+        if status == 200:
+            meta = {
+                "method": method.upper(), "url": normalize_url(url), "source": lookup.source, "status": status,
+                "headers": {k: headers[k] for k in STORED_HEADERS if k in headers},
+                "stored_at": time.time(),
+            }
+            self._write(lookup.key, meta, content)
+        return None
+
+    def _read(self, key):
+        try:
+            with open(self._entry_path(key)) as f:
+                meta = json.load(f)
+            with open(self._body_path(meta["body"]), "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    def _touch(self, key):
+        now = time.time()
+        try:
+            os.utime(self._entry_path(key), (now, now))
+        except OSError:
+            return
+        with self._lock:
+            if self._index is not None and key in self._index:
+                self._index[key][0] = now
+
+    @staticmethod
+    def _atomic_write(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write(self, key, meta, content):
+        with self._lock:
+            self._load_index()
+            if content is not None:
+                digest = hashlib.sha256(content).hexdigest()
+                if digest not in self._bodies:
+                    self._atomic_write(self._body_path(digest), content)
+                    self._bodies[digest] = len(content)
+                    self._total += len(content)
+                meta = dict(meta, body=digest)
+            data = json.dumps(meta, separators=(",", ":")).encode()
+            self._atomic_write(self._entry_path(key), data)
+            old = self._index.get(key)
+            if old is not None:
+                self._total -= old[2]
+            self._index[key] = [time.time(), meta["body"], len(data)]
+            self._total += len(data)
+            if old is not None and old[1] != meta["body"]:
+                self._release(old[1])
+            self._evict()
+
+    def _release(self, digest):
+        """Delete a body no entry refers to any more."""
+        if any(entry[1] == digest for entry in self._index.values()):
+            return
+        size = self._bodies.pop(digest, None)
+        if size is not None:
+            self._total -= size
+            try:
+                os.remove(self._body_path(digest))
+            except OSError:
+                pass
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+        for key, (_, digest, size) in sorted(self._index.items(), key=lambda item: item[1][0]):
+            if self._total <= self.max_bytes:
+                break
+            del self._index[key]
+            self._total -= size
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+            self._release(digest)
+            HTTP_CACHE_EVICTIONS.inc()
+
+
+http_cache = HttpCache.from_env()
+
+
+def _decoded_headers(headers):
+    # Cached and re-served content is already decoded
+    return [(k, v) for k, v in headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """httpx transport answering cacheable requests from an HttpCache."""
+
+    def __init__(self, cache=None, transport=None):
+        self.cache = cache or http_cache
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        body = await request.aread()
+        lookup = await anyio.to_thread.run_sync(
+            self.cache.lookup, request.method, str(request.url), request.headers, body)
+        if lookup is None:
+            return await self.transport.handle_async_request(request)
+        if not lookup.servable:
+            request.headers.update(lookup.validators)
+            response = await self.transport.handle_async_request(request)
+            content = await response.aread()
+            await response.aclose()
+            cached = await anyio.to_thread.run_sync(
+                self.cache.record, lookup, request.method, str(request.url), response.status_code,
+                response.headers, content)
+            if cached is None:
+                return httpx.Response(response.status_code, headers=_decoded_headers(response.headers),
+                                      content=content, request=request)
+        else:
+            cached = lookup.response()
+        return httpx.Response(cached.status, headers=cached.headers, content=cached.content, request=request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def cached_async_client(cache=None, **kwargs):
+    """httpx.AsyncClient whose requests to known sources go through the cache."""
+    return httpx.AsyncClient(transport=CachingTransport(cache), **kwargs)
+
+
+_requests_send = None
+
+
+def install_requests_cache(cache=None):
+    """
+    Route every requests.Session through `cache` (process-wide, idempotent);
+    returns a function that uninstalls it.
+    """
+    global _requests_send
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    cache = cache or http_cache
+    if _requests_send is not None:
+        return uninstall_requests_cache
+    original = _requests_send = requests.Session.send
+
+    def send(session, request, **kwargs):
+        lookup = cache.lookup(request.method, request.url, request.headers, request.body)
+        if lookup is None:
+            return original(session, request, **kwargs)
+        if lookup.servable:
+            cached = lookup.response()
+        else:
+            request.headers.update(lookup.validators)
+            response = original(session, request, **kwargs)
+            cached = cache.record(lookup, request.method, request.url, response.status_code,
+                                  response.headers, response.content)
+            if cached is None:
+                return response
+        response = requests.Response()
+        response.status_code = cached.status
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(cached.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = cached.content
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        return response
+
+    requests.Session.send = send
+    return uninstall_requests_cache
+
+
+def uninstall_requests_cache():
+    global _requests_send
+    if _requests_send is not None:
+        import requests
+        requests.Session.send = _requests_send
+        _requests_send = None
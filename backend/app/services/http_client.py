@@ -0,0 +1,187 @@
+"""
+App-lifetime pooled HTTP client for the enrichment APIs.
+
+One httpx.AsyncClient (HTTP/2 when the h2 package is installed, keep-alive
+connections otherwise) is shared by FinnhubService, WikidataService and
+finnhub_get, so lookups reuse warm connections instead of paying a TCP+TLS
+handshake each. Requests first go through the on-disk HTTP cache; only
+misses reach the per-host scheduler, which holds each host to its
+published limits - a token bucket for the request rate and a cap on
+requests in flight - and otherwise lets requests run concurrently. A 429
+is retried after Retry-After (or exponential backoff).
+"""
+import asyncio
+import os
+import random
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.services.http_cache import CachingTransport
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 30.0
+MAX_RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_BACKOFF = 1.0
+
+
+class TokenBucket:
+    """`rate` requests per second on average, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """One TokenBucket per host, created on first use."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+
+    async def acquire(self, url):
+        host = urlsplit(url).netloc
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.capacity)
+        await bucket.acquire()
+
+
+class HostPolicy:
+    """Rate (requests/second, None for unlimited) and in-flight cap for one host."""
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+
+
+def default_policies():
+    # Finnhub free tier: 60 calls/minute and at most 30 calls/second.
+    # Wikidata Query Service: 5 parallel queries per client.
+    finnhub_per_min = float(os.getenv("FINNHUB_RATE_PER_MIN", 60))
+    return {
+        "finnhub.io": HostPolicy(rate=finnhub_per_min / 60, max_in_flight=30),
+        "query.wikidata.org": HostPolicy(max_in_flight=int(os.getenv("WIKIDATA_MAX_CONCURRENT", 5))),
+    }
+
+
+class _HostSlot:
+    def __init__(self, policy):
+        self.bucket = TokenBucket(policy.rate, policy.burst) if policy.rate else None
+        self.semaphore = asyncio.Semaphore(policy.max_in_flight) if policy.max_in_flight else None
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """Holds each host to its HostPolicy; 429s are retried after Retry-After."""
+
+    def __init__(self, transport, policies=None):
+        self.transport = transport
+        self.policies = default_policies() if policies is None else policies
+        self.slots = {}
+
+    def slot(self, host):
+        slot = self.slots.get(host)
+        if slot is None:
+            slot = self.slots[host] = _HostSlot(self.policies.get(host) or HostPolicy())
+        return slot
+
+    async def _send(self, slot, request):
+        if slot.bucket is not None:
+            await slot.bucket.acquire()
+        slot.in_flight += 1
+        slot.max_in_flight = max(slot.max_in_flight, slot.in_flight)
+        try:
+            response = await self.transport.handle_async_request(request)
+            await response.aread()
+            return response
+        finally:
+            slot.in_flight -= 1
+
+    async def handle_async_request(self, request):
+        slot = self.slot(request.url.host)
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            if slot.semaphore is not None:
+                async with slot.semaphore:
+                    response = await self._send(slot, request)
+            else:
+                response = await self._send(slot, request)
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else \
+                RATE_LIMIT_BACKOFF * 2 ** attempt * (1 + random.random())
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class SharedHttpClient:
+    def __init__(self, max_connections=None, policies=None, transport=None, cache=None):
+        self.max_connections = max_connections or int(os.getenv("HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+        self.policies = policies
+        self.transport = transport  # innermost transport; tests inject a MockTransport
+        self.cache = cache
+        self._client = None
+        self._scheduler = None
+
+    @property
+    def client(self):
+        """The shared AsyncClient, created on first use."""
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections,
+                                  keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY)
+            inner = self.transport or httpx.AsyncHTTPTransport(http2=HTTP2, limits=limits)
+            self._scheduler = ScheduledTransport(inner, self.policies)
+            self._client = httpx.AsyncClient(transport=CachingTransport(self.cache, self._scheduler),
+                                             timeout=DEFAULT_TIMEOUT)
+        return self._client
+
+    @property
+    def scheduler(self):
+        self.client
+        return self._scheduler
+
+    async def get(self, url, **kwargs):
+        return await self.client.get(url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.client.post(url, **kwargs)
+
+    async def close(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+
+http_client = SharedHttpClient()
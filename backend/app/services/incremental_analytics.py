@@ -0,0 +1,239 @@
+"""
+Analytics state maintained incrementally as the shared graph grows.
+
+GraphBuilder reports each write batch in one apply() call, together with
+the snapshot it publishes for it, so readers never see half a batch and a
+batch that fails is never reported. Degrees and per-type node counts are
+updated in O(1) per change. The adjacency and the
+eigenvector/PageRank/HITS vectors are refreshed lazily on the next read:
+the pending edges are added to the previous CSR matrix and power
+iteration restarts from the previous vectors, so a small delta converges
+in a few iterations. The set of nodes touched since the last refresh is
+tracked; when it covers more than FULL_RECOMPUTE_FRACTION of the graph the
+matrix is rebuilt and iteration starts cold instead.
+
+Power iteration runs outside the lock that apply() takes, so a refresh
+never blocks graph writes; changes arriving meanwhile are picked up by the
+next refresh. Every refresh keeps the snapshot its counters described, so
+callers can compute other metrics (e.g. betweenness) on the same version.
+"""
+import threading
+import time
+from collections import Counter
+import numpy as np
+import scipy.sparse as sps
+import networkx as nx
+
+from app.services.sparse_analytics import SparseAnalyticsEngine
+from app.services.risk_scoring import score_risk
+
+FULL_RECOMPUTE_FRACTION = 0.25
+
+
+class IncrementalAnalytics:
+    def __init__(self, max_iter=1000, full_recompute_fraction=FULL_RECOMPUTE_FRACTION):
+        self.max_iter = max_iter
+        self.full_recompute_fraction = full_recompute_fraction
+        self.node_ids = []
+        self.index = {}
+        self.types = []
+        self.type_counts = Counter()
+        self.in_degree = []
+        self.out_degree = []
+        self.src = []
+        self.tgt = []
+        self._lock = threading.Lock()           # guards the counters above
+        self._refresh_lock = threading.Lock()   # one refresh at a time
+        self._pending = 0          # edges appended since the last refresh
+        self._dirty = set()        # node indices touched since the last refresh
+        self._A = None
+        self._arrays = None
+        self.snapshot = None       # graph version the counters describe, set by apply()
+        self._published = None     # (snapshot, node ids, metric arrays) of the last refresh
+        self.last_refresh = None
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.src)
+
+    def _ensure(self, node_id, node_type=None):
+        i = self.index.get(node_id)
+        if i is None:
+            i = len(self.node_ids)
+            self.index[node_id] = i
+            self.node_ids.append(node_id)
+            self.types.append(node_type)
+            self.type_counts[node_type] += 1
+            self.in_degree.append(0)
+            self.out_degree.append(0)
+            self._dirty.add(i)
+        elif node_type is not None and self.types[i] != node_type:
+            self.type_counts[self.types[i]] -= 1
+            if not self.type_counts[self.types[i]]:
+                del self.type_counts[self.types[i]]
+            self.types[i] = node_type
+            self.type_counts[node_type] += 1
+        return i
+
+    def _add_edge(self, source, target, new):
+        u = self._ensure(source)
+        v = self._ensure(target)
+        if not new:
+            return
+        self.out_degree[u] += 1
+        self.in_degree[v] += 1
+        self.src.append(u)
+        self.tgt.append(v)
+        self._pending += 1
+        self._dirty.update((u, v))
+
+    def add_node(self, node_id, node_type=None):
+        with self._lock:
+            self._ensure(node_id, node_type)
+
+    def add_edge(self, source, target, new=True):
+        """Record an edge; new=False means an existing pair was only re-attributed."""
+        with self._lock:
+            self._add_edge(source, target, new)
+
+    def apply(self, nodes, edges, snapshot=None):
+        """
+        Record a whole batch at once: nodes as (id, type), edges as
+        (source, target, new). `snapshot` is the graph version that
+        includes the batch.
+        """
+        with self._lock:
+            for node_id, node_type in nodes:
+                self._ensure(node_id, node_type)
+            for source, target, new in edges:
+                self._add_edge(source, target, new)
+            self.snapshot = snapshot
+
+    def _degree_centrality(self, n):
+        degree = np.add(self.in_degree[:n], self.out_degree[:n], dtype=float)
+        if n <= 1:
+            return np.ones(n)
+        return degree / (n - 1)
+
+    def degree_centrality(self):
+        with self._lock:
+            return self._degree_centrality(len(self))
+
+    def _warm_vector(self, previous, n, norm):
+        x = np.full(n, 1.0 / n)
+        if previous is not None:
+            x[:len(previous)] = previous
+        if norm == "l2":
+            return x / (np.linalg.norm(x) or 1.0)
+        if norm == "max":
+            return x / (x.max() or 1.0)
+        return x / (x.sum() or 1.0)
+
+    def refresh(self):
+        """Bring the spectral metrics up to date; returns what was done."""
+        with self._refresh_lock:
+            start = time.perf_counter()
+            with self._lock:
+                n = len(self)
+                dirty = len(self._dirty)
+                if self._arrays is not None and not dirty:
+                    # No node or edge was added, so the metrics hold for the latest version too
+                    self._published = (self.snapshot, *self._published[1:])
+                    self.last_refresh = {"mode": "cached", "dirty_nodes": 0, "iterations": {}, "seconds": 0.0}
+                    return self.last_refresh
+                full = (self._A is None or self._arrays is None
+                        or dirty > self.full_recompute_fraction * n)
+                first = 0 if full else len(self.src) - self._pending
+                src = np.asarray(self.src[first:], dtype=np.int64)
+                tgt = np.asarray(self.tgt[first:], dtype=np.int64)
+                node_ids = self.node_ids[:n]
+                snapshot = self.snapshot
+                degree = self._degree_centrality(n)
+                self._pending = 0
+                self._dirty.clear()
+            previous = self._arrays
+
+            try:
+                delta = sps.csr_array((np.ones(len(src)), (src, tgt)), shape=(n, n))
+                if full:
+                    A = delta
+                else:
+                    A = self._A.copy()
+                    A.resize((n, n))
+                    A = A + delta
+                A.data[:] = 1.0
+                engine = SparseAnalyticsEngine(node_ids, A)
+
+                def start_from(name, norm):
+                    return None if full else self._warm_vector(previous.get(name), n, norm)
+
+                arrays = {}
+                try:
+                    arrays["eigenvector_centrality"] = engine.eigenvector_centrality(
+                        max_iter=self.max_iter, x0=start_from("eigenvector_centrality", "l2"))
+                except nx.PowerIterationFailedConvergence:
+                    arrays["eigenvector_centrality"] = None
+                try:
+                    arrays["pagerank"] = engine.pagerank(max_iter=self.max_iter, x0=start_from("pagerank", "sum"))
+                except nx.PowerIterationFailedConvergence:
+                    arrays["pagerank"] = None
+                try:
+                    arrays["hub"], arrays["authority"] = engine.hits(
+                        max_iter=self.max_iter, x0=start_from("authority", "max"))
+                except nx.PowerIterationFailedConvergence:
+                    arrays["hub"] = arrays["authority"] = None
+            except Exception:
+                # Force a full rebuild next time rather than lose the delta
+                with self._lock:
+                    self._A = None
+                    self._dirty.update(range(n))
+                raise
+
+            with self._lock:
+                self._A = A
+                self._arrays = arrays
+                self._published = (snapshot, node_ids, {"degree_centrality": degree, **arrays})
+                self.last_refresh = {
+                    "mode": "full" if full else "warm",
+                    "dirty_nodes": dirty,
+                    "iterations": dict(engine.iterations),
+                    "seconds": time.perf_counter() - start,
+                }
+                return self.last_refresh
+
+    def _refreshed(self):
+        """(snapshot, node ids, metric arrays) of one refresh, all describing the same graph version."""
+        self.refresh()
+        with self._lock:
+            return self._published
+
+    def centrality(self):
+        """Degree plus spectral metrics as arrays in node order (None if not converged)."""
+        return self._refreshed()[2]
+
+    def centrality_snapshot(self):
+        """(snapshot, {metric: {node id: value}}), the metrics computed on that snapshot."""
+        snapshot, node_ids, arrays = self._refreshed()
+        return snapshot, {name: {} if values is None else dict(zip(node_ids, values.tolist()))
+                          for name, values in arrays.items()}
+
+    def centrality_dicts(self):
+        return self.centrality_snapshot()[1]
+
+    def risk_scores(self, macro_table=None, weights=None, regions=None):
+        """RiskScores over the current centralities; re-scoring is a few vector ops."""
+        _, node_ids, arrays = self._refreshed()
+        return score_risk(node_ids, arrays, macro_table, weights, regions)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "num_nodes": len(self),
+                "num_edges": self.num_edges,
+                "type_counts": dict(self.type_counts),
+                "dirty_nodes": len(self._dirty),
+                "last_refresh": self.last_refresh,
+            }
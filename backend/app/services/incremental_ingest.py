@@ -0,0 +1,235 @@
+"""
+Checkpointed incremental USAspending ingestion.
+
+The checkpoint keeps a watermark per (fiscal year, agency) partition, the
+node and edge records each award contributed, and a reference count per
+node. The first run of a partition takes the top `limit` awards by amount,
+as the full ingest does, and sets the watermark to the run date. Later runs
+page through that partition's awards sorted by last-modified date and stop
+at the first one older than the watermark, so they fetch only new or
+changed awards (and their subawards). Re-fetching an unchanged award
+yields no delta.
+
+Replacing an award's contribution touches only its own edges and the nodes
+it references: a node is removed when no award references it any more.
+The net change of a run is written as a delta file (added / changed /
+removed nodes and edges). The checkpoint is saved after every partition,
+together with the run's progress, so a run that dies part-way resumes with
+the remaining partitions and still emits one delta covering the whole run.
+"""
+import asyncio
+import datetime
+import json
+import os
+import time
+
+import httpx
+
+from app.services.usaspending_fetcher import LAST_MODIFIED, USAspendingFetcher, build_records
+
+STATE_VERSION = 2  # 2: suppliers keyed on sub_award_recipient_id
+DEFAULT_STATE_PATH = os.getenv("USASPENDING_INGEST_STATE", "usaspending_ingest_state.json")
+
+
+def partition_key(fiscal_year, agency):
+    return f"{fiscal_year}|{agency}"
+
+
+def award_key(award):
+    return award.get("generated_internal_id") or award.get("Award ID")
+
+
+def edge_key(edge):
+    return json.dumps([edge["source"], edge["target"], edge["type"],
+                       edge.get("award_id") or edge.get("subaward_id")])
+
+
+class IngestState:
+    def __init__(self):
+        self.watermarks = {}  # partition -> YYYY-MM-DD
+        self.awards = {}      # award key -> {"nodes": [...], "edges": [...]}
+        self.nodes = {}       # node id -> {"node": {...}, "refs": n}
+        self.run = None       # in-progress run: started, done partitions, pre-run values of touched rows
+
+    @classmethod
+    def load(cls, path):
+        state = cls()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                state.watermarks = data["watermarks"]
+                state.awards = data["awards"]
+                state.nodes = data["nodes"]
+                state.run = data["run"]
+        return state
+
+    def save(self, path):
+        data = {"version": STATE_VERSION, "watermarks": self.watermarks, "awards": self.awards,
+                "nodes": self.nodes, "run": self.run}
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def begin_run(self, today=None):
+        if self.run is None:
+            self.run = {"started": today or datetime.date.today().isoformat(), "done": [],
+                        "nodes": {}, "edges": {}}
+        return self.run
+
+    def _touch_node(self, node_id):
+        if node_id not in self.run["nodes"]:
+            entry = self.nodes.get(node_id)
+            self.run["nodes"][node_id] = dict(entry["node"]) if entry else None
+
+    def apply_award(self, key, nodes, edges):
+        """Replace the contribution of one award with the given node and edge records."""
+        old = self.awards.get(key, {"nodes": [], "edges": []})
+        if old["nodes"] == nodes and old["edges"] == edges:
+            return
+        old_edges = {edge_key(e): e for e in old["edges"]}
+        for k in old_edges.keys() | {edge_key(e) for e in edges}:
+            if k not in self.run["edges"]:
+                self.run["edges"][k] = {"before": old_edges.get(k), "award": key}
+            else:
+                self.run["edges"][k]["award"] = key
+        for node_id in {n["id"] for n in old["nodes"]} | {n["id"] for n in nodes}:
+            self._touch_node(node_id)
+        for node in old["nodes"]:
+            entry = self.nodes[node["id"]]
+            entry["refs"] -= 1
+            if entry["refs"] == 0:
+                del self.nodes[node["id"]]
+        for node in nodes:
+            entry = self.nodes.setdefault(node["id"], {"node": node, "refs": 0})
+            entry["node"] = node
+            entry["refs"] += 1
+        self.awards[key] = {"nodes": nodes, "edges": edges}
+
+    def _current_edge(self, k, award):
+        for edge in self.awards.get(award, {}).get("edges", []):
+            if edge_key(edge) == k:
+                return edge
+        return None
+
+    def delta(self):
+        """Net change of the current run against the state it started from."""
+        delta = {"nodes": {"added": [], "changed": [], "removed": []},
+                 "edges": {"added": [], "changed": [], "removed": []}}
+        for node_id, before in sorted(self.run["nodes"].items()):
+            entry = self.nodes.get(node_id)
+            after = entry["node"] if entry else None
+            if before is None and after is not None:
+                delta["nodes"]["added"].append(after)
+            elif before is not None and after is None:
+                delta["nodes"]["removed"].append(node_id)
+            elif before != after:
+                delta["nodes"]["changed"].append(after)
+        for k, touched in sorted(self.run["edges"].items()):
+            before, after = touched["before"], self._current_edge(k, touched["award"])
+            if before is None and after is not None:
+                delta["edges"]["added"].append(after)
+            elif before is not None and after is None:
+                delta["edges"]["removed"].append(
+                    {f: before[f] for f in ("source", "target", "type", "award_id", "subaward_id") if f in before})
+            elif before != after:
+                delta["edges"]["changed"].append(after)
+        return delta
+
+    def finish_run(self):
+        self.run = None
+
+    def records(self):
+        """(nodes, edges) of everything ingested so far, in the ingest JSON shape."""
+        nodes = [entry["node"] for entry in self.nodes.values()]
+        edges = [edge for award in self.awards.values() for edge in award["edges"]]
+        return nodes, edges
+
+
+class IngestStats:
+    def __init__(self):
+        self.partitions = 0
+        self.skipped = 0
+        self.awards = 0
+        self.requests = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {"partitions": self.partitions, "skipped": self.skipped, "awards": self.awards,
+                "requests": self.requests, "seconds": round(self.seconds, 3)}
+
+
+def _delta_counts(delta):
+    return {kind: {change: len(rows) for change, rows in changes.items()} for kind, changes in delta.items()}
+
+
+async def ingest_incremental(fiscal_years, agencies, limit=10, state_path=DEFAULT_STATE_PATH, delta_path=None,
+                             client=None, **fetcher_options):
+    """
+    Bring the checkpoint at state_path up to date for every (fiscal year,
+    agency); returns (delta, IngestStats) and writes the delta to
+    delta_path when given. Partitions are fetched concurrently and
+    checkpointed as each one completes.
+    """
+    stats = IngestStats()
+    start = time.perf_counter()
+    state = IngestState.load(state_path)
+    run = state.begin_run()
+    owned = client is None
+    if owned:
+        # Not the cached client: a refresh must see today's modifications
+        client = httpx.AsyncClient()
+    fetcher = USAspendingFetcher(client=client, **fetcher_options)
+
+    async def fetch(fy, agency):
+        since = state.watermarks.get(partition_key(fy, agency))
+        try:
+            rows = await fetcher.fetch_partition(fy, agency, limit=limit, since=since)
+        except Exception as e:
+            return fy, agency, since, e
+        return fy, agency, since, rows
+
+    errors = []
+    try:
+        pending = []
+        for fy in fiscal_years:
+            for agency in agencies:
+                if partition_key(fy, agency) in run["done"]:
+                    stats.skipped += 1
+                else:
+                    pending.append(fetch(fy, agency))
+        for next_done in asyncio.as_completed(pending):
+            fy, agency, since, rows = await next_done
+            if isinstance(rows, Exception):
+                # Let the other partitions finish and checkpoint; the next run retries this one
+                errors.append(rows)
+                continue
+            for award, subawards in rows:
+                nodes, edges = build_records([(fy, agency, award, subawards)])
+                state.apply_award(award_key(award), nodes, edges)
+            modified = [(a.get(LAST_MODIFIED) or "")[:10] for a, _ in rows]
+            part = partition_key(fy, agency)
+            # First run of a partition: anything modified from today on is caught next time
+            state.watermarks[part] = max([since] + modified) if since else run["started"]
+            run["done"].append(part)
+            state.save(state_path)
+            stats.partitions += 1
+            stats.awards += len(rows)
+    finally:
+        if owned:
+            await client.aclose()
+        stats.requests = fetcher.stats.requests
+        stats.seconds = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+
+    delta = state.delta()
+    delta["run"] = {"started": run["started"], "counts": _delta_counts(delta), "stats": stats.to_dict()}
+    if delta_path:
+        with open(delta_path + ".tmp", "w") as f:
+            json.dump(delta, f, indent=2)
+        os.replace(delta_path + ".tmp", delta_path)
+    # The delta is on disk before the run is marked finished, so a crash here re-emits it
+    state.finish_run()
+    state.save(state_path)
+    return delta, stats
@@ -0,0 +1,276 @@
+"""
+Concurrent multi-source ingestion into the shared graph.
+
+Each source turns its request params into node and edge records (the
+ingest JSON shape: nodes keyed by "id", edges by "source"/"target").
+Async sources run on the event loop, blocking SDKs on anyio's worker
+threads. All of them start together, so a refresh takes as long as the
+slowest source rather than the sum. A failing source is reported with its
+error and does not hold back the others. Sources that read the graph
+(wikidata enriches the company nodes already in it) run in a second round,
+once the first round is merged, so they also see the companies added by
+the same refresh.
+
+The results are merged into the GraphBuilder with an id-keyed upsert.
+Conflicts are resolved attribute by attribute, by source precedence. The
+source that last set each attribute is kept on the node or edge itself, in
+its `_origin` attribute ({attribute: source}). It is written in the same
+graph update as the values, so it is never recorded for an update that
+failed. A lower-precedence source never overwrites a value that a
+higher-precedence source set, whether in the same refresh or an earlier
+one. Attributes a source does not provide keep their current values.
+"""
+import asyncio
+import functools
+import threading
+import time
+
+import anyio
+
+from app.models.ingestion import MAX_ENRICH_SYMBOLS, EdgeModel, NodeModel
+from app.services.finnhub_service import enrich_companies
+from app.services.usaspending_fetcher import fetch_records
+from app.services.wikidata_enrichment import COMPANY_TYPES, enrich_nodes
+
+# Highest precedence first: award data names the companies, filings and
+# market data only fill in what it lacks
+DEFAULT_PRECEDENCE = ("usaspending", "edgar", "finnhub", "wikidata")
+DEFAULT_NODE_TYPE = "unknown"
+PUBLIC_COMPANY = "public_company"
+ORIGIN = "_origin"  # node / edge attribute: {attribute: source that set it}
+
+
+class Source:
+    def __init__(self, name, fetch, blocking=False, reads_graph=False):
+        self.name = name
+        self.fetch = fetch  # fetch(params, graph) -> (nodes, edges)
+        self.blocking = blocking
+        self.reads_graph = reads_graph  # runs after the other sources are merged
+
+
+async def usaspending_records(params, graph):
+    nodes, edges, _ = await fetch_records(
+        params.get("fiscal_years", [2023]), params.get("agencies", ["Department of Defense"]),
+        params.get("limit", 10), concurrency=params.get("concurrency", 8))
+    return nodes, edges
+
+
+def edgar_records(params, graph):
+    """One company node per CIK with its filing count and latest filing date."""
+    # edgartools is optional: only this source needs it
+    from app.services.edgar_service import EdgarService
+    cik = str(params["cik"])
+    filings = list(EdgarService().get_filings(cik, params.get("filing_type", "10-K")))
+    dates = [str(f.filing_date) for f in filings if getattr(f, "filing_date", None)]
+    name = next((f.company for f in filings if getattr(f, "company", None)), None)
+    node = {"id": params.get("node_id") or f"company:{cik}", "type": PUBLIC_COMPANY, "name": name,
+            "cik": cik, "filings": len(filings), "latest_filing": max(dates) if dates else None}
+    return [node], []
+
+
+async def finnhub_records(params, graph):
+    """
+    Company nodes from Finnhub profiles. `symbols` is a list, or a mapping
+    symbol -> node id to attach the profiles to existing nodes.
+    """
+    symbols = params.get("symbols") or [params["symbol"]]
+    if len(symbols) > MAX_ENRICH_SYMBOLS:
+        raise ValueError(f"At most {MAX_ENRICH_SYMBOLS} symbols per refresh, got {len(symbols)}")
+    ids = {s.strip().upper(): (symbols[s] if isinstance(symbols, dict) else f"company:{s.strip().upper()}")
+           for s in symbols}
+    profiles, errors, _ = await enrich_companies(list(ids))
+    if errors and not profiles:
+        raise RuntimeError(next(iter(errors.values())))
+    nodes = []
+    for symbol, profile in profiles.items():
+        if not profile:
+            continue
+        nodes.append({"id": ids[symbol], "type": PUBLIC_COMPANY, "name": profile.get("name"),
+                      "ticker": profile.get("ticker") or symbol, "industry": profile.get("finnhubIndustry"),
+                      "country": profile.get("country"), "market_cap": profile.get("marketCapitalization"),
+                      "weburl": profile.get("weburl")})
+    return nodes, []
+
+
+async def wikidata_records(params, graph):
+    """Wikidata attributes for the company nodes of the graph as the refresh started."""
+    nodes = [{"id": n, "type": a.get("type"), "name": a.get("name")}
+             for n, a in graph.nodes(data=True) if a.get("type") in COMPANY_TYPES]
+    nodes, _ = await enrich_nodes(nodes)
+    # Type and name stay with the sources that set them
+    return [{k: v for k, v in n.items() if k not in ("type", "name")} for n in nodes if "wikidata_qid" in n], []
+
+
+SOURCES = {
+    "usaspending": Source("usaspending", usaspending_records),
+    "edgar": Source("edgar", edgar_records, blocking=True),
+    "finnhub": Source("finnhub", finnhub_records),
+    "wikidata": Source("wikidata", wikidata_records, reads_graph=True),
+}
+
+
+class SourceRun:
+    def __init__(self, source, nodes=(), edges=(), seconds=0.0, error=None):
+        self.source = source
+        self.nodes = list(nodes)
+        self.edges = list(edges)
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def to_dict(self):
+        return {"source": self.source, "status": "ok" if self.ok else "error", "nodes": len(self.nodes),
+                "edges": len(self.edges), "seconds": round(self.seconds, 3), "error": self.error}
+
+
+class MergeStats:
+    def __init__(self):
+        self.nodes_added = 0
+        self.nodes_updated = 0
+        self.edges_added = 0
+        self.edges_updated = 0
+        self.overruled = 0  # conflicting attribute values that lost to a higher-precedence source
+        self.version = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {"nodes_added": self.nodes_added, "nodes_updated": self.nodes_updated,
+                "edges_added": self.edges_added, "edges_updated": self.edges_updated,
+                "overruled": self.overruled, "version": self.version, "seconds": round(self.seconds, 3)}
+
+
+async def run_source(source, params, graph):
+    """SourceRun of one source; errors are captured rather than raised."""
+    start = time.perf_counter()
+    try:
+        if source.blocking:
+            nodes, edges = await anyio.to_thread.run_sync(functools.partial(source.fetch, params, graph))
+        else:
+            nodes, edges = await source.fetch(params, graph)
+    except Exception as e:
+        return SourceRun(source.name, seconds=time.perf_counter() - start, error=str(e) or type(e).__name__)
+    return SourceRun(source.name, nodes, edges, time.perf_counter() - start)
+
+
+def _float(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_models(nodes, edges, current=None):
+    """
+    NodeModel / EdgeModel lists from record dicts. Type, name and edge
+    value missing from a record are taken from the `current` graph.
+    """
+    node_models, edge_models = [], []
+    for record in nodes:
+        attrs = dict(record)
+        node_id = str(attrs.pop("id"))
+        existing = current.nodes[node_id] if current is not None and node_id in current else {}
+        node_type = attrs.pop("type", None) or existing.get("type") or DEFAULT_NODE_TYPE
+        name = attrs.pop("name", None) or existing.get("name") or node_id
+        node_models.append(NodeModel(id=node_id, type=str(node_type), name=str(name), attributes=attrs))
+    for record in edges:
+        attrs = dict(record)
+        u, v = str(attrs.pop("source")), str(attrs.pop("target"))
+        existing = current.edges[u, v] if current is not None and current.has_edge(u, v) else {}
+        value = attrs.pop("value") if "value" in attrs else existing.get("value")
+        edge_models.append(EdgeModel(source=u, target=v, value=_float(value), attributes=attrs))
+    return node_models, edge_models
+
+
+class IngestOrchestrator:
+    def __init__(self, builder, sources=None, precedence=DEFAULT_PRECEDENCE):
+        self.builder = builder
+        self.sources = sources or SOURCES
+        self.precedence = tuple(precedence)
+        self._merge_lock = threading.Lock()
+
+    def _upsert(self, pending, key, record, skip, source, rank, existing, stats):
+        attrs = pending.setdefault(key, {})
+        # A copy: the graph's own provenance changes only with the update
+        origin = attrs.setdefault(ORIGIN, dict(existing.get(ORIGIN) or {}))
+        for attr, value in record.items():
+            if attr in skip or attr == ORIGIN or value is None:
+                continue
+            held = origin.get(attr)
+            outranked = held is not None and held != source and rank(held) > rank(source)
+            if held is not None and held != source and value != attrs.get(attr, existing.get(attr)):
+                # Two sources disagree: one of the values loses
+                stats.overruled += 1
+            if outranked:
+                continue
+            attrs[attr] = value
+            origin[attr] = source
+
+    def merge(self, runs, precedence=None, stats=None):
+        """Upsert the records of successful runs into the graph; returns MergeStats (`stats` if given)."""
+        stats = stats or MergeStats()
+        start = time.perf_counter()
+        order = tuple(precedence or self.precedence)
+
+        def rank(source):
+            # Unlisted sources rank below every listed one
+            return len(order) - order.index(source) if source in order else 0
+
+        nodes, edges = {}, {}
+        with self._merge_lock:
+            current = self.builder.to_networkx()
+            # Lowest precedence first, so within a refresh higher sources write last
+            for run in sorted((r for r in runs if r.ok), key=lambda r: rank(r.source)):
+                for record in run.nodes:
+                    key = str(record["id"])
+                    self._upsert(nodes, key, record, ("id",), run.source, rank,
+                                 current.nodes[key] if key in current else {}, stats)
+                for record in run.edges:
+                    key = (str(record["source"]), str(record["target"]))
+                    self._upsert(edges, key, record, ("source", "target"), run.source, rank,
+                                 current.edges[key] if current.has_edge(*key) else {}, stats)
+            node_models, edge_models = to_models(
+                [{"id": k, **attrs} for k, attrs in nodes.items()],
+                [{"source": u, "target": v, **attrs} for (u, v), attrs in edges.items()], current)
+            for node in node_models:
+                if node.id in current:
+                    stats.nodes_updated += 1
+                else:
+                    stats.nodes_added += 1
+            for edge in edge_models:
+                if current.has_edge(edge.source, edge.target):
+                    stats.edges_updated += 1
+                else:
+                    stats.edges_added += 1
+            if node_models or edge_models:
+                self.builder.update_graph(node_models, edge_models)
+            stats.version = self.builder.version
+        stats.seconds += time.perf_counter() - start
+        return stats
+
+    async def refresh(self, requests, precedence=None):
+        """
+        Run the requested sources ({name: params}) concurrently and merge
+        what they return, then do the same for sources that read the graph;
+        returns a dict of per-source runs, merge stats and wall time.
+        """
+        start = time.perf_counter()
+        unknown = sorted(set(requests) - set(self.sources))
+        if unknown:
+            raise ValueError(f"Unknown data source(s): {', '.join(unknown)}")
+        stats = MergeStats()
+        runs = {}
+        for reads_graph in (False, True):
+            names = [name for name in requests if self.sources[name].reads_graph == reads_graph]
+            if not names:
+                continue
+            graph = self.builder.to_networkx()
+            done = await asyncio.gather(*(run_source(self.sources[name], requests[name] or {}, graph)
+                                          for name in names))
+            runs.update(zip(names, done))
+            # The merge copies and rewrites graph dicts: keep it off the event loop
+            await anyio.to_thread.run_sync(self.merge, done, precedence, stats)
+        return {"sources": [runs[name].to_dict() for name in requests], "merge": stats.to_dict(),
+                "seconds": round(time.perf_counter() - start, 3)}
@@ -0,0 +1,336 @@
+"""
+Streaming ingestion pipeline: source -> normalize -> dedupe -> write.
+
+Every stage is a generator over (kind, record) pairs, kind being "node" or
+"edge", so records flow through one at a time and stages compose freely
+(e.g. an enrichment stage between dedupe and write). Async sources such as
+the USAspending fetcher run on a background event loop and hand records
+over through a bounded queue, so fetching stays concurrent while the
+consumer sets the pace.
+
+Dedupe keeps a bounded LRU window of 64-bit record hashes: memory is fixed
+by `dedupe_capacity`, and a duplicate further back than the window passes
+through - harmless, since the loaders merge on id (add_node / MERGE).
+
+The writer appends each chunk of records to nodes/edges NDJSON files as a
+complete gzip member (a multi-member gzip file is still one valid .gz, and
+streaming_loader reads it as is) and then records the committed byte count
+in a .progress sidecar. tail_records() follows that sidecar, so a
+downstream loader can start on the committed chunks while ingestion is
+still running.
+"""
+import asyncio
+import datetime
+import decimal
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+DEFAULT_CHUNK_RECORDS = 5000
+DEFAULT_DEDUPE_CAPACITY = 500_000
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_NODE_TYPE = "unknown"
+DEFAULT_EDGE_TYPE = "contract"
+PROGRESS_SUFFIX = ".progress"
+
+
+class PipelineStats:
+    def __init__(self):
+        self.read = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.nodes = 0
+        self.edges = 0
+        self.chunks = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {"read": self.read, "invalid": self.invalid, "duplicates": self.duplicates,
+                "nodes": self.nodes, "edges": self.edges, "chunks": self.chunks,
+                "bytes_written": self.bytes_written, "seconds": round(self.seconds, 3),
+                "records_per_sec": round((self.nodes + self.edges) / self.seconds, 1) if self.seconds else 0.0}
+
+
+# --- sources -----------------------------------------------------------------
+
+def iter_async(agen, maxsize=DEFAULT_QUEUE_SIZE):
+    """
+    Iterate an async generator from synchronous code. It runs on its own
+    event loop in a worker thread and blocks once `maxsize` items wait.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    done = object()
+    stop = threading.Event()
+
+    def run():
+        async def pump():
+            try:
+                async for item in agen:
+                    while not stop.is_set():
+                        try:
+                            items.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        break
+            finally:
+                await agen.aclose()
+        try:
+            asyncio.run(pump())
+            items.put((done, None))
+        except BaseException as e:
+            items.put((done, e))
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = items.get()
+            if isinstance(item, tuple) and item and item[0] is done:
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue, then let it finish
+        while worker.is_alive():
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                worker.join(0.1)
+
+
+def records_from(nodes, edges):
+    """(kind, record) pairs from node and edge iterables."""
+    for node in nodes:
+        yield "node", node
+    for edge in edges:
+        yield "edge", edge
+
+
+def collect(records):
+    """(nodes, edges) lists from (kind, record) pairs; a later node with the same id wins."""
+    nodes, edges = {}, []
+    for kind, record in records:
+        if kind == "node":
+            nodes[record["id"]] = record
+        else:
+            edges.append(record)
+    return list(nodes.values()), edges
+
+
+# --- normalize / dedupe --------------------------------------------------------
+
+def _plain(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def normalize(records, stats=None):
+    """Plain-JSON values and the fields every loader expects; records without ids are dropped."""
+    for kind, record in records:
+        if stats is not None:
+            stats.read += 1
+        record = {k: _plain(v) for k, v in record.items()}
+        if kind == "node":
+            if not record.get("id"):
+                if stats is not None:
+                    stats.invalid += 1
+                continue
+            record["id"] = str(record["id"])
+            record["type"] = record.get("type") or DEFAULT_NODE_TYPE
+            record["name"] = record.get("name") or record["id"]
+        else:
+            if not record.get("source") or not record.get("target"):
+                if stats is not None:
+                    stats.invalid += 1
+                continue
+            record["type"] = record.get("type") or DEFAULT_EDGE_TYPE
+        yield kind, record
+
+
+class BoundedIdSet:
+    """LRU set of 64-bit hashes; holds at most `capacity` keys."""
+
+    def __init__(self, capacity=DEFAULT_DEDUPE_CAPACITY):
+        self.capacity = capacity
+        self._keys = OrderedDict()
+
+    def add(self, key):
+        """True if `key` was not in the window (and is now)."""
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        if h in self._keys:
+            self._keys.move_to_end(h)
+            return False
+        self._keys[h] = None
+        if len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+        return True
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def record_key(kind, record):
+    if kind == "node":
+        return "n\x1f" + record["id"]
+    return "e\x1f" + "\x1f".join(str(record.get(f) or "") for f in
+                                 ("source", "target", "type", "award_id", "subaward_id"))
+
+
+def dedupe(records, capacity=DEFAULT_DEDUPE_CAPACITY, stats=None):
+    seen = BoundedIdSet(capacity)
+    for kind, record in records:
+        if seen.add(record_key(kind, record)):
+            yield kind, record
+        elif stats is not None:
+            stats.duplicates += 1
+
+
+# --- write ---------------------------------------------------------------------
+
+class NdjsonChunkWriter:
+    """Appends records to a .ndjson.gz file one gzip member per chunk."""
+
+    def __init__(self, path, chunk_records=DEFAULT_CHUNK_RECORDS, append=False):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.buffer = []
+        self.records = 0
+        self.chunks = 0
+        if not append:
+            open(path, "wb").close()
+        self.committed = os.path.getsize(path)
+        self._progress(done=False)
+
+    def _progress(self, done):
+        data = json.dumps({"bytes": self.committed, "records": self.records, "chunks": self.chunks,
+                           "done": done})
+        with open(self.path + PROGRESS_SUFFIX + ".tmp", "w") as f:
+            f.write(data)
+        os.replace(self.path + PROGRESS_SUFFIX + ".tmp", self.path + PROGRESS_SUFFIX)
+
+    def write(self, record):
+        self.buffer.append(json.dumps(record, separators=(",", ":")))
+        if len(self.buffer) >= self.chunk_records:
+            self.flush()
+
+    def flush(self):
+        """Append the buffered records as one gzip member; returns bytes written."""
+        if not self.buffer:
+            return 0
+        member = gzip.compress(("\n".join(self.buffer) + "\n").encode(), compresslevel=6)
+        with open(self.path, "ab") as f:
+            f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += len(self.buffer)
+        self.chunks += 1
+        self.committed += len(member)
+        self.buffer = []
+        self._progress(done=False)
+        return len(member)
+
+    def close(self):
+        written = self.flush()
+        self._progress(done=True)
+        return written
+
+
+def write_ndjson(records, nodes_path, edges_path, chunk_records=DEFAULT_CHUNK_RECORDS, stats=None):
+    stats = stats or PipelineStats()
+    writers = {"node": NdjsonChunkWriter(nodes_path, chunk_records),
+               "edge": NdjsonChunkWriter(edges_path, chunk_records)}
+    try:
+        for kind, record in records:
+            writer = writers[kind]
+            before = writer.chunks
+            writer.write(record)
+            if writer.chunks != before:
+                stats.chunks += 1
+            if kind == "node":
+                stats.nodes += 1
+            else:
+                stats.edges += 1
+    finally:
+        for writer in writers.values():
+            if writer.close():
+                stats.chunks += 1
+            stats.bytes_written += writer.committed
+    return stats
+
+
+def run_pipeline(sources, nodes_path, edges_path, stages=(), chunk_records=DEFAULT_CHUNK_RECORDS,
+                 dedupe_capacity=DEFAULT_DEDUPE_CAPACITY):
+    """
+    Stream every source's (kind, record) pairs through normalize, dedupe,
+    any extra `stages` (generator functions over the pairs) and the NDJSON
+    writer; returns PipelineStats.
+    """
+    stats = PipelineStats()
+    start = time.perf_counter()
+
+    def chained():
+        for source in sources:
+            yield from source
+
+    records = dedupe(normalize(chained(), stats), dedupe_capacity, stats)
+    for stage in stages:
+        records = stage(records)
+    write_ndjson(records, nodes_path, edges_path, chunk_records, stats)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+# --- follow --------------------------------------------------------------------
+
+def _read_progress(path):
+    try:
+        with open(path + PROGRESS_SUFFIX) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def tail_records(path, poll_interval=0.5, timeout=None):
+    """
+    Records of an NDJSON file still being written by NdjsonChunkWriter,
+    yielded as chunks are committed; returns once the writer has closed it.
+    """
+    offset, pending, deadline = 0, b"", None if timeout is None else time.monotonic() + timeout
+    decomp = zlib.decompressobj(wbits=31)
+    while True:
+        progress = _read_progress(path)
+        committed = progress["bytes"] if progress else 0
+        if committed > offset:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read(committed - offset)
+            offset = committed
+            while data:
+                pending += decomp.decompress(data)
+                data = decomp.unused_data
+                if decomp.eof:
+                    decomp = zlib.decompressobj(wbits=31)
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            continue
+        if progress and progress["done"]:
+            return
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"{path} was not completed within {timeout}s")
+        time.sleep(poll_interval)
@@ -0,0 +1,207 @@
+"""
+Differential Neo4j sync.
+
+A SyncState records a content hash per node (keyed by id) and per edge
+(keyed by source, target, relationship type) as of the last successful
+sync. compute_diff hashes the new graph in one pass and compares it with
+that state, producing the creates, updates and deletes to apply; the
+BulkLoader writes them in batched UNWIND transactions without clearing the
+database, so it stays queryable throughout. The new state is saved only
+after every batch committed; all statements are idempotent (MERGE / SET /
+DELETE), so a sync that fails half-way is simply redone by the next one.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+from app.services.neo4j_bulk import (
+    NODE_LABEL, DEFAULT_NODE_TYPE, DEFAULT_REL_TYPE, LoadStats, quote_identifier, properties,
+    stamp_nodes, stamp_edges,
+)
+
+# 2: rows carry sync_bucket / sync_hash stamps; older states predate them, so the
+# first sync after an upgrade must rewrite every row
+# 3: the stamps are blake2b hashes; rows stamped by version 2 carry other values
+STATE_VERSION = 3
+
+
+def content_hash(kind, props):
+    raw = json.dumps([kind, props], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+class SyncState:
+    def __init__(self, nodes=None, edges=None):
+        self.nodes = nodes or {}  # id -> (type, hash); hash None = unknown, always rewritten
+        self.edges = edges or {}  # (src, tgt, rel type) -> hash
+
+    @classmethod
+    def load(cls, path):
+        """The saved state, or None if there is none yet."""
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != STATE_VERSION:
+            return None
+        return cls({n: (t, h) for n, t, h in data["nodes"]},
+                   {(s, t, r): h for s, t, r, h in data["edges"]})
+
+    def save(self, path):
+        data = {
+            "version": STATE_VERSION,
+            "nodes": [[n, t, h] for n, (t, h) in self.nodes.items()],
+            "edges": [[s, t, r, h] for (s, t, r), h in self.edges.items()],
+        }
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def from_graph(cls, G):
+        state = cls()
+        for node, attrs in G.nodes(data=True):
+            node_type = attrs.get("type") or DEFAULT_NODE_TYPE
+            state.nodes[node] = (node_type, content_hash(node_type, properties(attrs)))
+        for src, tgt, attrs in G.edges(data=True):
+            rel = attrs.get("type") or DEFAULT_REL_TYPE
+            state.edges[(src, tgt, rel)] = content_hash(rel, properties(attrs, skip=("type",)))
+        return state
+
+    @classmethod
+    async def from_database(cls, session):
+        """
+        What is in the database now, with unknown hashes: used when there is
+        no saved state, so existing rows are rewritten and stale ones deleted.
+        """
+        state = cls()
+        result = await session.run(f"MATCH (n:{NODE_LABEL}) RETURN n.id AS id, n.type AS type")
+        async for record in result:
+            state.nodes[record["id"]] = (record["type"] or DEFAULT_NODE_TYPE, None)
+        result = await session.run(f"MATCH (a:{NODE_LABEL})-[r]->(b:{NODE_LABEL}) "
+                                   f"RETURN a.id AS src, b.id AS tgt, type(r) AS rel")
+        async for record in result:
+            state.edges[(record["src"], record["tgt"], record["rel"])] = None
+        return state
+
+
+class GraphDiff:
+    def __init__(self):
+        self.node_creates = defaultdict(list)   # type -> [{"id", "props"}]
+        self.node_updates = defaultdict(list)   # (type, previous type) -> [{"id", "props"}]
+        self.node_deletes = []                  # [id]
+        self.edge_creates = defaultdict(list)   # rel -> [{"src", "tgt", "props"}]
+        self.edge_updates = defaultdict(list)   # rel -> [{"src", "tgt", "props"}]
+        self.edge_deletes = defaultdict(list)   # rel -> [{"src", "tgt"}]
+        self.nodes_unchanged = 0
+        self.edges_unchanged = 0
+
+    @property
+    def empty(self):
+        return not (self.node_creates or self.node_updates or self.node_deletes
+                    or self.edge_creates or self.edge_updates or self.edge_deletes)
+
+    def summary(self):
+        count = lambda groups: sum(len(rows) for rows in groups.values())
+        return {
+            "nodes": {"created": count(self.node_creates), "updated": count(self.node_updates),
+                      "deleted": len(self.node_deletes), "unchanged": self.nodes_unchanged},
+            "edges": {"created": count(self.edge_creates), "updated": count(self.edge_updates),
+                      "deleted": count(self.edge_deletes), "unchanged": self.edges_unchanged},
+        }
+
+
+def compute_diff(G, previous):
+    """(GraphDiff from `previous` (a SyncState) to G, SyncState for G)."""
+    current = SyncState.from_graph(G)
+    diff = GraphDiff()
+    for node, (node_type, digest) in current.nodes.items():
+        old = previous.nodes.get(node)
+        if old is not None and old[1] == digest:
+            diff.nodes_unchanged += 1
+            continue
+        row = {"id": node, "props": properties(G.nodes[node])}
+        if old is None:
+            diff.node_creates[node_type].append(row)
+        else:
+            diff.node_updates[(node_type, old[0])].append(row)
+    diff.node_deletes = [n for n in previous.nodes if n not in current.nodes]
+    for key, digest in current.edges.items():
+        old = previous.edges.get(key, False)
+        if old == digest:
+            diff.edges_unchanged += 1
+            continue
+        src, tgt, rel = key
+        row = {"src": src, "tgt": tgt, "props": properties(G.edges[src, tgt], skip=("type",))}
+        (diff.edge_creates if old is False else diff.edge_updates)[rel].append(row)
+    for (src, tgt, rel) in previous.edges:
+        if (src, tgt, rel) not in current.edges:
+            diff.edge_deletes[rel].append({"src": src, "tgt": tgt})
+    for groups in (diff.node_creates, diff.node_updates):
+        for key, rows in groups.items():
+            stamp_nodes(rows, [key if isinstance(key, str) else key[0]] * len(rows))
+    for groups in (diff.edge_creates, diff.edge_updates):
+        for rel, rows in groups.items():
+            stamp_edges(rows, [rel] * len(rows))
+    return diff, current
+
+
+def node_update_query(key):
+    node_type, previous_type = key
+    query = (f"UNWIND $rows AS row MERGE (n:{NODE_LABEL} {{id: row.id}}) "
+             f"SET n = row.props SET n.id = row.id")
+    if previous_type != node_type and previous_type != NODE_LABEL:
+        query += f" REMOVE n:{quote_identifier(previous_type)}"
+    if node_type != NODE_LABEL:
+        query += f" SET n:{quote_identifier(node_type)}"
+    return query
+
+
+def edge_update_query(rel_type):
+    return (f"UNWIND $rows AS row "
+            f"MATCH (a:{NODE_LABEL} {{id: row.src}}) MATCH (b:{NODE_LABEL} {{id: row.tgt}}) "
+            f"MERGE (a)-[r:{quote_identifier(rel_type)}]->(b) SET r = row.props")
+
+
+def edge_delete_query(rel_type):
+    return (f"UNWIND $rows AS row "
+            f"MATCH (:{NODE_LABEL} {{id: row.src}})-[r:{quote_identifier(rel_type)}]->(:{NODE_LABEL} {{id: row.tgt}}) "
+            f"DELETE r")
+
+
+NODE_DELETE_QUERY = f"UNWIND $rows AS id MATCH (n:{NODE_LABEL} {{id: id}}) DETACH DELETE n"
+
+
+async def apply_diff(loader, diff, stats=None):
+    """
+    Write a GraphDiff: nodes first so new edges find their endpoints, then
+    edges, then edge and node deletes.
+    """
+    stats = stats or LoadStats()
+    await loader.load_nodes(diff.node_creates, stats)
+    await loader.load_nodes(diff.node_updates, stats, make_query=node_update_query)
+    await loader.load_edges(diff.edge_creates, stats)
+    await loader.load_edges(diff.edge_updates, stats, make_query=edge_update_query)
+    await loader.load_edges(diff.edge_deletes, stats, make_query=edge_delete_query)
+    await loader.load_nodes({None: diff.node_deletes}, stats, make_query=lambda key: NODE_DELETE_QUERY)
+    stats.diff = diff.summary()
+    return stats
+
+
+async def sync_graph(loader, G, state_path):
+    """
+    Bring the database in line with G by applying only what changed since
+    the state saved at `state_path`; returns LoadStats with a `diff` summary.
+    Hashing, diffing and state file I/O run in a worker thread.
+    """
+    await loader.ensure_schema()
+    previous = await asyncio.to_thread(SyncState.load, state_path)
+    if previous is None:
+        async with loader.session() as session:
+            previous = await SyncState.from_database(session)
+    diff, current = await asyncio.to_thread(compute_diff, G, previous)
+    stats = await apply_diff(loader, diff)
+    await asyncio.to_thread(current.save, state_path)
+    return stats
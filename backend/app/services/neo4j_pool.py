@@ -0,0 +1,135 @@
+"""
+App-lifetime async Neo4j driver with a tuned connection pool.
+
+One AsyncDriver is shared by every Neo4j user in the process (main.py,
+Neo4jService, sync_to_neo4j), so requests reuse pooled connections instead
+of opening a driver each, and Cypher calls are awaited rather than blocking
+the event loop. read()/write() run managed transactions, which the driver
+retries on transient errors for up to NEO4J_MAX_RETRY_SECONDS. Sessions
+in use and per-call latency are exported as Prometheus metrics.
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+
+from neo4j import AsyncGraphDatabase
+
+from app.utils.monitoring import (
+    NEO4J_QUERY_LATENCY,
+    NEO4J_QUERY_ERRORS,
+    NEO4J_POOL_IN_USE,
+    NEO4J_POOL_MAX_SIZE,
+)
+
+DEFAULT_POOL_SIZE = 50
+DEFAULT_ACQUISITION_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTION_LIFETIME = 1800.0
+DEFAULT_LIVENESS_CHECK_TIMEOUT = 30.0
+DEFAULT_MAX_RETRY_SECONDS = 15.0
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class _TimedSession:
+    """AsyncSession wrapper that records latency and errors per call."""
+
+    def __init__(self, session):
+        self._session = session
+
+    async def _timed(self, mode, call):
+        start = time.perf_counter()
+        try:
+            return await call
+        except Exception:
+            NEO4J_QUERY_ERRORS.labels(mode).inc()
+            raise
+        finally:
+            NEO4J_QUERY_LATENCY.labels(mode).observe(time.perf_counter() - start)
+
+    async def run(self, query, parameters=None, **kwargs):
+        return await self._timed("auto", self._session.run(query, parameters, **kwargs))
+
+    async def execute_read(self, work, *args, **kwargs):
+        return await self._timed("read", self._session.execute_read(work, *args, **kwargs))
+
+    async def execute_write(self, work, *args, **kwargs):
+        return await self._timed("write", self._session.execute_write(work, *args, **kwargs))
+
+
+async def _records(tx, query, parameters):
+    result = await tx.run(query, parameters or {})
+    return [record.data() async for record in result]
+
+
+class Neo4jPool:
+    def __init__(self, uri=None, user=None, password=None, database=None, max_size=None,
+                 acquisition_timeout=None, max_retry_seconds=None):
+        self.uri = uri
+        self.user = user
+        self.password = password
+        self.database = database or os.getenv("NEO4J_DATABASE") or None
+        self.max_size = max_size or int(os.getenv("NEO4J_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self.acquisition_timeout = acquisition_timeout or _env_float(
+            "NEO4J_POOL_ACQUISITION_TIMEOUT", DEFAULT_ACQUISITION_TIMEOUT)
+        self.max_retry_seconds = max_retry_seconds or _env_float(
+            "NEO4J_MAX_RETRY_SECONDS", DEFAULT_MAX_RETRY_SECONDS)
+        self._driver = None
+
+    @property
+    def driver(self):
+        """The shared AsyncDriver, created on first use (no I/O until a query runs)."""
+        if self._driver is None:
+            uri = self.uri or os.getenv("NEO4J_URI")
+            user = self.user or os.getenv("NEO4J_USER")
+            password = self.password or os.getenv("NEO4J_PASSWORD")
+            if not (uri and user and password):
+                raise RuntimeError("NEO4J_URI, NEO4J_USER and NEO4J_PASSWORD must be set")
+            self._driver = AsyncGraphDatabase.driver(
+                uri, auth=(user, password),
+                max_connection_pool_size=self.max_size,
+                connection_acquisition_timeout=self.acquisition_timeout,
+                max_connection_lifetime=DEFAULT_MAX_CONNECTION_LIFETIME,
+                liveness_check_timeout=DEFAULT_LIVENESS_CHECK_TIMEOUT,
+                max_transaction_retry_time=self.max_retry_seconds,
+            )
+            NEO4J_POOL_MAX_SIZE.set(self.max_size)
+        return self._driver
+
+    @property
+    def connected(self):
+        return self._driver is not None
+
+    @asynccontextmanager
+    async def session(self, **kwargs):
+        if self.database and "database" not in kwargs:
+            kwargs["database"] = self.database
+        NEO4J_POOL_IN_USE.inc()
+        try:
+            async with self.driver.session(**kwargs) as session:
+                yield _TimedSession(session)
+        finally:
+            NEO4J_POOL_IN_USE.dec()
+
+    async def read(self, query, parameters=None):
+        """Records of a read query as dicts, in a retried read transaction."""
+        async with self.session() as session:
+            return await session.execute_read(_records, query, parameters)
+
+    async def write(self, query, parameters=None):
+        """Records of a write query as dicts, in a retried write transaction."""
+        async with self.session() as session:
+            return await session.execute_write(_records, query, parameters)
+
+    async def verify(self):
+        await self.driver.verify_connectivity()
+
+    async def close(self):
+        if self._driver is not None:
+            driver, self._driver = self._driver, None
+            await driver.close()
+
+
+neo4j_pool = Neo4jPool()
@@ -1,45 +1,197 @@
-from neo4j import GraphDatabase
-import os
+"""
+Graph persistence on the shared async pool.
+
+Rows are buffered into UNWIND batches and written by a bounded set of
+concurrent workers, taking a pooled session per batch. Rows are partitioned
+by key - node id, or the edge's source node - so all writes touching one
+source node go through one worker, in order, and concurrent transactions
+don't contend for its locks. Batches that still hit a transient error
+(deadlock, lock timeout) after the driver's own managed retries are retried
+with backoff. Input can be any (async) iterable of NodeModel/EdgeModel, so a
+streamed request body is written as it arrives; edges are written only once
+the nodes before them have committed, so send nodes first.
+"""
+import asyncio
+import random
+import time
+import zlib
+from typing import AsyncIterable, Iterable, List, Optional, Union
+
+from neo4j.exceptions import TransientError
+
 from app.models.ingestion import NodeModel, EdgeModel
-from typing import List
+from app.services.neo4j_bulk import SCHEMA_STATEMENTS
+from app.services.neo4j_pool import Neo4jPool, neo4j_pool
 
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 0.05
 
-class Neo4jService:
+NODE_BATCH_QUERY = """
+UNWIND $rows AS row
+MERGE (n:Entity {id: row.id})
+SET n.type = row.type, n.name = row.name, n += row.attributes
+"""
+
+EDGE_BATCH_QUERY = """
+UNWIND $rows AS row
+MATCH (src:Entity {id: row.source})
+MATCH (tgt:Entity {id: row.target})
+MERGE (src)-[r:CONTRACT {value: row.value}]->(tgt)
+SET r += row.attributes
+"""
+
+
+def partition_of(key: str, partitions: int) -> int:
+    return zlib.crc32(key.encode()) % partitions
+
+
+class PersistStats:
     def __init__(self):
-        self.driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-
-    def close(self):
-        self.driver.close()
-
-    def persist_graph(self, nodes: List[NodeModel], edges: List[EdgeModel]):
-        with self.driver.session() as session:
-            # Batch create nodes
-            for node in nodes:
-                session.execute_write(self._create_node, node)
-            # Batch create edges
-            for edge in edges:
-                session.execute_write(self._create_edge, edge)
-
-    @staticmethod
-    def _create_node(tx, node: NodeModel):
-        tx.run(
-            """
-            MERGE (n:Entity {id: $id})
-            SET n.type = $type, n.name = $name, n += $attributes
-            """,
-            id=node.id, type=node.type, name=node.name, attributes=node.attributes or {}
-        )
-
-    @staticmethod
-    def _create_edge(tx, edge: EdgeModel):
-        tx.run(
-            """
-            MATCH (src:Entity {id: $source}), (tgt:Entity {id: $target})
-            MERGE (src)-[r:CONTRACT {value: $value}]->(tgt)
-            SET r += $attributes
-            """,
-            source=edge.source, target=edge.target, value=edge.value, attributes=edge.attributes or {}
-        )
+        self.nodes = 0
+        self.edges = 0
+        self.batches = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        rows = self.nodes + self.edges
+        return {"nodes": self.nodes, "edges": self.edges, "batches": self.batches, "retries": self.retries,
+                "seconds": round(self.seconds, 3),
+                "rows_per_sec": round(rows / self.seconds, 1) if self.seconds else 0.0}
+
+
+async def _run_batch(tx, query, rows):
+    result = await tx.run(query, rows=rows)
+    await result.consume()
+
+
+class _PartitionedWriter:
+    """One bounded queue and worker per partition; add() blocks when a worker falls behind."""
+
+    def __init__(self, pool: Neo4jPool, partitions: int, batch_size: int, stats: PersistStats):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.stats = stats
+        self.buffers = [[] for _ in range(partitions)]
+        self.queues = [asyncio.Queue(maxsize=2) for _ in range(partitions)]
+        self.error = None
+        self.workers = [asyncio.create_task(self._worker(q)) for q in self.queues]
+
+    async def _write(self, query, rows):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                async with self.pool.session() as session:
+                    await session.execute_write(_run_batch, query, rows)
+                return
+            except TransientError:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                self.stats.retries += 1
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1) * (1 + random.random()))
+
+    async def _worker(self, queue):
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is None:
+                    # After a failure, keep draining so producers never block
+                    await self._write(*item)
+                    self.stats.batches += 1
+            except Exception as e:
+                self.error = self.error or e
+            finally:
+                queue.task_done()
+
+    async def add(self, query, key, row):
+        if self.error is not None:
+            raise self.error
+        p = partition_of(key, len(self.buffers))
+        self.buffers[p].append(row)
+        if len(self.buffers[p]) >= self.batch_size:
+            rows, self.buffers[p] = self.buffers[p], []
+            await self.queues[p].put((query, rows))
+
+    async def flush(self, query):
+        """Write out the partial batches and wait until every queued batch committed."""
+        for p, rows in enumerate(self.buffers):
+            if rows:
+                self.buffers[p] = []
+                await self.queues[p].put((query, rows))
+        for queue in self.queues:
+            await queue.join()
+        if self.error is not None:
+            raise self.error
+
+    async def close(self):
+        for queue in self.queues:
+            await queue.put(None)
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+
+async def _aiter(rows):
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+class Neo4jService:
+    """Graph persistence on the shared async pool (no per-request driver)."""
+
+    def __init__(self, pool: Optional[Neo4jPool] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY):
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError("batch_size and concurrency must be positive")
+        self.pool = pool or neo4j_pool
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+
+    async def ensure_schema(self):
+        async with self.pool.session() as session:
+            for statement in SCHEMA_STATEMENTS:
+                result = await session.run(statement)
+                await result.consume()
+
+    async def persist_graph(self, nodes: List[NodeModel], edges: List[EdgeModel]) -> PersistStats:
+        return await self.persist_rows(list(nodes) + list(edges))
+
+    async def persist_rows(self, rows: Union[Iterable, AsyncIterable]) -> PersistStats:
+        """
+        Write NodeModel/EdgeModel rows as they are produced. All node batches
+        are committed before the first edge batch is written.
+        """
+        stats = PersistStats()
+        start = time.perf_counter()
+        await self.ensure_schema()
+        writer = _PartitionedWriter(self.pool, self.concurrency, self.batch_size, stats)
+        in_edges = False
+        try:
+            async for row in _aiter(rows):
+                if isinstance(row, EdgeModel):
+                    if not in_edges:
+                        await writer.flush(NODE_BATCH_QUERY)
+                        in_edges = True
+                    await writer.add(EDGE_BATCH_QUERY, row.source, {
+                        "source": row.source, "target": row.target, "value": row.value,
+                        "attributes": row.attributes or {}})
+                    stats.edges += 1
+                else:
+                    if in_edges:
+                        # Nodes after edges: finish the edges first, then switch back
+                        await writer.flush(EDGE_BATCH_QUERY)
+                        in_edges = False
+                    await writer.add(NODE_BATCH_QUERY, row.id, {
+                        "id": row.id, "type": row.type, "name": row.name,
+                        "attributes": row.attributes or {}})
+                    stats.nodes += 1
+            await writer.flush(EDGE_BATCH_QUERY if in_edges else NODE_BATCH_QUERY)
+        finally:
+            await writer.close()
+            stats.seconds = time.perf_counter() - start
+        return stats
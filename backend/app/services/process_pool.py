@@ -0,0 +1,92 @@
+"""
+App-lifetime process pool for the CPU-bound analytics (disruption
+simulation, parallel betweenness).
+
+Workers are started with forkserver (spawn where that is unavailable),
+never fork: forking the threaded server would copy into each child
+whatever locks other threads held at that moment. The pool is created on
+first use, shared by every request and shut down in the app lifespan.
+
+Workers outlive any one call, so per-call state (a simulation model, an
+adjacency list) cannot go through a pool initializer. shared() pickles it
+once to a temporary file and tasks carry only the path; each worker loads
+it on first use and keeps the most recent few.
+"""
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+DEFAULT_MAX_WORKERS = min(os.cpu_count() or 1, 8)
+WORKER_STATE_CACHE = 2
+
+# Worker side: state file path -> unpickled state, least recently used first
+_states = OrderedDict()
+
+
+def _context():
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _state(path):
+    if path in _states:
+        _states.move_to_end(path)
+        return _states[path]
+    with open(path, "rb") as f:
+        state = _states[path] = pickle.load(f)
+    while len(_states) > WORKER_STATE_CACHE:
+        _states.popitem(last=False)
+    return state
+
+
+def call_with_state(path, fn, *args):
+    """Worker side: fn(state, *args) with the state shared() wrote to `path`."""
+    return fn(_state(path), *args)
+
+
+class SharedProcessPool:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or int(os.getenv("PROCESS_POOL_WORKERS", "0")) or DEFAULT_MAX_WORKERS
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """The shared ProcessPoolExecutor, created on first use."""
+        with self._lock:
+            # A worker that died (e.g. OOM-killed) breaks the executor for good; start over
+            if self._executor is not None and self._executor._broken:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=_context())
+            return self._executor
+
+    @contextmanager
+    def shared(self, state):
+        """Path of `state` pickled for the workers, removed on exit."""
+        fd, path = tempfile.mkstemp(prefix="pool-state-", suffix=".pkl")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            yield path
+        finally:
+            os.unlink(path)
+
+    def submit(self, path, fn, *args):
+        """Future of fn(state, *args) in a worker, for a path from shared()."""
+        return self.executor.submit(call_with_state, path, fn, *args)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+process_pool = SharedProcessPool()
@@ -0,0 +1,139 @@
+"""
+Vectorized macro-risk scoring.
+
+Centrality vectors are joined with a columnar macro table (unemployment,
+financial health, location risk, demand) keyed by node id or region, and
+risk scores/forecasts are computed as NumPy array operations. Results are
+kept as columns on a RiskScores object; swapping weights re-scores from
+the stored columns without touching the centralities.
+"""
+import csv
+import json
+import numpy as np
+
+MACRO_COLUMNS = ["unemployment_rate", "financial_health", "location_risk", "demand_score"]
+CENTRALITY_COLUMNS = ["degree_centrality", "eigenvector_centrality", "authority"]
+
+# Placeholder macro values used until real data sources are wired in
+DEFAULT_MACRO = {
+    "unemployment_rate": 0.05,
+    "financial_health": 0.8,
+    "location_risk": 0.2,
+    "demand_score": 0.7,
+}
+
+DEFAULT_WEIGHTS = {
+    "degree_centrality": 1.0,
+    "eigenvector_centrality": 1.0,
+    "authority": 1.0,
+    "unemployment_rate": 0.2,
+    "financial_health": 0.3,
+    "location_risk": 0.2,
+    "demand_score": 0.3,
+}
+DEFAULT_FORECAST_FACTOR = 1.05
+
+
+class MacroTable:
+    """
+    Macro attributes as a (rows x 4) float array keyed by node id or region.
+    Keys missing from the table fall back to `default`.
+    """
+
+    def __init__(self, keys=None, values=None, key="id", default=None):
+        self.key = key
+        self.keys = list(keys or [])
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        self.values = (np.asarray(values, dtype=float).reshape(len(self.keys), len(MACRO_COLUMNS))
+                       if self.keys else np.zeros((0, len(MACRO_COLUMNS))))
+        default = {**DEFAULT_MACRO, **(default or {})}
+        self.default = np.array([default[c] for c in MACRO_COLUMNS], dtype=float)
+
+    @classmethod
+    def from_records(cls, records, key="id", default=None):
+        records = list(records)
+        keys = [r[key] for r in records]
+        fallback = {**DEFAULT_MACRO, **(default or {})}
+        values = [[float(r.get(c, fallback[c])) for c in MACRO_COLUMNS] for r in records]
+        return cls(keys, values, key=key, default=default)
+
+    @classmethod
+    def from_file(cls, path, key="id", default=None):
+        """Load a CSV or JSON (list of records) table; `key` names the join column."""
+        with open(path, newline="") as f:
+            if path.endswith(".csv"):
+                records = list(csv.DictReader(f))
+            else:
+                records = json.load(f)
+        return cls.from_records(records, key=key, default=default)
+
+    def align(self, node_ids, regions=None):
+        """Macro rows for each node, in node order, as an (n x 4) array."""
+        join_keys = regions if self.key != "id" else node_ids
+        n = len(node_ids)
+        if not self.keys or join_keys is None:
+            return np.broadcast_to(self.default, (n, len(MACRO_COLUMNS)))
+        rows = np.fromiter((self.index.get(k, -1) for k in join_keys), dtype=np.int64, count=n)
+        out = np.empty((n, len(MACRO_COLUMNS)))
+        hit = rows >= 0
+        out[hit] = self.values[rows[hit]]
+        out[~hit] = self.default
+        return out
+
+
+class RiskScores:
+    """Column store of centralities, macro attributes, scores and forecasts."""
+
+    def __init__(self, node_ids, centrality, macro, weights=None, forecast_factor=DEFAULT_FORECAST_FACTOR):
+        self.node_ids = list(node_ids)
+        self.centrality = centrality  # (n x 3), CENTRALITY_COLUMNS order
+        self.macro = macro            # (n x 4), MACRO_COLUMNS order
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.forecast_factor = forecast_factor
+        wc = np.array([self.weights[c] for c in CENTRALITY_COLUMNS])
+        wm = np.array([self.weights[c] for c in MACRO_COLUMNS])
+        self.risk_score = self.centrality @ wc + self.macro @ wm
+        self.risk_forecast = self.risk_score * forecast_factor
+
+    def rescore(self, weights=None, forecast_factor=None):
+        """New scores from the stored columns with different weights."""
+        return RiskScores(
+            self.node_ids, self.centrality, self.macro,
+            weights={**self.weights, **(weights or {})},
+            forecast_factor=self.forecast_factor if forecast_factor is None else forecast_factor,
+        )
+
+    def column(self, name):
+        if name == "risk_score":
+            return self.risk_score
+        if name == "risk_forecast":
+            return self.risk_forecast
+        if name in MACRO_COLUMNS:
+            return self.macro[:, MACRO_COLUMNS.index(name)]
+        return self.centrality[:, CENTRALITY_COLUMNS.index(name)]
+
+    def macro_row(self, i):
+        return dict(zip(MACRO_COLUMNS, map(float, self.macro[i])))
+
+    def to_dicts(self):
+        return {
+            "risk_score": dict(zip(self.node_ids, self.risk_score.tolist())),
+            "risk_forecast": dict(zip(self.node_ids, self.risk_forecast.tolist())),
+        }
+
+
+def score_risk(node_ids, centralities, macro_table=None, weights=None, regions=None,
+               forecast_factor=DEFAULT_FORECAST_FACTOR):
+    """
+    centralities: mapping of CENTRALITY_COLUMNS name -> array in node order
+    (None or missing means the metric was unavailable and counts as 0).
+    """
+    n = len(node_ids)
+    centrality = np.zeros((n, len(CENTRALITY_COLUMNS)))
+    for j, name in enumerate(CENTRALITY_COLUMNS):
+        values = centralities.get(name)
+        if values is not None and len(values) == n:
+            centrality[:, j] = values
+    macro_table = macro_table or MacroTable()
+    macro = macro_table.align(node_ids, regions)
+    return RiskScores(node_ids, centrality, macro, weights, forecast_factor)
@@ -0,0 +1,209 @@
+"""
+Sparse-matrix analytics engine.
+
+Builds one scipy.sparse CSR adjacency per graph (binary, plus an optional
+contract-value-weighted copy) and computes degree, eigenvector, HITS
+hub/authority and PageRank from it with sparse power iteration. Results
+are returned as per-node dicts, in the same shape as the networkx
+functions compute_analytics used before.
+"""
+import numpy as np
+import scipy.sparse as sps
+import networkx as nx
+
+DEFAULT_TOL = {"eigenvector": 1e-6, "hits": 1e-8, "pagerank": 1e-6}
+
+
+class SparseAnalyticsEngine:
+    def __init__(self, nodes, adjacency, weighted=None):
+        """
+        nodes: node ids in matrix order
+        adjacency: CSR matrix with A[i, j] = 1 for an edge i -> j
+        weighted: optional CSR matrix with the same pattern holding edge weights
+        """
+        self.nodes = list(nodes)
+        self.A = sps.csr_array(adjacency, dtype=float)
+        self.W = None if weighted is None else sps.csr_array(weighted, dtype=float)
+        self._transposes = {}
+        # Power iterations used by the last run of each metric
+        self.iterations = {}
+
+    @classmethod
+    def from_networkx(cls, G, weight="value"):
+        """
+        Build the engine from a DiGraph. Edges whose `weight` attribute is
+        missing or None contribute 0 to the weighted matrix.
+        """
+        nodes = list(G)
+        index = {n: i for i, n in enumerate(nodes)}
+        n = len(nodes)
+        m = G.number_of_edges()
+        rows = np.empty(m, dtype=np.int64)
+        cols = np.empty(m, dtype=np.int64)
+        vals = np.empty(m, dtype=float)
+        for k, (u, v, w) in enumerate(G.edges(data=weight)):
+            rows[k] = index[u]
+            cols[k] = index[v]
+            vals[k] = 0.0 if w is None else float(w)
+        A = sps.csr_array((np.ones(m), (rows, cols)), shape=(n, n))
+        W = sps.csr_array((vals, (rows, cols)), shape=(n, n)) if weight else None
+        return cls(nodes, A, W)
+
+    @classmethod
+    def from_edge_store(cls, store, weight="sum"):
+        """
+        Build the engine from an EdgeStore: one binary entry per distinct
+        (source, target) pair, weighted by the pair aggregate `weight`
+        (sum, count, min, max or latest) over all of its award records.
+        """
+        agg = store.aggregates
+        return cls(store.node_ids, agg.to_csr(None), agg.to_csr(weight) if weight else None)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def matrix(self, weighted=False):
+        if weighted:
+            if self.W is None:
+                raise ValueError("Engine was built without edge weights")
+            return self.W
+        return self.A
+
+    def transpose(self, weighted=False):
+        # CSR of A.T, so A.T @ x is a row-wise sparse product too
+        if weighted not in self._transposes:
+            self._transposes[weighted] = self.matrix(weighted).T.tocsr()
+        return self._transposes[weighted]
+
+    def to_dict(self, values):
+        return dict(zip(self.nodes, map(float, values)))
+
+    def degree_centrality(self, weighted=False):
+        """(in + out) degree / (n - 1), as nx.degree_centrality; weighted uses value strength."""
+        n = len(self)
+        if n == 0:
+            return np.zeros(0)
+        if n == 1:
+            return np.ones(1)
+        M = self.matrix(weighted)
+        degree = np.asarray(M.sum(axis=0)).ravel() + np.asarray(M.sum(axis=1)).ravel()
+        if weighted:
+            total = degree.sum()
+            return degree / total if total else degree
+        return degree / (n - 1)
+
+    def eigenvector_centrality(self, weighted=False, tol=None, max_iter=100, x0=None):
+        """
+        Left eigenvector by power iteration on (A^T + I), the same iteration
+        and stopping rule as nx.eigenvector_centrality. x0 warm-starts the
+        iteration (e.g. from the previous graph version's vector).
+        """
+        tol = DEFAULT_TOL["eigenvector"] if tol is None else tol
+        n = len(self)
+        if n == 0:
+            return np.zeros(0)
+        AT = self.transpose(weighted)
+        x = np.full(n, 1.0 / n) if x0 is None else np.asarray(x0, dtype=float)
+        for i in range(max_iter):
+            xlast = x
+            x = xlast + AT @ xlast
+            norm = np.linalg.norm(x) or 1.0
+            x = x / norm
+            if np.abs(x - xlast).sum() < n * tol:
+                self.iterations["eigenvector"] = i + 1
+                return x
+        raise nx.PowerIterationFailedConvergence(max_iter)
+
+    def hits(self, weighted=False, tol=None, max_iter=100, x0=None):
+        """
+        (hubs, authorities) by power iteration on A^T A without forming it,
+        matching nx.hits (normalized to sum 1). x0 warm-starts the
+        authority vector.
+        """
+        tol = DEFAULT_TOL["hits"] if tol is None else tol
+        n = len(self)
+        if n == 0:
+            return np.zeros(0), np.zeros(0)
+        A = self.matrix(weighted)
+        AT = self.transpose(weighted)
+        if A.nnz == 0:
+            uniform = np.full(n, 1.0 / n)
+            return uniform, uniform.copy()
+        x = np.full(n, 1.0 / n) if x0 is None else np.asarray(x0, dtype=float)
+        i = 0
+        while True:
+            xlast = x
+            x = AT @ (A @ x)
+            peak = x.max()
+            if peak == 0:
+                break
+            x = x / peak
+            if np.abs(x - xlast).sum() < tol:
+                break
+            if i > max_iter:
+                raise nx.PowerIterationFailedConvergence(max_iter)
+            i += 1
+        self.iterations["hits"] = i + 1
+        a = x
+        h = A @ a
+        h_sum, a_sum = h.sum(), a.sum()
+        return (h / h_sum if h_sum else h), (a / a_sum if a_sum else a)
+
+    def pagerank(self, alpha=0.85, weighted=False, tol=None, max_iter=100, x0=None):
+        """
+        PageRank with uniform teleport and dangling redistribution, as
+        nx.pagerank. x0 warm-starts the iteration.
+        """
+        tol = DEFAULT_TOL["pagerank"] if tol is None else tol
+        n = len(self)
+        if n == 0:
+            return np.zeros(0)
+        M = self.matrix(weighted)
+        out = np.asarray(M.sum(axis=1)).ravel()
+        inv = np.zeros(n)
+        inv[out != 0] = 1.0 / out[out != 0]
+        # Row-normalised transition matrix, transposed for x @ P == P^T @ x
+        PT = (sps.diags_array(inv) @ M).T.tocsr()
+        dangling = out == 0
+        p = np.full(n, 1.0 / n)
+        x = p.copy() if x0 is None else np.asarray(x0, dtype=float)
+        for i in range(max_iter):
+            xlast = x
+            x = alpha * (PT @ xlast + xlast[dangling].sum() * p) + (1 - alpha) * p
+            if np.abs(x - xlast).sum() < n * tol:
+                self.iterations["pagerank"] = i + 1
+                return x
+        raise nx.PowerIterationFailedConvergence(max_iter)
+
+    def compute(self, weighted=False, tol=None, max_iter=100, as_arrays=False):
+        """
+        All metrics as per-node dicts (or arrays in node order with
+        as_arrays=True). `tol` is a dict overriding DEFAULT_TOL per metric.
+        Metrics that fail to converge come back as {} (None as arrays).
+        """
+        tol = {**DEFAULT_TOL, **(tol or {})}
+        results = {"degree_centrality": self.degree_centrality()}
+        variants = [(False, "")]
+        if weighted and self.W is not None:
+            results["degree_centrality_weighted"] = self.degree_centrality(weighted=True)
+            variants.append((True, "_weighted"))
+        for use_weights, suffix in variants:
+            try:
+                results["eigenvector_centrality" + suffix] = self.eigenvector_centrality(
+                    use_weights, tol["eigenvector"], max_iter)
+            except nx.PowerIterationFailedConvergence:
+                results["eigenvector_centrality" + suffix] = None
+            try:
+                hubs, authorities = self.hits(use_weights, tol["hits"], max_iter)
+            except nx.PowerIterationFailedConvergence:
+                hubs, authorities = None, None
+            results["authority" + suffix] = authorities
+            results["hub" + suffix] = hubs
+            try:
+                results["pagerank" + suffix] = self.pagerank(
+                    weighted=use_weights, tol=tol["pagerank"], max_iter=max_iter)
+            except nx.PowerIterationFailedConvergence:
+                results["pagerank" + suffix] = None
+        if as_arrays:
+            return results
+        return {k: {} if v is None else self.to_dict(v) for k, v in results.items()}
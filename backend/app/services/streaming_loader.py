@@ -0,0 +1,202 @@
+"""
+Streaming loader for nodes/edges files.
+
+Parses JSON arrays (the ingestion output) or NDJSON, optionally gzip or
+zstd compressed, one record at a time and hands them out in bounded-size
+batches, so the full list of dicts never sits in memory next to the graph
+being built. Memory is bounded by `batch_size` records plus a read buffer
+of at most `max_buffer_bytes`; LoaderStats reports what was actually used.
+"""
+import gzip
+import io
+import json
+import os
+import sys
+import networkx as nx
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst inputs
+    zstandard = None
+
+DEFAULT_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "5000"))
+DEFAULT_CHUNK_BYTES = 1 << 16
+DEFAULT_MAX_BUFFER_BYTES = int(os.getenv("STREAM_MAX_BUFFER_BYTES", str(16 << 20)))
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+def _interned_object(pairs):
+    # json.load shares key strings across the whole document; per-record
+    # decoding does not, so intern them to keep repeated keys from costing
+    # a string per record
+    return {sys.intern(k): v for k, v in pairs}
+
+
+_decoder = json.JSONDecoder(object_pairs_hook=_interned_object)
+
+
+class LoaderStats:
+    def __init__(self):
+        self.records = 0
+        self.batches = 0
+        self.bytes_read = 0
+        self.peak_buffer_chars = 0
+        self.peak_batch_records = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _strip_compression(path):
+    base, ext = os.path.splitext(path)
+    return (base, ext) if ext in (".gz", ".zst") else (path, "")
+
+
+def is_ndjson(path):
+    return _strip_compression(path)[0].endswith(NDJSON_EXTENSIONS)
+
+
+def open_text(path):
+    """Open a possibly gzip/zstd-compressed file as UTF-8 text."""
+    compression = _strip_compression(path)[1]
+    if compression == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compression == ".zst":
+        if zstandard is None:
+            raise ImportError("Reading .zst files requires the 'zstandard' package")
+        raw = open(path, "rb")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _iter_ndjson(f, stats, max_buffer_bytes):
+    for line in f:
+        stats.bytes_read += len(line)
+        if len(line) > max_buffer_bytes:
+            raise ValueError(f"NDJSON record larger than max_buffer_bytes ({max_buffer_bytes})")
+        stats.peak_buffer_chars = max(stats.peak_buffer_chars, len(line))
+        line = line.strip()
+        if line:
+            yield _decoder.decode(line)
+
+
+def _iter_json_array(f, stats, chunk_bytes, max_buffer_bytes):
+    """Yield the elements of a top-level JSON array without parsing it whole."""
+    decoder = _decoder
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_bytes)
+        if not chunk:
+            eof = True
+            return
+        stats.bytes_read += len(chunk)
+        buf = buf[pos:] + chunk
+        pos = 0
+        if len(buf) > max_buffer_bytes:
+            raise ValueError(f"JSON record larger than max_buffer_bytes ({max_buffer_bytes})")
+        stats.peak_buffer_chars = max(stats.peak_buffer_chars, len(buf))
+
+    while True:
+        # Skip whitespace and separators between elements
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            fill()
+        if pos >= len(buf):
+            if started:
+                raise ValueError("Unexpected end of JSON array")
+            return
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON array of records")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        # A scalar cut at the chunk boundary would decode early; records are objects
+        if not isinstance(record, dict):
+            raise ValueError(f"Expected JSON objects, got {type(record).__name__}")
+        pos = end
+        yield record
+
+
+def iter_records(path, stats=None, chunk_bytes=DEFAULT_CHUNK_BYTES, max_buffer_bytes=DEFAULT_MAX_BUFFER_BYTES):
+    """Yield records from a JSON array or NDJSON file, one at a time."""
+    stats = stats if stats is not None else LoaderStats()
+    with open_text(path) as f:
+        if is_ndjson(path):
+            records = _iter_ndjson(f, stats, max_buffer_bytes)
+        else:
+            records = _iter_json_array(f, stats, chunk_bytes, max_buffer_bytes)
+        for record in records:
+            stats.records += 1
+            yield record
+
+
+def iter_batches(path, batch_size=DEFAULT_BATCH_SIZE, stats=None, **kwargs):
+    """Yield lists of at most batch_size records."""
+    stats = stats if stats is not None else LoaderStats()
+    batch = []
+    for record in iter_records(path, stats, **kwargs):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            stats.batches += 1
+            stats.peak_batch_records = max(stats.peak_batch_records, len(batch))
+            yield batch
+            batch = []
+    if batch:
+        stats.batches += 1
+        stats.peak_batch_records = max(stats.peak_batch_records, len(batch))
+        yield batch
+
+
+def load_networkx(nodes_path, edges_path, batch_size=DEFAULT_BATCH_SIZE, validate=True, stats=None, G=None):
+    """
+    Stream nodes then edges into a DiGraph batch by batch. With validate=True
+    records missing required fields raise ValueError, as build_graph does.
+    """
+    G = G if G is not None else nx.DiGraph()
+    stats = stats if stats is not None else {"nodes": LoaderStats(), "edges": LoaderStats()}
+    for batch in iter_batches(nodes_path, batch_size, stats["nodes"]):
+        if validate:
+            for node in batch:
+                if "id" not in node or "type" not in node or "name" not in node:
+                    raise ValueError(f"Node missing required fields: {node}")
+        G.add_nodes_from((node.pop("id"), node) for node in batch)
+    for batch in iter_batches(edges_path, batch_size, stats["edges"]):
+        if validate:
+            for edge in batch:
+                if "source" not in edge or "target" not in edge:
+                    raise ValueError(f"Edge missing required fields: {edge}")
+        G.add_edges_from((edge.pop("source"), edge.pop("target"), edge) for edge in batch)
+    return G
+
+
+def load_edge_store(edges_path, nodes_path=None, batch_size=DEFAULT_BATCH_SIZE, stats=None):
+    """
+    Stream records into an EdgeStore without materialising the record list.
+    Attributes other than source/target/value are kept JSON-encoded, since a
+    column's type may only become clear several batches in.
+    """
+    from app.services.edge_store import EdgeStore
+    stats = stats if stats is not None else {"nodes": LoaderStats(), "edges": LoaderStats()}
+    return EdgeStore.from_batches(
+        iter_batches(edges_path, batch_size, stats["edges"]),
+        iter_batches(nodes_path, batch_size, stats["nodes"]) if nodes_path else (),
+    )
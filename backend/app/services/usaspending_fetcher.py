@@ -0,0 +1,294 @@
+"""
+Concurrent USAspending award / subaward fetcher.
+
+Fans out over (fiscal year, agency, award page) against the REST search
+endpoint and starts each award's subaward pages as soon as the award page
+arrives, so subaward round trips overlap award paging instead of following
+it. Every request goes through one concurrency limit and a per-host token
+bucket, and is retried with exponential backoff on transport errors, 429
+and 5xx (honouring Retry-After). Records are assembled in (fiscal year,
+agency, page, row) order, so the output does not depend on completion
+order.
+"""
+import asyncio
+import itertools
+import math
+import random
+import time
+
+import httpx
+
+from app.services.http_cache import cached_async_client
+from app.services.http_client import HostRateLimiter
+
+BASE_URL = "https://api.usaspending.gov/api/v2"
+SEARCH_PATH = "/search/spending_by_award/"
+CONTRACT_CODES = ["A", "B", "C", "D"]
+LAST_MODIFIED = "Last Modified Date"
+PAGE_SIZE = 100  # API maximum
+
+AWARD_FIELDS = [
+    "Award ID", "Recipient Name", "Recipient DUNS Number", "Recipient UEI", "Award Amount",
+    "Awarding Agency", "Awarding Sub Agency", "Awarding Sub Agency Code", "generated_internal_id",
+    LAST_MODIFIED,
+]
+SUBAWARD_FIELDS = [
+    "Sub-Award ID", "Sub-Awardee Name", "sub_award_recipient_id", "Sub-Recipient UEI", "Sub-Award Amount",
+    "Prime Award ID",
+]
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.awards = 0
+        self.subawards = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {"requests": self.requests, "retries": self.retries, "awards": self.awards,
+                "subawards": self.subawards, "seconds": round(self.seconds, 3)}
+
+
+def award_filters(fiscal_year, agency):
+    return {
+        "award_type_codes": CONTRACT_CODES,
+        "agencies": [{"type": "awarding", "tier": "toptier", "name": agency}],
+        "time_period": [{"start_date": f"{fiscal_year - 1}-10-01", "end_date": f"{fiscal_year}-09-30"}],
+    }
+
+
+class USAspendingFetcher:
+    def __init__(self, client=None, base_url=BASE_URL, concurrency=8, rate=5.0, burst=None,
+                 max_retries=5, backoff=0.5, page_size=PAGE_SIZE, timeout=30.0):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = HostRateLimiter(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.page_size = min(page_size, PAGE_SIZE)
+        self.timeout = timeout
+        self.stats = FetchStats()
+
+    async def post(self, path, payload):
+        """JSON response of one POST, retried on transient failures."""
+        url = self.base_url + path
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            async with self.semaphore:
+                await self.limiter.acquire(url)
+                self.stats.requests += 1
+                try:
+                    response = await self.client.post(url, json=payload, timeout=self.timeout)
+                    if response.status_code not in RETRY_STATUS:
+                        response.raise_for_status()
+                        return response.json()
+                    retry_after = response.headers.get("Retry-After")
+                    error = httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request,
+                                                  response=response)
+                except httpx.TransportError as e:
+                    error = e
+            if attempt == self.max_retries:
+                raise error
+            self.stats.retries += 1
+            delay = self.backoff * 2 ** attempt * (1 + random.random())
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+
+    async def award_page(self, fiscal_year, agency, page, limit, sort="Award Amount"):
+        payload = {
+            "filters": award_filters(fiscal_year, agency), "fields": AWARD_FIELDS,
+            "limit": limit, "page": page, "sort": sort, "order": "desc",
+        }
+        return await self.post(SEARCH_PATH, payload)
+
+    async def subawards(self, award):
+        """All subaward rows of one prime award, page by page."""
+        award_key = award.get("generated_internal_id")
+        if not award_key:
+            return []
+        rows, page = [], 1
+        while True:
+            payload = {
+                "filters": {"award_type_codes": CONTRACT_CODES, "award_unique_id": award_key},
+                "fields": SUBAWARD_FIELDS, "limit": self.page_size, "page": page,
+                "subawards": True, "spending_level": "subawards",
+                "sort": "Sub-Award Amount", "order": "desc",
+            }
+            response = await self.post(SEARCH_PATH, payload)
+            rows.extend(response.get("results", []))
+            if not response.get("page_metadata", {}).get("hasNext"):
+                self.stats.subawards += len(rows)
+                return rows
+            page += 1
+
+    def _subaward_task(self, award, tasks):
+        task = asyncio.create_task(self.subawards(award))
+        tasks.add(task)
+        return task
+
+    @staticmethod
+    async def _cancel_pending(tasks):
+        # A failed search must not leave subaward fetches running on a closed client
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _modified_since(self, fiscal_year, agency, since, tasks):
+        """
+        [(award row, subaward task)] for every award last modified on or
+        after `since` (YYYY-MM-DD), newest first; pages stop at the first
+        older row. There is deliberately no cap: the caller moves its
+        watermark to the newest date seen, so any changed award left
+        unfetched would be skipped for good.
+        """
+        out, page = [], 1
+        while True:
+            response = await self.award_page(fiscal_year, agency, page, self.page_size, sort=LAST_MODIFIED)
+            results = response.get("results", [])
+            fresh = [a for a in results if (a.get(LAST_MODIFIED) or "")[:10] >= since]
+            out.extend((award, self._subaward_task(award, tasks)) for award in fresh)
+            if len(fresh) < len(results) or not response.get("page_metadata", {}).get("hasNext"):
+                break
+            page += 1
+        self.stats.awards += len(out)
+        return out
+
+    async def fetch_partition(self, fiscal_year, agency, limit=None, since=None):
+        """
+        [(award row, [subaward rows])] of one (fiscal year, agency): the top
+        `limit` awards by amount, or with `since` every award modified since
+        then. Uses the client passed to the constructor.
+        """
+        tasks = set()
+        try:
+            if since is None:
+                rows = await self._search(fiscal_year, agency, limit, tasks)
+            else:
+                rows = await self._modified_since(fiscal_year, agency, since, tasks)
+            return [(award, await task) for award, task in rows]
+        finally:
+            await self._cancel_pending(tasks)
+
+    async def _search(self, fiscal_year, agency, limit, tasks):
+        """[(award row, subaward task)] for the top `limit` awards, in API order."""
+        pages = math.ceil(limit / self.page_size)
+        out = []
+
+        async def fetch_page(page):
+            size = min(self.page_size, limit - (page - 1) * self.page_size)
+            response = await self.award_page(fiscal_year, agency, page, self.page_size)
+            results = response.get("results", [])[:size]
+            # Subaward fetches start now, while other pages are still in flight
+            return [(award, self._subaward_task(award, tasks)) for award in results]
+
+        for rows in await asyncio.gather(*(fetch_page(p) for p in range(1, pages + 1))):
+            out.extend(rows)
+        self.stats.awards += len(out)
+        return out
+
+    async def iter_partitions(self, fiscal_years, agencies, limit, window=4):
+        """
+        Yield (fiscal year, agency, [(award row, [subaward rows])]) per
+        partition as each completes, with at most `window` partitions in
+        flight, so memory is bounded by the window rather than the run.
+        """
+        start = time.perf_counter()
+        owned = self.client is None
+        if owned:
+            self.client = cached_async_client()
+        keys = iter([(fy, agency) for fy in fiscal_years for agency in agencies])
+        pending = set()
+
+        async def partition(fy, agency):
+            return fy, agency, await self.fetch_partition(fy, agency, limit=limit)
+
+        try:
+            while True:
+                for fy, agency in itertools.islice(keys, window - len(pending)):
+                    pending.add(asyncio.ensure_future(partition(fy, agency)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            await self._cancel_pending(pending)
+            if owned:
+                await self.client.aclose()
+                self.client = None
+            self.stats.seconds = time.perf_counter() - start
+
+    async def fetch(self, fiscal_years, agencies, limit):
+        """
+        [(fiscal year, agency, award row, [subaward rows])] for the top
+        `limit` contract awards of every (fiscal year, agency).
+        """
+        start = time.perf_counter()
+        owned = self.client is None
+        if owned:
+            self.client = cached_async_client()
+        tasks = set()
+        try:
+            keys = [(fy, agency) for fy in fiscal_years for agency in agencies]
+            searches = await asyncio.gather(*(self._search(fy, agency, limit, tasks) for fy, agency in keys))
+            out = []
+            for (fy, agency), rows in zip(keys, searches):
+                for award, task in rows:
+                    out.append((fy, agency, award, await task))
+            return out
+        finally:
+            await self._cancel_pending(tasks)
+            if owned:
+                await self.client.aclose()
+                self.client = None
+            self.stats.seconds = time.perf_counter() - start
+
+
+def build_records(fetched):
+    """(nodes, edges) in the ingest_usaspending JSON shape from fetch() output."""
+    nodes, edges = {}, []
+
+    def add_node(node_id, node_type, **attrs):
+        nodes[node_id] = {"id": node_id, "type": node_type, **attrs}
+
+    for _, _, award, subawards in fetched:
+        fa_name = award.get("Awarding Agency") or "Unknown Agency"
+        fa_id = f"agency:{fa_name}"
+        add_node(fa_id, "funding_agency", name=fa_name)
+        sub_agency = award.get("Awarding Sub Agency")
+        if sub_agency:
+            po_id = f"program:{award.get('Awarding Sub Agency Code') or sub_agency}"
+            add_node(po_id, "program_office", name=sub_agency, parent=fa_id)
+        else:
+            po_id = fa_id
+        recipient = award.get("Recipient Name")
+        if not recipient:
+            continue
+        prime_id = f"prime:{award.get('Recipient DUNS Number') or award.get('Recipient UEI') or recipient}"
+        add_node(prime_id, "prime_contractor", name=recipient)
+        edges.append({"source": po_id, "target": prime_id, "type": "prime_contract",
+                      "value": award.get("Award Amount"), "award_id": award.get("Award ID")})
+        for sub in subawards:
+            name = sub.get("Sub-Awardee Name")
+            if not name:
+                continue
+            # The ORM's subaward Recipient.duns is sub_award_recipient_id: key suppliers the same way
+            sub_id = f"supplier:{sub.get('sub_award_recipient_id') or sub.get('Sub-Recipient UEI') or name}"
+            add_node(sub_id, "supplier", name=name)
+            edges.append({"source": prime_id, "target": sub_id, "type": "subcontract",
+                          "value": sub.get("Sub-Award Amount"), "subaward_id": sub.get("Sub-Award ID")})
+    return list(nodes.values()), edges
+
+
+async def fetch_records(fiscal_years, agencies, limit, **fetcher_options):
+    """(nodes, edges, FetchStats) for the given fiscal years and agencies."""
+    fetcher = USAspendingFetcher(**fetcher_options)
+    fetched = await fetcher.fetch(fiscal_years, agencies, limit)
+    nodes, edges = build_records(fetched)
+    return nodes, edges, fetcher.stats
@@ -2,9 +2,12 @@
 # Service for integrating with USAspending ORM
 import usaspending
 
+from app.services.http_cache import install_requests_cache
+
 
 class USASpendingService:
     def __init__(self):
+        install_requests_cache()
         self.client = usaspending.client.Client()
 
     def get_contracts(self, **kwargs):
@@ -0,0 +1,313 @@
+"""
+Batched Wikidata enrichment of company nodes.
+
+Companies are resolved to Wikidata items by DUNS number (P2771) when the
+node id carries one, else by exact English label (the name as given and in
+title case, since USAspending names are upper case). Label matches must be
+organisations (instance of a subclass of Q43229), so a supplier never
+resolves to a city or family name that shares its name. Hundreds of
+identifiers go into one SPARQL query through a VALUES block, and a second
+batched query fetches headquarters (P159), parent organisation (P749) and
+industry (P452) for the resolved items. Batch size adapts: it grows while
+queries finish well inside the target time and halves on slow responses
+or timeouts (WDQS reports its own timeouts as 5xx), retrying the same
+chunk until the minimum size.
+
+Resolutions, including "no match", are kept in a JSON identifier -> QID
+cache, so later runs only query identifiers they have not seen. Results
+are joined back onto the nodes with pandas merges rather than per-node
+lookups. enrich_stage() does the same per batch of nodes inside the
+streaming ingest pipeline.
+"""
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import pandas as pd
+
+from app.services.http_client import SharedHttpClient
+from app.services.wikidata_service import WikidataService
+
+QID_CACHE_FILE = os.getenv("WIKIDATA_QID_CACHE", "wikidata_qids.json")
+COMPANY_TYPES = ("prime_contractor", "supplier")
+DEFAULT_BATCH_SIZE = 200
+STAGE_BATCH_SIZE = 2000
+MIN_BATCH_SIZE = 10
+MAX_BATCH_SIZE = 500
+TARGET_SECONDS = 10.0
+QUERY_TIMEOUT = 60.0
+ATTRIBUTES = ["wikidata_qid", "headquarters", "parent_company", "parent_qid", "industry"]
+
+RESOLVE_QUERIES = {
+    "duns": """SELECT ?key ?item WHERE {{
+  VALUES ?key {{ {values} }}
+  ?item wdt:P2771 ?key .
+}}""",
+    "label": """SELECT ?key ?item WHERE {{
+  VALUES ?key {{ {values} }}
+  ?item rdfs:label ?key ; wdt:P31/wdt:P279* wd:Q43229 .
+}}""",
+}
+# QID cache prefix per resolve query. "label:" entries predate the
+# organisation filter and may name places or people, so they are not reused.
+CACHE_PREFIXES = {"duns": "duns", "label": "org_label"}
+ATTRIBUTES_QUERY = """SELECT ?item ?hqLabel ?parent ?parentLabel ?industryLabel WHERE {{
+  VALUES ?item {{ {values} }}
+  OPTIONAL {{ ?item wdt:P159 ?hq . }}
+  OPTIONAL {{ ?item wdt:P749 ?parent . }}
+  OPTIONAL {{ ?item wdt:P452 ?industry . }}
+  SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
+}}"""
+
+
+def sparql_string(value, lang=None):
+    literal = json.dumps(value, ensure_ascii=False)
+    return f"{literal}@{lang}" if lang else literal
+
+
+def _qid(uri):
+    return uri.rsplit("/", 1)[-1] if uri else None
+
+
+def _value(binding, name):
+    cell = binding.get(name)
+    return cell["value"] if cell else None
+
+
+class QidCache:
+    """"kind:identifier" -> QID, or None for identifiers Wikidata has no item for."""
+
+    def __init__(self, path=QID_CACHE_FILE):
+        self.path = path
+        self.qids = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.qids = json.load(f)
+
+    def missing(self, kind, identifiers):
+        return [i for i in identifiers if f"{kind}:{i}" not in self.qids]
+
+    def mapping(self, kind):
+        prefix = f"{kind}:"
+        return {k[len(prefix):]: q for k, q in self.qids.items() if k.startswith(prefix) and q}
+
+    def update(self, kind, resolved):
+        for identifier, qid in resolved.items():
+            self.qids[f"{kind}:{identifier}"] = qid
+
+    def save(self):
+        if not self.path:
+            return
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.qids, f, separators=(",", ":"), sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
+
+
+class AdaptiveBatchSize:
+    def __init__(self, size=DEFAULT_BATCH_SIZE, minimum=MIN_BATCH_SIZE, maximum=MAX_BATCH_SIZE,
+                 target_seconds=TARGET_SECONDS):
+        self.size = size
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.ceiling = maximum  # below the smallest batch that has timed out
+
+    def succeeded(self, seconds):
+        if seconds < self.target_seconds / 2:
+            self.size = max(self.size, min(self.ceiling, int(self.size * 1.5)))
+        elif seconds > self.target_seconds:
+            self.size = max(self.minimum, self.size // 2)
+
+    def timed_out(self, batch_size):
+        self.ceiling = max(self.minimum, min(self.ceiling, batch_size - 1))
+        self.size = max(self.minimum, min(self.size, batch_size) // 2)
+
+
+class EnrichmentStats:
+    def __init__(self):
+        self.companies = 0
+        self.cached = 0
+        self.resolved = 0
+        self.enriched = 0
+        self.queries = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {"companies": self.companies, "cached": self.cached, "resolved": self.resolved,
+                "enriched": self.enriched, "queries": self.queries, "timeouts": self.timeouts,
+                "failed": self.failed, "seconds": round(self.seconds, 3)}
+
+
+def _is_timeout(error):
+    if isinstance(error, httpx.TimeoutException):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code >= 500
+
+
+class WikidataEnricher:
+    def __init__(self, service=None, cache=None, batch=None, timeout=QUERY_TIMEOUT):
+        self.service = service or WikidataService()
+        self.cache = cache if cache is not None else QidCache()
+        self.batch = batch or AdaptiveBatchSize()
+        self.timeout = timeout
+        self.stats = EnrichmentStats()
+
+    async def _batched(self, items, build_query):
+        """
+        (bindings, failed items) of build_query(chunk) over all items, chunked
+        by the adaptive batch size.
+        """
+        bindings, failed, i = [], [], 0
+        while i < len(items):
+            chunk = items[i:i + self.batch.size]
+            start = time.perf_counter()
+            self.stats.queries += 1
+            try:
+                data = await self.service.query(build_query(chunk), timeout=self.timeout)
+            except httpx.HTTPError as e:
+                if not _is_timeout(e):
+                    raise
+                self.stats.timeouts += 1
+                if len(chunk) > self.batch.minimum:
+                    self.batch.timed_out(len(chunk))
+                    continue
+                # Already at the minimum: give up on this chunk (not cached, retried next run)
+                self.stats.failed += len(chunk)
+                failed.extend(chunk)
+                i += len(chunk)
+                continue
+            self.batch.succeeded(time.perf_counter() - start)
+            bindings.extend(data.get("results", {}).get("bindings", []))
+            i += len(chunk)
+        return bindings, failed
+
+    async def resolve(self, kind, identifiers):
+        """{identifier: QID} for identifiers of one kind ("duns" or "label"), querying only uncached ones."""
+        identifiers = sorted(set(identifiers))
+        prefix = CACHE_PREFIXES[kind]
+        todo = self.cache.missing(prefix, identifiers)
+        self.stats.cached += len(identifiers) - len(todo)
+        if todo:
+            lang = "en" if kind == "label" else None
+            bindings, failed = await self._batched(todo, lambda chunk: RESOLVE_QUERIES[kind].format(
+                values=" ".join(sparql_string(v, lang) for v in chunk)))
+            found = {}
+            for b in bindings:
+                key, qid = _value(b, "key"), _qid(_value(b, "item"))
+                # Several organisations can share a label: keep the oldest (lowest) QID
+                if key not in found or int(qid[1:]) < int(found[key][1:]):
+                    found[key] = qid
+            self.stats.resolved += len(found)
+            # Identifiers of failed chunks stay uncached so the next run retries them
+            failed = set(failed)
+            self.cache.update(prefix, {i: found.get(i) for i in todo if i not in failed})
+        mapping = self.cache.mapping(prefix)
+        return {i: mapping[i] for i in identifiers if i in mapping}
+
+    async def attributes(self, qids):
+        """DataFrame indexed by wikidata_qid with headquarters, parent company and industry."""
+        qids = sorted(set(qids))
+        bindings, _ = await self._batched(qids, lambda chunk: ATTRIBUTES_QUERY.format(
+            values=" ".join(f"wd:{q}" for q in chunk)))
+        frame = pd.DataFrame({
+            "wikidata_qid": [_qid(_value(b, "item")) for b in bindings],
+            "headquarters": [_value(b, "hqLabel") for b in bindings],
+            "parent_company": [_value(b, "parentLabel") for b in bindings],
+            "parent_qid": [_qid(_value(b, "parent")) for b in bindings],
+            "industry": [_value(b, "industryLabel") for b in bindings],
+        }, columns=ATTRIBUTES)
+        # Multi-valued properties: first value per item
+        return frame.groupby("wikidata_qid", sort=False).first()
+
+    async def enrich_frame(self, nodes):
+        """
+        `nodes` with ATTRIBUTES columns added for company nodes (columns id,
+        type, name); rows that could not be resolved get nulls.
+        """
+        start = time.perf_counter()
+        companies = nodes[nodes["type"].isin(COMPANY_TYPES) & nodes["name"].notna()]
+        self.stats.companies += len(companies)
+        duns = companies["id"].str.extract(r"^[a-z_]+:(\d{9})$", expand=False)
+        names = companies["name"].astype(str).str.strip()
+        titled = names.str.title()
+
+        duns_map = await self.resolve("duns", duns.dropna().tolist())
+        label_map = await self.resolve("label", pd.concat([names, titled]).tolist())
+        qid = duns.map(duns_map).fillna(names.map(label_map)).fillna(titled.map(label_map))
+
+        resolved = pd.DataFrame({"id": companies["id"], "wikidata_qid": qid}).dropna()
+        attrs = await self.attributes(resolved["wikidata_qid"].tolist())
+        joined = resolved.merge(attrs, how="left", left_on="wikidata_qid", right_index=True)
+        self.cache.save()
+        self.stats.enriched += len(joined)
+        self.stats.seconds += time.perf_counter() - start
+        out = nodes.drop(columns=[c for c in ATTRIBUTES if c in nodes.columns])
+        return out.merge(joined, how="left", on="id")
+
+
+async def enrich_nodes(nodes, enricher=None):
+    """
+    Add Wikidata attributes to node dicts (the ingest JSON shape) in place;
+    returns (nodes, EnrichmentStats).
+    """
+    enricher = enricher or WikidataEnricher()
+    if not nodes:
+        return nodes, enricher.stats
+    frame = pd.DataFrame({"id": [n["id"] for n in nodes], "type": [n.get("type") for n in nodes],
+                          "name": [n.get("name") for n in nodes]})
+    enriched = await enricher.enrich_frame(frame)
+    found = enriched.dropna(subset=["wikidata_qid"]).set_index("id")[ATTRIBUTES]
+    by_id = {n["id"]: n for n in nodes}
+    for node_id, row in zip(found.index, found.to_dict("records")):
+        by_id[node_id].update({k: v for k, v in row.items() if pd.notna(v)})
+    return nodes, enricher.stats
+
+
+async def enrich_graph(G, enricher=None):
+    """Set Wikidata attributes on the company nodes of a NetworkX graph; returns EnrichmentStats."""
+    nodes = [{"id": n, "type": a.get("type"), "name": a.get("name")} for n, a in G.nodes(data=True)]
+    nodes, stats = await enrich_nodes(nodes, enricher)
+    for node in nodes:
+        extra = {k: node[k] for k in ATTRIBUTES if k in node}
+        if extra:
+            G.nodes[node["id"]].update(extra)
+    return stats
+
+
+def enrich_stage(records, batch_size=STAGE_BATCH_SIZE, enricher=None):
+    """
+    ingest_pipeline stage over (kind, record) pairs: company nodes are
+    enriched `batch_size` at a time, everything else passes straight through.
+    """
+    # Runs on its own event loop; the default client gets a SharedHttpClient
+    # of its own since the module-level one is bound to the loop that first used it
+    loop = asyncio.new_event_loop()
+    client = None
+    if enricher is None:
+        client = SharedHttpClient()
+        enricher = WikidataEnricher(WikidataService(client))
+    batch = []
+    try:
+        for kind, record in records:
+            if kind == "node" and record.get("type") in COMPANY_TYPES:
+                batch.append(record)
+                if len(batch) < batch_size:
+                    continue
+                loop.run_until_complete(enrich_nodes(batch, enricher))
+                for node in batch:
+                    yield "node", node
+                batch = []
+            else:
+                yield kind, record
+        if batch:
+            loop.run_until_complete(enrich_nodes(batch, enricher))
+            for node in batch:
+                yield "node", node
+    finally:
+        if client is not None:
+            loop.run_until_complete(client.close())
+        loop.close()
@@ -1,12 +1,22 @@
 # Service for Wikidata integration (SPARQL queries)
-import httpx
+from app.services.http_client import http_client
 
 WIKIDATA_SPARQL_URL = "https://query.wikidata.org/sparql"
+# Longer queries (large VALUES blocks) are POSTed to stay clear of URL length limits
+MAX_GET_QUERY_LENGTH = 2000
 
 class WikidataService:
-    async def query(self, sparql_query: str):
+    def __init__(self, client=None):
+        self.client = client or http_client
+
+    async def query(self, sparql_query: str, timeout=None):
         headers = {"Accept": "application/sparql-results+json"}
-        async with httpx.AsyncClient() as client:
-            response = await client.get(WIKIDATA_SPARQL_URL, params={"query": sparql_query}, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        kwargs = {"headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        if len(sparql_query) > MAX_GET_QUERY_LENGTH:
+            response = await self.client.post(WIKIDATA_SPARQL_URL, data={"query": sparql_query}, **kwargs)
+        else:
+            response = await self.client.get(WIKIDATA_SPARQL_URL, params={"query": sparql_query}, **kwargs)
+        response.raise_for_status()
+        return response.json()
@@ -1,3 +1,21 @@
+import os
+
+from app import analytics_engine
 from app.services.graph_builder import GraphBuilder
+from app.services.graph_cache import graph_cache
+from app.services.ingest_orchestrator import IngestOrchestrator
 
 graph_builder = GraphBuilder()
+ingest_orchestrator = IngestOrchestrator(graph_builder)
+
+
+def ingested_files():
+    """(nodes file, edges file) written by ingest_usaspending.py, overridable with NODES_FILE / EDGES_FILE."""
+    here = os.path.dirname(__file__)
+    return (os.getenv("NODES_FILE", os.path.join(here, "usaspending_nodes.json")),
+            os.getenv("EDGES_FILE", os.path.join(here, "usaspending_edges.json")))
+
+
+def get_cached_graph(nodes_file, edges_file):
+    """Graph for the ingested files, shared across requests until the files change."""
+    return graph_cache.get(nodes_file, edges_file, analytics_engine.load_graph)
@@ -2,10 +2,13 @@
 Sync NetworkX Graph to Neo4j
 Loads nodes and edges from JSON and writes them to Neo4j for persistence and advanced queries.
 """
-import json
-import networkx as nx
-from neo4j import GraphDatabase
+import asyncio
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services import streaming_loader, neo4j_bulk, neo4j_diff
+from app.services.neo4j_pool import Neo4jPool
 
 NODES_FILE = "usaspending_nodes.json"
 EDGES_FILE = "usaspending_edges.json"
@@ -23,44 +26,50 @@ if not NEO4J_PASSWORD or NEO4J_PASSWORD == "password":
 
 
 def build_graph(nodes_path=NODES_FILE, edges_path=EDGES_FILE):
-    G = nx.DiGraph()
-    with open(nodes_path) as f:
-        nodes = json.load(f)
-        for node in nodes:
-            node_id = node.pop("id")
-            G.add_node(node_id, **node)
-    with open(edges_path) as f:
-        edges = json.load(f)
-        for edge in edges:
-            src = edge.pop("source")
-            tgt = edge.pop("target")
-            G.add_edge(src, tgt, **edge)
-    return G
+    return streaming_loader.load_networkx(nodes_path, edges_path, validate=False)
+
+
+NEO4J_SYNC_STATE = os.getenv("NEO4J_SYNC_STATE", "neo4j_sync_state.json")
+
+
+async def sync_graph_async(G, pool=None, batch_size=None, mode="diff", state_path=None):
+    """
+    Write G to Neo4j with the batched UNWIND loader and return its LoadStats.
+
+    mode="diff" applies only the nodes/edges created, changed or deleted
+    since the last successful sync (content hashes kept at `state_path`),
+    so the database stays queryable; stats.diff has the counts.
+    mode="full" clears the database and rewrites everything.
+
+    The app passes the shared neo4j_pool; without one a pool is opened for
+    this call and closed afterwards.
+    """
+    batch_size = batch_size or int(os.getenv("NEO4J_BATCH_SIZE", neo4j_bulk.DEFAULT_BATCH_SIZE))
+    state_path = state_path or NEO4J_SYNC_STATE
+    if mode not in ("diff", "full"):
+        raise ValueError(f"Unknown sync mode {mode!r}")
+    owned = pool is None
+    pool = pool or Neo4jPool(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    try:
+        loader = neo4j_bulk.BulkLoader(pool, batch_size=batch_size)
+        if mode == "diff":
+            return await neo4j_diff.sync_graph(loader, G, state_path)
+        stats = await loader.load_graph(G, clear=True)
+        await asyncio.to_thread(lambda: neo4j_diff.SyncState.from_graph(G).save(state_path))
+        return stats
+    finally:
+        if owned:
+            await pool.close()
+
 
-def sync_to_neo4j(G):
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    with driver.session() as session:
-        # Clear existing data
-        session.run("MATCH (n) DETACH DELETE n")
-        # Create nodes
-        for node, attrs in G.nodes(data=True):
-            label = attrs.get("type", "Entity")
-            props = {k: v for k, v in attrs.items() if v is not None}
-            props_str = ", ".join(f"{k}: ${k}" for k in props)
-            cypher = f"MERGE (n:{label} {{id: $id}}) SET n += {{{props_str}}}"
-            session.run(cypher, id=node, **props)
-        # Create edges
-        for src, tgt, attrs in G.edges(data=True):
-            rel = attrs.get("type", "CONNECTED")
-            props = {k: v for k, v in attrs.items() if v is not None and k != "type"}
-            props_str = ", ".join(f"r.{k} = ${k}" for k in props)
-            cypher = f"MATCH (a {{id: $src}}), (b {{id: $tgt}}) MERGE (a)-[r:{rel}]->(b)"
-            if props:
-                cypher += f" SET {props_str}"
-            session.run(cypher, src=src, tgt=tgt, **props)
-    driver.close()
+def sync_to_neo4j(G, batch_size=None, mode="diff", state_path=None):
+    """Blocking entry point for scripts; see sync_graph_async."""
+    return asyncio.run(sync_graph_async(G, None, batch_size, mode, state_path))
 
 if __name__ == "__main__":
     G = build_graph()
-    sync_to_neo4j(G)
-    print(f"Synced {G.number_of_nodes()} nodes and {G.number_of_edges()} edges to Neo4j.")
+    stats = sync_to_neo4j(G, mode="full" if "--full" in sys.argv else "diff")
+    print(f"Wrote {stats.nodes} node rows and {stats.edges} edge rows to Neo4j in {stats.batches} batches "
+          f"({stats.seconds:.2f}s, {stats.rows_per_sec:.0f} rows/s).")
+    if stats.diff:
+        print(f"Diff: {stats.diff}")
@@ -1,8 +1,14 @@
 from fastapi.testclient import TestClient
+import json
 import sys
 import os
+import networkx as nx
+import pytest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 from app.app import app
+from app.models.ingestion import MAX_ENRICH_SYMBOLS
+from app.routers import analytics as analytics_router, graph as graph_router
+from app.services.graph_builder import GraphBuilder
 
 client = TestClient(app)
 API_KEY = os.getenv("API_KEY")
@@ -34,6 +40,31 @@ def test_analytics_with_api_key():
     resp = client.get("/analytics/centrality", headers={"X-API-Key": API_KEY})
     assert resp.status_code in (200, 400)  # 400 if graph is empty
 
+def test_analytics_sampled_betweenness(monkeypatch):
+    # A graph of its own, so the shared one used by the other tests is untouched
+    builder = GraphBuilder()
+    monkeypatch.setattr(graph_router, "graph_builder", builder)
+    monkeypatch.setattr(analytics_router, "graph_builder", builder)
+    # Strongly connected and aperiodic, so the eigenvector iteration converges
+    nodes = [{"id": n, "type": "company", "name": n} for n in "ABCD"]
+    pairs = [("A", "B"), ("B", "C"), ("C", "A"), ("A", "C"), ("C", "D"), ("D", "A")]
+    edges = [{"source": u, "target": v, "value": 1.0} for u, v in pairs]
+    assert client.post("/graph/build", json={"nodes": nodes, "edges": edges}).status_code == 200
+    resp = client.get("/analytics/centrality?betweenness_mode=approximate&k=2", headers={"X-API-Key": API_KEY})
+    assert resp.status_code == 200
+    info = resp.json()["betweenness_info"]
+    assert (info["mode"], info["pivots"], info["num_nodes"], info["exact"]) == ("approximate", 2, 4, False)
+    assert info["error_bound"] > 0 and info["confidence"] == 0.9
+    resp = client.get("/analytics/centrality", headers={"X-API-Key": API_KEY})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["betweenness_info"]["exact"] and body["betweenness_info"]["pivots"] == 4
+    assert body["betweenness_info"]["error_bound"] == 0.0
+    expected = nx.betweenness_centrality(nx.DiGraph(pairs))
+    assert body["betweenness_centrality"] == pytest.approx(expected)
+    resp = client.get("/analytics/centrality?betweenness_mode=budget", headers={"X-API-Key": API_KEY})
+    assert resp.status_code == 422
+
 def test_risk_requires_api_key():
     resp = client.get("/risk/node_removal/A")
     assert resp.status_code == 401
@@ -48,6 +79,11 @@ def test_ingest_and_graph_build():
     assert resp.json()["num_nodes"] == 1
     assert resp.json()["num_edges"] == 1
 
+def test_enrich_companies_batch_is_capped():
+    symbols = [f"S{i}" for i in range(MAX_ENRICH_SYMBOLS + 1)]
+    resp = client.post("/ingest/companies", json={"symbols": symbols})
+    assert resp.status_code == 422
+
 # 4. Analytics
 def test_node_metrics_with_api_key():
     # Build graph first
@@ -58,6 +94,28 @@ def test_node_metrics_with_api_key():
     assert resp.status_code == 200
     assert "degree" in resp.json()
 
+def test_analytics_metrics_from_ingested_files(tmp_path, monkeypatch):
+    nodes = [{"id": "G", "type": "funding_agency", "name": "Agency"},
+             {"id": "P", "type": "prime_contractor", "name": "Prime"},
+             {"id": "S1", "type": "supplier", "name": "Sub 1"},
+             {"id": "S2", "type": "supplier", "name": "Sub 2"}]
+    edges = [{"source": "G", "target": "P", "type": "prime_contract", "value": 10.0},
+             {"source": "P", "target": "S1", "type": "subcontract", "value": 2.0},
+             {"source": "P", "target": "S2", "type": "subcontract", "value": 1.0}]
+    for name, records in (("nodes.json", nodes), ("edges.json", edges)):
+        (tmp_path / name).write_text(json.dumps(records))
+    monkeypatch.setenv("NODES_FILE", str(tmp_path / "nodes.json"))
+    monkeypatch.setenv("EDGES_FILE", str(tmp_path / "edges.json"))
+    assert client.get("/analytics/metrics").status_code == 401
+    resp = client.get("/analytics/metrics?node_type=supplier&fields=id,type",
+                      headers={"X-API-Key": API_KEY})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["summary"] == {"total_nodes": 2, "page": 1, "page_size": 50, "total_pages": 1}
+    assert sorted(n["id"] for n in body["nodes"]) == ["S1", "S2"]
+    assert all(set(n) == {"id", "type"} for n in body["nodes"])
+    assert client.get("/analytics/metrics?sort_by=bogus", headers={"X-API-Key": API_KEY}).status_code == 422
+
 # 5. Risk Simulation
 def test_risk_node_removal_with_api_key():
     # Build graph first
@@ -68,6 +126,35 @@ def test_risk_node_removal_with_api_key():
     assert resp.status_code == 200
     assert "impact" in resp.json()
 
+def test_risk_criticality_with_api_key():
+    nodes = [{"id": "G", "type": "funding_agency", "name": "Agency"},
+             {"id": "P", "type": "prime_contractor", "name": "Prime"},
+             {"id": "S", "type": "sub_contractor", "name": "Sub"}]
+    edges = [{"source": "G", "target": "P", "value": 10.0}, {"source": "P", "target": "S", "value": 2.0}]
+    client.post("/graph/build", json={"nodes": nodes, "edges": edges})
+    resp = client.get("/risk/criticality?top_k=2&include_nodes=true", headers={"X-API-Key": API_KEY})
+    assert resp.status_code == 200
+    ranked = resp.json()["nodes"]
+    assert [r["id"] for r in ranked] == ["G", "P"]
+    assert ranked[1]["dominated_nodes"] == ["S"]
+
+def test_risk_simulate_with_api_key():
+    nodes = [{"id": "G", "type": "funding_agency", "name": "Agency"},
+             {"id": "P", "type": "prime_contractor", "name": "Prime"}]
+    edges = [{"source": "G", "target": "P", "value": 10.0}]
+    client.post("/graph/build", json={"nodes": nodes, "edges": edges})
+    body = {"scenarios": 200, "seed": 3, "workers": 1, "probabilities": {"P": 0.5}}
+    resp = client.post("/risk/simulate", json=body, headers={"X-API-Key": API_KEY})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["scenarios"] == 200
+    assert data["contributions"][0]["id"] == "P"
+    assert 0 < data["lost_value"]["mean"] <= 10.0
+    body["probabilities"] = {"P": 1.5}
+    assert client.post("/risk/simulate", json=body, headers={"X-API-Key": API_KEY}).status_code == 422
+    body["probabilities"], body["seed"] = {"P": 0.5}, -1
+    assert client.post("/risk/simulate", json=body, headers={"X-API-Key": API_KEY}).status_code == 422
+
 # 6. Data Endpoints
 def test_nodes_listing():
     resp = client.get("/nodes/")
@@ -79,6 +166,27 @@ def test_edges_listing():
     assert resp.status_code == 200
     assert "edges" in resp.json()
 
+def test_nodes_and_edges_share_graph():
+    client.post("/graph/build", json={"nodes": [{"id": "A", "type": "agency", "name": "AgencyA"}],
+                                      "edges": [{"source": "A", "target": "A"}]})
+    assert client.get("/nodes/A").json()["id"] == "A"
+    assert client.get("/edges/A/A").json()["source"] == "A"
+
+def test_nodes_cursor_pagination():
+    nodes = [{"id": f"P{i}", "type": "page_test", "name": f"P{i}"} for i in range(5)]
+    client.post("/graph/build", json={"nodes": nodes, "edges": []})
+    seen, cursor = [], None
+    while True:
+        params = {"type": "page_test", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/nodes/", params=params).json()
+        assert body["total"] == 5
+        seen += [n["id"] for n in body["nodes"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"P{i}" for i in range(5)]
+    assert client.get("/nodes/", params={"cursor": "bogus"}).status_code == 400
+
 # 7. Error Handling
 def test_invalid_endpoint():
     resp = client.get("/not-an-endpoint")
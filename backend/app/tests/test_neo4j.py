@@ -21,3 +21,23 @@ def test_neo4j_persist_and_query():
     # (Optional) Query Neo4j directly if testcontainers or a test DB is available
     # Here, just check the response
     assert "successfully" in resp.json()["message"]
+
+
+def test_neo4j_refresh_modes():
+    resp = client.post("/neo4j/refresh?mode=full")
+    assert resp.status_code == 200
+    assert resp.json()["stats"]["nodes"] > 0
+    # Nothing changed since the full write
+    resp = client.post("/neo4j/refresh")
+    assert resp.status_code == 200
+    assert resp.json()["mode"] == "diff"
+    assert client.post("/neo4j/refresh?mode=partial").status_code == 422
+
+
+def test_neo4j_consistency_check_after_refresh():
+    assert client.post("/neo4j/refresh?mode=full").status_code == 200
+    resp = client.get("/neo4j/consistency-check?max_rows=10")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["in_sync"]
+    assert body["networkx"] == body["neo4j"]
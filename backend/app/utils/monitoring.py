@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from fastapi import APIRouter, Response
 import time
 
@@ -25,3 +25,42 @@ def track_metrics(app):
         REQUEST_COUNT.labels(request.method, endpoint, response.status_code).inc()
         REQUEST_LATENCY.labels(endpoint).observe(process_time)
         return response
+
+# Graph cache metrics (see app/services/graph_cache.py); "kind" is "graph"
+# for the graph itself or the name of a derived result such as "analytics"
+GRAPH_CACHE_HITS = Counter(
+    "graph_cache_hits_total", "Graph cache hits", ["kind"]
+)
+GRAPH_CACHE_MISSES = Counter(
+    "graph_cache_misses_total", "Graph cache misses (builds started)", ["kind"]
+)
+GRAPH_CACHE_COALESCED = Counter(
+    "graph_cache_coalesced_total", "Lookups that waited on a build already in flight", ["kind"]
+)
+GRAPH_CACHE_BUILD_SECONDS = Histogram(
+    "graph_cache_build_seconds", "Time spent building cached graphs and derived results", ["kind"]
+)
+
+# Neo4j pool metrics (see app/services/neo4j_pool.py); "mode" is read,
+# write or auto (auto-commit session.run)
+NEO4J_QUERY_LATENCY = Histogram(
+    "neo4j_query_latency_seconds", "Neo4j query / transaction latency", ["mode"]
+)
+NEO4J_QUERY_ERRORS = Counter(
+    "neo4j_query_errors_total", "Neo4j queries / transactions that raised", ["mode"]
+)
+NEO4J_POOL_IN_USE = Gauge(
+    "neo4j_pool_sessions_in_use", "Sessions currently holding a pooled Neo4j connection"
+)
+NEO4J_POOL_MAX_SIZE = Gauge(
+    "neo4j_pool_max_size", "Configured maximum Neo4j connection pool size"
+)
+
+# External HTTP response cache (see app/services/http_cache.py); "result" is
+# hit, miss, revalidated (304 from origin), offline_hit or offline_miss
+HTTP_CACHE_REQUESTS = Counter(
+    "http_cache_requests_total", "Cacheable outbound HTTP requests", ["source", "result"]
+)
+HTTP_CACHE_EVICTIONS = Counter(
+    "http_cache_evictions_total", "HTTP cache entries evicted to stay under the disk budget"
+)
@@ -0,0 +1,52 @@
+"""
+Benchmark: one networkx BFS per failure scenario vs. batched sparse
+propagation, single process and across a process pool.
+
+Usage: python benchmarks/bench_disruption_sim.py [num_edges] [scenarios] [workers]
+"""
+import os
+import sys
+import time
+import numpy as np
+import networkx as nx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+from bench_sparse_analytics import synthetic_supply_chain
+from app.services.disruption_sim import DisruptionModel, simulate
+
+
+def bfs_scenarios(G, sources, p, scenarios, seed=0):
+    rng = np.random.default_rng(seed)
+    nodes = list(G)
+    losses = []
+    for _ in range(scenarios):
+        failed = {nodes[i] for i in np.flatnonzero(rng.random(len(nodes)) < p)} - set(sources)
+        H = G.subgraph(n for n in G if n not in failed)
+        reached = set(sources).union(*(nx.descendants(H, s) for s in sources))
+        losses.append(len(G) - len(reached))
+    return losses
+
+
+def main():
+    num_edges = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    scenarios = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    G = synthetic_supply_chain(num_edges)
+    sources = [n for n in G if G.in_degree(n) == 0][:10]
+    p = np.full(len(G), 0.01)
+    model = DisruptionModel.from_networkx(G, p, sources=sources)
+
+    baseline_n = min(scenarios, 50)
+    start = time.perf_counter()
+    bfs_scenarios(G, sources, p, baseline_n)
+    per_bfs = (time.perf_counter() - start) / baseline_n
+    print(f"{G.number_of_edges()} edges, {len(G)} nodes, {len(sources)} sources, {scenarios} scenarios")
+    print(f"{'networkx BFS (extrapolated)':<30}{per_bfs * scenarios:>10.2f}s")
+    for label, w in (("batched, 1 process", 1), (f"batched, {workers} processes", workers)):
+        result = simulate(model, scenarios=scenarios, seed=0, workers=w)
+        print(f"{label:<30}{result.elapsed:>10.2f}s  ({result.num_scenarios / result.elapsed:,.0f} scenarios/s)")
+
+
+if __name__ == "__main__":
+    main()
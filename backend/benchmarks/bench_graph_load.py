@@ -0,0 +1,79 @@
+"""
+Benchmark: JSON graph load vs. memory-mapped snapshot load.
+Each mode runs in a fresh subprocess so peak RSS is measured in isolation.
+
+Usage: python benchmarks/bench_graph_load.py [nodes.json] [edges.json]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "app"))
+
+DEFAULT_NODES = os.path.join(BACKEND_DIR, "app", "usaspending_nodes.json")
+DEFAULT_EDGES = os.path.join(BACKEND_DIR, "app", "usaspending_edges.json")
+MODES = ["baseline", "json", "snapshot", "snapshot+networkx"]
+
+
+def peak_rss_mb():
+    # ru_maxrss survives execve on Linux, so it would report the parent's
+    # peak; VmHWM belongs to this process image only.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, nodes_path, edges_path):
+    import analytics_engine
+    from app.services import graph_snapshot
+    snapshot_path = graph_snapshot.default_snapshot_path(nodes_path)
+    start = time.perf_counter()
+    if mode == "json":
+        G = analytics_engine.build_graph(nodes_path, edges_path)
+        size = (G.number_of_nodes(), G.number_of_edges())
+    elif mode == "snapshot":
+        snap = graph_snapshot.GraphSnapshot.load(snapshot_path)
+        # Touch the adjacency so the pages are actually read
+        size = (snap.num_nodes, int(snap.out_degree().sum()))
+    elif mode == "snapshot+networkx":
+        G = graph_snapshot.GraphSnapshot.load(snapshot_path).to_networkx()
+        size = (G.number_of_nodes(), G.number_of_edges())
+    else:
+        size = (0, 0)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"mode": mode, "seconds": elapsed, "peak_rss_mb": peak_rss_mb(),
+                      "nodes": size[0], "edges": size[1]}))
+
+
+def main():
+    nodes_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_NODES
+    edges_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_EDGES
+    import analytics_engine
+    analytics_engine.load_snapshot(nodes_path, edges_path)
+    print(f"{'mode':<20}{'load (ms)':>12}{'peak RSS (MB)':>16}{'nodes':>10}{'edges':>10}")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, nodes_path, edges_path],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        r = json.loads(out)
+        print(f"{r['mode']:<20}{r['seconds'] * 1000:>12.1f}{r['peak_rss_mb']:>16.1f}"
+              f"{r['nodes']:>10}{r['edges']:>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        args = sys.argv[3:]
+        run_mode(sys.argv[2], *(args or [DEFAULT_NODES, DEFAULT_EDGES]))
+    else:
+        main()
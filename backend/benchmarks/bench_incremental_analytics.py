@@ -0,0 +1,49 @@
+"""
+Benchmark: analytics after a small /graph/update delta, recomputed from
+scratch with networkx vs. refreshed incrementally (warm-started).
+
+Usage: python benchmarks/bench_incremental_analytics.py [num_edges] [delta_edges]
+"""
+import os
+import sys
+import time
+import networkx as nx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+from bench_sparse_analytics import synthetic_supply_chain
+from app.services.graph_builder import GraphBuilder
+from app.models.ingestion import NodeModel, EdgeModel
+
+
+def main():
+    num_edges = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    delta = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    G = synthetic_supply_chain(num_edges)
+    builder = GraphBuilder()
+    builder.add_nodes([NodeModel(id=str(n), type="supplier", name=str(n)) for n in G])
+    builder.add_edges([EdgeModel(source=str(u), target=str(v), value=d["value"])
+                       for u, v, d in G.edges(data=True)])
+    start = time.perf_counter()
+    first = builder.analytics.refresh()
+    print(f"{G.number_of_edges()} edges, {len(G)} nodes; initial full refresh {time.perf_counter() - start:.3f}s")
+
+    n = len(G)
+    builder.add_edges([EdgeModel(source=str(i), target=str((i * 7919) % n)) for i in range(delta)])
+    start = time.perf_counter()
+    nx.degree_centrality(builder.graph)
+    nx.eigenvector_centrality(builder.graph, max_iter=1000)
+    nx.pagerank(builder.graph)
+    try:
+        nx.hits(builder.graph, max_iter=1000)
+    except nx.PowerIterationFailedConvergence:
+        pass
+    full_s = time.perf_counter() - start
+    warm = builder.analytics.refresh()
+    print(f"{'networkx from scratch':<24}{full_s:>10.3f}s")
+    print(f"{'incremental (' + warm['mode'] + ')':<24}{warm['seconds']:>10.3f}s  "
+          f"iterations {warm['iterations']} (cold: {first['iterations']})")
+
+
+if __name__ == "__main__":
+    main()
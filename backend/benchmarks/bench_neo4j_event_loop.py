@@ -0,0 +1,61 @@
+"""
+Benchmark: latency of a non-Neo4j endpoint while 50 concurrent
+/neo4j/persist requests run against a local Neo4j on the shared pool.
+With the async driver the p99 of GET /metrics should stay close to its
+idle value instead of queueing behind blocking Cypher calls.
+
+    NEO4J_URI=bolt://localhost:7687 NEO4J_USER=bench NEO4J_PASSWORD=benchpass \\
+    API_KEY=x FINNHUB_API_KEY=k FINNHUB_SECRET=s python benchmarks/bench_neo4j_event_loop.py
+"""
+import asyncio
+import os
+import sys
+import time
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.app import app
+from app.services.neo4j_pool import neo4j_pool
+
+CONCURRENCY = 50
+
+
+async def probe(client, samples, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/metrics")
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+
+async def persist(client, i):
+    nodes = [{"id": f"bench-{i}-{j}", "type": "supplier", "name": f"S{j}"} for j in range(20)]
+    edges = [{"source": f"bench-{i}-{j}", "target": f"bench-{i}-{j + 1}", "value": float(j)} for j in range(19)]
+    await client.post("/neo4j/persist", json={"nodes": nodes, "edges": edges})
+
+
+async def measure(client, load):
+    samples, stop = [], asyncio.Event()
+    task = asyncio.create_task(probe(client, samples, stop))
+    if load:
+        await asyncio.gather(*(persist(client, i) for i in range(CONCURRENCY)))
+    else:
+        await asyncio.sleep(2)
+    stop.set()
+    await task
+    return np.percentile(samples, 50) * 1e3, np.percentile(samples, 99) * 1e3
+
+
+async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        idle = await measure(client, load=False)
+        busy = await measure(client, load=True)
+    await neo4j_pool.close()
+    print(f"{'GET /metrics idle':<32}p50 {idle[0]:7.2f}ms  p99 {idle[1]:7.2f}ms")
+    print(f"{f'with {CONCURRENCY} concurrent persists':<32}p50 {busy[0]:7.2f}ms  p99 {busy[1]:7.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""
+Benchmark: per-row Neo4j sync (one session.run per node/edge, label-less
+edge MATCH) vs. the batched UNWIND BulkLoader, against a local Neo4j.
+
+    docker run -d -p 7687:7687 -e NEO4J_AUTH=bench/benchpass neo4j:5
+    NEO4J_URI=bolt://localhost:7687 NEO4J_USER=bench NEO4J_PASSWORD=benchpass \\
+        python benchmarks/bench_neo4j_sync.py [num_edges] [batch_size]
+
+The database is wiped between runs.
+"""
+import asyncio
+import os
+import sys
+import time
+from neo4j import GraphDatabase
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+from bench_sparse_analytics import synthetic_supply_chain
+from app.services.neo4j_bulk import BulkLoader
+from app.services.neo4j_pool import Neo4jPool
+
+
+def per_row_sync(driver, G):
+    """The previous sync_to_neo4j loop, kept here as the baseline."""
+    with driver.session() as session:
+        for node, attrs in G.nodes(data=True):
+            label = attrs.get("type", "Entity")
+            props = {k: v for k, v in attrs.items() if v is not None}
+            props_str = ", ".join(f"{k}: ${k}" for k in props)
+            session.run(f"MERGE (n:{label} {{id: $id}}) SET n += {{{props_str}}}", id=node, **props)
+        for src, tgt, attrs in G.edges(data=True):
+            rel = attrs.get("type", "CONNECTED")
+            props = {k: v for k, v in attrs.items() if v is not None and k != "type"}
+            props_str = ", ".join(f"r.{k} = ${k}" for k in props)
+            cypher = f"MATCH (a {{id: $src}}), (b {{id: $tgt}}) MERGE (a)-[r:{rel}]->(b)"
+            if props:
+                cypher += f" SET {props_str}"
+            session.run(cypher, src=src, tgt=tgt, **props)
+
+
+def main():
+    num_edges = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    G = synthetic_supply_chain(num_edges)
+    G = G.__class__((str(u), str(v), {"type": "subcontract", "value": float(d["value"])})
+                    for u, v, d in G.edges(data=True))
+    for n in G:
+        G.nodes[n].update(type="supplier", name=f"Supplier {n}")
+    rows = G.number_of_nodes() + G.number_of_edges()
+    driver = GraphDatabase.driver(os.environ["NEO4J_URI"],
+                                  auth=(os.environ["NEO4J_USER"], os.environ["NEO4J_PASSWORD"]))
+
+    async def bulk(clear_only=False):
+        pool = Neo4jPool()
+        loader = BulkLoader(pool, batch_size=batch_size)
+        try:
+            await loader.clear()
+            return None if clear_only else await loader.load_graph(G)
+        finally:
+            await pool.close()
+
+    try:
+        asyncio.run(bulk(clear_only=True))
+        start = time.perf_counter()
+        per_row_sync(driver, G)
+        per_row_s = time.perf_counter() - start
+        stats = asyncio.run(bulk())
+    finally:
+        driver.close()
+    print(f"{G.number_of_edges()} edges, {len(G)} nodes, batch size {batch_size}")
+    print(f"{'per-row session.run':<24}{per_row_s:>10.2f}s {rows / per_row_s:>12.0f} rows/s")
+    print(f"{'UNWIND bulk loader':<24}{stats.seconds:>10.2f}s {stats.rows_per_sec:>12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
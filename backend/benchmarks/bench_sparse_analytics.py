@@ -0,0 +1,86 @@
+"""
+Benchmark: per-call networkx centrality vs. the shared sparse engine.
+
+Synthetic supply-chain graphs (agencies -> primes -> tiered suppliers) at
+10k/100k/1M edges. The baseline is what compute_analytics used to run:
+nx.degree_centrality, nx.eigenvector_centrality_numpy and HITS (nx.hits;
+nx.hits_numpy is gone from networkx 3.x and went dense anyway).
+
+Usage: python benchmarks/bench_sparse_analytics.py [--sizes 10000,100000,1000000]
+                                                   [--max-baseline-edges 100000]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import networkx as nx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.sparse_analytics import SparseAnalyticsEngine
+
+
+def synthetic_supply_chain(num_edges, seed=0):
+    rng = np.random.default_rng(seed)
+    num_nodes = max(num_edges // 8, 10)
+    agencies = max(num_nodes // 1000, 1)
+    primes = max(num_nodes // 50, 2)
+    src = np.empty(num_edges, dtype=np.int64)
+    tgt = np.empty(num_edges, dtype=np.int64)
+    n_prime_edges = primes
+    src[:n_prime_edges] = rng.integers(0, agencies, n_prime_edges)
+    tgt[:n_prime_edges] = np.arange(agencies, agencies + primes)
+    rest = num_edges - n_prime_edges
+    # Tiered suppliers: edges only go "downstream" so the graph stays a DAG
+    src[n_prime_edges:] = rng.integers(agencies, num_nodes - 1, rest)
+    span = num_nodes - src[n_prime_edges:] - 1
+    tgt[n_prime_edges:] = src[n_prime_edges:] + 1 + (rng.random(rest) * span).astype(np.int64)
+    values = rng.lognormal(12, 2, num_edges)
+    G = nx.DiGraph()
+    G.add_nodes_from(range(num_nodes))
+    G.add_weighted_edges_from(zip(src.tolist(), tgt.tolist(), values.tolist()), weight="value")
+    return G
+
+
+def baseline(G):
+    nx.degree_centrality(G)
+    try:
+        nx.eigenvector_centrality_numpy(G)
+    except Exception:
+        pass
+    try:
+        nx.hits(G)
+    except nx.PowerIterationFailedConvergence:
+        pass
+
+
+def sparse(G):
+    engine = SparseAnalyticsEngine.from_networkx(G)
+    engine.compute(weighted=True)
+
+
+def timed(fn, G):
+    start = time.perf_counter()
+    fn(G)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--max-baseline-edges", type=int, default=100000)
+    args = parser.parse_args()
+    print(f"{'edges':>10}{'nodes':>10}{'networkx (s)':>15}{'sparse (s)':>13}{'speedup':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        G = synthetic_supply_chain(size)
+        sparse_s = timed(sparse, G)
+        if G.number_of_edges() <= args.max_baseline_edges:
+            base_s = timed(baseline, G)
+            base_txt, speedup = f"{base_s:.3f}", f"{base_s / sparse_s:.1f}x"
+        else:
+            base_txt, speedup = "skipped", "-"
+        print(f"{G.number_of_edges():>10}{G.number_of_nodes():>10}{base_txt:>15}{sparse_s:>13.3f}{speedup:>10}")
+
+
+if __name__ == "__main__":
+    main()
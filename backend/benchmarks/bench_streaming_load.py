@@ -0,0 +1,87 @@
+"""
+Benchmark: whole-file json.load vs. the streaming loader.
+Writes a synthetic edges file (JSON array and gzip NDJSON) and measures
+load time and peak RSS of each path in its own subprocess.
+
+Usage: python benchmarks/bench_streaming_load.py [num_edges] [batch_size]
+"""
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+from bench_graph_load import peak_rss_mb
+
+MODES = ["json.load", "stream-json", "stream-ndjson.gz", "stream-edge-store"]
+
+
+def write_inputs(tmp, num_edges):
+    num_nodes = max(num_edges // 10, 2)
+    nodes = [{"id": f"supplier:{i}", "type": "supplier", "name": f"Supplier {i}"} for i in range(num_nodes)]
+    edges = [{"source": f"supplier:{i % 97}", "target": f"supplier:{(i * 7919) % num_nodes}",
+              "type": "subcontract", "value": float(i % 10000), "subaward_id": f"S{i}"}
+             for i in range(num_edges)]
+    paths = {"nodes": os.path.join(tmp, "nodes.json"), "edges": os.path.join(tmp, "edges.json"),
+             "edges_ndjson": os.path.join(tmp, "edges.ndjson.gz")}
+    with open(paths["nodes"], "w") as f:
+        json.dump(nodes, f, indent=2)
+    with open(paths["edges"], "w") as f:
+        json.dump(edges, f, indent=2)
+    with gzip.open(paths["edges_ndjson"], "wt") as f:
+        for e in edges:
+            f.write(json.dumps(e) + "\n")
+    return paths
+
+
+def run_mode(mode, nodes_path, edges_path, ndjson_path, batch_size):
+    from app.services import streaming_loader
+    import networkx as nx
+    start = time.perf_counter()
+    if mode == "json.load":
+        G = nx.DiGraph()
+        with open(nodes_path) as f:
+            for node in json.load(f):
+                G.add_node(node.pop("id"), **node)
+        with open(edges_path) as f:
+            for edge in json.load(f):
+                G.add_edge(edge.pop("source"), edge.pop("target"), **edge)
+        size = G.number_of_edges()
+    elif mode == "stream-json":
+        size = streaming_loader.load_networkx(nodes_path, edges_path, batch_size).number_of_edges()
+    elif mode == "stream-ndjson.gz":
+        size = streaming_loader.load_networkx(nodes_path, ndjson_path, batch_size).number_of_edges()
+    else:
+        size = len(streaming_loader.load_edge_store(ndjson_path, nodes_path, batch_size))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"mode": mode, "seconds": elapsed, "peak_rss_mb": peak_rss_mb(), "size": size}))
+
+
+def main():
+    num_edges = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    batch_size = sys.argv[2] if len(sys.argv) > 2 else "5000"
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_inputs(tmp, num_edges)
+        print(f"{num_edges} edge records, JSON file {os.path.getsize(paths['edges']) / 1e6:.1f} MB, "
+              f"batch size {batch_size}")
+        print(f"{'mode':<20}{'load (s)':>10}{'peak RSS (MB)':>16}{'edges':>10}")
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, paths["nodes"], paths["edges"],
+                 paths["edges_ndjson"], batch_size],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            r = json.loads(out)
+            print(f"{r['mode']:<20}{r['seconds']:>10.2f}{r['peak_rss_mb']:>16.1f}{r['size']:>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2], *sys.argv[3:6], int(sys.argv[6]))
+    else:
+        main()
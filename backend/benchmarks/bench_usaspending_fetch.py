@@ -0,0 +1,72 @@
+"""
+Benchmark: USAspending award + subaward fetch against a local stub server
+that replays spending_by_award responses with a fixed per-request latency.
+Compares one request at a time (the sequential ORM pattern) with the
+bounded-concurrency fetcher at a few limits.
+
+    python benchmarks/bench_usaspending_fetch.py
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.usaspending_fetcher import fetch_records
+
+LATENCY = 0.05
+FISCAL_YEARS = [2022, 2023]
+AGENCIES = ["Department of Defense", "National Aeronautics and Space Administration", "Department of Energy"]
+AWARDS = 200
+SUBAWARDS = 4
+PAGE_SIZE = 100
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(LATENCY)
+        filters, page = body["filters"], body["page"]
+        if body.get("subawards"):
+            key = filters["award_unique_id"]
+            rows = [{"Sub-Award ID": f"{key}-{j}", "Sub-Awardee Name": f"Supplier {hash(key) % 997 + j}",
+                     "Sub-Award Amount": 1000.0 * j, "Prime Award ID": key} for j in range(SUBAWARDS)]
+        else:
+            agency, fy = filters["agencies"][0]["name"], filters["time_period"][0]["end_date"][:4]
+            rows = [{"Award ID": f"{fy}-{agency}-{i}", "Recipient Name": f"Prime {i % 40}",
+                     "Recipient UEI": f"UEI{i % 40}", "Award Amount": 1e6 - i, "Awarding Agency": agency,
+                     "Awarding Sub Agency": f"{agency} Office", "Awarding Sub Agency Code": agency[:8],
+                     "generated_internal_id": f"CONT_{fy}_{agency}_{i}"} for i in range(AWARDS)]
+        start = (page - 1) * PAGE_SIZE
+        payload = json.dumps({"results": rows[start:start + PAGE_SIZE],
+                              "page_metadata": {"page": page, "hasNext": start + PAGE_SIZE < len(rows)}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"{len(FISCAL_YEARS)} fiscal years x {len(AGENCIES)} agencies x {AWARDS} awards, "
+          f"{LATENCY * 1e3:.0f}ms per request")
+    for concurrency in (1, 8, 32, 64):
+        nodes, edges, stats = asyncio.run(fetch_records(
+            FISCAL_YEARS, AGENCIES, AWARDS, base_url=base_url, concurrency=concurrency, rate=10_000))
+        print(f"concurrency {concurrency:<4}{stats.requests:6d} requests  {stats.seconds:7.2f}s  "
+              f"{stats.requests / stats.seconds:7.1f} req/s  ({len(nodes)} nodes, {len(edges)} edges)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+With HTTP_CACHE_DIR set, every requests.Session used by the suite (the
+USAspending ORM and sec-edgar-downloader scripts) goes through the on-disk
+HTTP cache: run once online to record, then with HTTP_CACHE_OFFLINE=1 to
+replay with no network.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+if os.getenv("HTTP_CACHE_DIR"):
+    from app.services.http_cache import HttpCache, install_requests_cache
+
+    install_requests_cache(HttpCache.from_env())
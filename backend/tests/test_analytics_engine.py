@@ -59,4 +59,4 @@ def test_compute_analytics():
     assert "eigenvector_centrality" in results
     assert "authority" in results
     assert "hub" in results
-    assert "A" in G.nodes and "risk_score" in G.nodes["A"]
+    assert "A" in results["risk_score"] and "A" in results["risk_forecast"]
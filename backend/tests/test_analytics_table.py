@@ -0,0 +1,58 @@
+import sys, os
+import networkx as nx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app import analytics_engine
+from app.services.analytics_table import AnalyticsTable, SORTABLE
+from app.services.sparse_analytics import SparseAnalyticsEngine
+
+
+def _table():
+    G = nx.DiGraph()
+    for i in range(40):
+        G.add_node(f"n{i}", type=("prime_contractor", "sub_contractor", "funding_agency")[i % 3], name=f"N{i}")
+    for i in range(40):
+        for j in (1, 3, 11):
+            if (i * j) % 5:
+                G.add_edge(f"n{i}", f"n{(i * j + j) % 40}", value=float(i + j))
+    engine = SparseAnalyticsEngine.from_networkx(G)
+    arrays, risk = analytics_engine.compute_analytics_tables(G, engine=engine)
+    return G, AnalyticsTable.from_results(G, engine.nodes, arrays, risk)
+
+
+def test_pages_match_filter_then_sort():
+    G, table = _table()
+    records = table.records(range(len(table)))
+    for metric in SORTABLE:
+        for node_type in (None, "sub_contractor", "missing"):
+            expected = [r["id"] for r in sorted(
+                (r for r in records if node_type is None or r["type"] == node_type),
+                key=lambda r: -r[metric])]
+            got = []
+            for offset in range(0, 40, 7):
+                rows, total = table.page(offset, 7, sort_by=metric, node_type=node_type)
+                got.extend(table.ids[r] for r in rows.tolist())
+            assert got == expected
+            assert total == len(expected)
+            asc = []
+            for offset in range(0, 40, 6):
+                rows, _ = table.page(offset, 6, sort_by=metric, node_type=node_type, ascending=True)
+                asc.extend(table.ids[r] for r in rows.tolist())
+            assert asc == expected[::-1]
+    rows, total = table.page(10, 5)
+    assert [table.ids[r] for r in rows.tolist()] == list(G)[10:15] and total == 40
+
+
+def test_records_and_top_k():
+    G, table = _table()
+    top = table.top_k("risk_score", 3, node_type="prime_contractor")
+    scores = table.columns["risk_score"]
+    assert scores[top].tolist() == sorted(scores[table.type_rows["prime_contractor"]], reverse=True)[:3]
+    (record,) = table.records(top[:1], ["id", "risk_score", "macro"])
+    assert set(record) == {"id", "risk_score", "macro"}
+    assert record["risk_score"] == pytest.approx(scores[top[0]])
+    assert G.nodes[record["id"]]["type"] == "prime_contractor"
+    with pytest.raises(ValueError):
+        table.records(top, ["id", "nope"])
+    with pytest.raises(ValueError):
+        table.rows(sort_by="name")
@@ -0,0 +1,62 @@
+import sys, os
+import pytest
+import networkx as nx
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services import betweenness
+from app.services.betweenness import betweenness_centrality, error_bound, pivots_for_error
+from app.services.process_pool import process_pool
+
+
+def _assert_close(result, expected, tol=1e-9):
+    got = result.to_dict()
+    assert got.keys() == expected.keys()
+    for node, value in expected.items():
+        assert got[node] == pytest.approx(value, abs=tol)
+
+
+@pytest.mark.parametrize("directed", [True, False])
+@pytest.mark.parametrize("normalized", [True, False])
+def test_exact_matches_networkx(directed, normalized):
+    G = nx.gnp_random_graph(120, 0.04, seed=4, directed=directed)
+    result = betweenness_centrality(G, normalized=normalized)
+    assert result.complete and result.info()["error_bound"] == 0.0
+    _assert_close(result, nx.betweenness_centrality(G, normalized=normalized))
+
+
+def test_exact_parallel_merges_partial_sums(monkeypatch):
+    monkeypatch.setattr(betweenness, "MIN_PARALLEL_NODES", 0)
+    G = nx.gnp_random_graph(150, 0.03, seed=9, directed=True)
+    try:
+        result = betweenness_centrality(G, workers=2)
+        assert result.pivots == 150
+        _assert_close(result, nx.betweenness_centrality(G))
+        # Later calls, on other graphs, reuse the same forkserver workers
+        executor = process_pool.executor
+        H = nx.gnp_random_graph(90, 0.05, seed=3, directed=True)
+        _assert_close(betweenness_centrality(H, workers=2), nx.betweenness_centrality(H))
+        assert process_pool.executor is executor
+    finally:
+        process_pool.shutdown()
+
+
+def test_approximate_within_reported_bound():
+    G = nx.gnp_random_graph(400, 0.01, seed=2, directed=True)
+    exact = nx.betweenness_centrality(G)
+    result = betweenness_centrality(G, "approximate", k=100, seed=7)
+    info = result.info()
+    assert info["pivots"] == 100 and not info["exact"]
+    assert info["error_bound"] == pytest.approx(error_bound(400, 100))
+    assert max(abs(result.to_dict()[v] - exact[v]) for v in G) <= info["error_bound"]
+    again = betweenness_centrality(G, "approximate", k=100, seed=7)
+    assert again.to_dict() == result.to_dict()
+
+
+def test_budget_mode_and_bounds():
+    G = nx.gnp_random_graph(300, 0.02, seed=1, directed=True)
+    result = betweenness_centrality(G, "budget", time_budget=1e-9)
+    assert 0 < result.pivots < 300
+    assert result.info()["error_bound"] > 0
+    k = pivots_for_error(10000, 0.05)
+    assert error_bound(10000, k) <= 0.05 < error_bound(10000, k - 1)
+    with pytest.raises(ValueError):
+        betweenness_centrality(G, "approximate")
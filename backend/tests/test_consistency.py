@@ -0,0 +1,83 @@
+import sys, os
+import asyncio
+from collections import defaultdict
+import networkx as nx
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services import consistency
+from app.services.consistency import GraphChecksums, check_consistency
+from app.services.neo4j_bulk import group_nodes, group_edges
+
+
+class _StampedDatabase:
+    """Answers the consistency queries from rows as the bulk loader would have written them."""
+
+    def __init__(self, G):
+        self.nodes = {r["id"]: dict(r["props"]) for rows in group_nodes(G).values() for r in rows}
+        self.edges = {(r["src"], r["tgt"], rel): dict(r["props"])
+                      for rel, rows in group_edges(G).items() for r in rows}
+        self.queries = []
+
+    def _rows(self):
+        for key, props in self.nodes.items():
+            yield "node", key, props.get("type") or "Entity", props
+        for (src, tgt, rel), props in self.edges.items():
+            yield "edge", (src, tgt, rel), rel, props
+
+    async def read(self, query, parameters=None):
+        self.queries.append(query)
+        kind = "node" if query in (consistency.NODE_PARTITIONS_QUERY, consistency.NODE_ROWS_QUERY) else "edge"
+        rows = [(k, label, p) for kd, k, label, p in self._rows() if kd == kind]
+        if query in (consistency.NODE_PARTITIONS_QUERY, consistency.EDGE_PARTITIONS_QUERY):
+            parts = defaultdict(lambda: [0, 0])
+            for _, label, p in rows:
+                part = parts[(p.get("sync_bucket"), label)]
+                part[0] += 1
+                part[1] += p.get("sync_hash") or 0
+            return [{"bucket": b, "label": l, "rows": n, "checksum": c} for (b, l), (n, c) in parts.items()]
+        wanted = [(k, label, p) for k, label, p in rows
+                  if p.get("sync_bucket") in parameters["buckets"]
+                  or (parameters["unbucketed"] and p.get("sync_bucket") is None)]
+        if kind == "node":
+            return [{"key": k, "label": label, "hash": p.get("sync_hash")} for k, label, p in wanted]
+        return [{"source": k[0], "target": k[1], "label": label, "hash": p.get("sync_hash")}
+                for k, label, p in wanted]
+
+
+def _graph():
+    G = nx.DiGraph()
+    for i in range(300):
+        G.add_node(f"n{i}", type="supplier" if i % 4 else "prime_contractor", name=f"N{i}")
+    for i in range(300):
+        for j in (1, 5, 17):
+            G.add_edge(f"n{i}", f"n{(i + j) % 300}", type="subcontract", value=float(i * j))
+    return G
+
+
+def test_in_sync_needs_only_aggregates():
+    G = _graph()
+    db = _StampedDatabase(G)
+    report = asyncio.run(check_consistency(db, GraphChecksums.from_graph(G)))
+    assert report["in_sync"]
+    assert report["networkx"] == report["neo4j"] == {"nodes": 300, "edges": 900}
+    assert db.queries == [consistency.NODE_PARTITIONS_QUERY, consistency.EDGE_PARTITIONS_QUERY]
+
+
+def test_drift_is_localised_to_exact_ids():
+    G = _graph()
+    db = _StampedDatabase(G)
+    H = G.copy()
+    H.add_node("new", type="supplier", name="New")         # missing in Neo4j
+    H.nodes["n7"]["name"] = "Renamed"                      # stale in Neo4j
+    H.remove_edge("n3", "n4")                              # extra in Neo4j
+    H.edges["n10", "n27"]["value"] = -1.0                  # stale in Neo4j
+    db.nodes["manual"] = {"id": "manual", "type": "supplier"}  # written outside the sync, no bucket
+
+    report = asyncio.run(check_consistency(db, GraphChecksums.from_graph(H)))
+    assert not report["in_sync"]
+    nodes, edges = report["nodes"], report["edges"]
+    assert (nodes["missing"], nodes["extra"], nodes["changed"]) == (["new"], ["manual"], ["n7"])
+    assert (edges["missing"], edges["extra"], edges["changed"]) == (
+        [], [("n3", "n4", "subcontract")], [("n10", "n27", "subcontract")])
+    # Only the buckets that disagree were drilled into
+    assert len(nodes["mismatched_partitions"]) <= 3 < nodes["partitions"]
+    assert len(edges["mismatched_partitions"]) == 2
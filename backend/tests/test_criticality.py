@@ -0,0 +1,72 @@
+import sys, os
+import random
+import pytest
+import networkx as nx
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.criticality import compute_criticality
+from app.services.graph_builder import GraphBuilder
+from app.models.ingestion import NodeModel, EdgeModel
+
+
+def _supply_chain():
+    G = nx.DiGraph()
+    G.add_node("agency", type="funding_agency", name="Agency")
+    G.add_node("prime", type="prime_contractor", name="Prime")
+    G.add_node("prime2", type="prime_contractor", name="Prime 2")
+    for s in ("s1", "s2", "s3", "orphan"):
+        G.add_node(s, type="sub_contractor", name=s)
+    G.add_edge("agency", "prime", value=100.0)
+    G.add_edge("agency", "prime2", value=50.0)
+    G.add_edge("prime", "s1", value=10.0)
+    G.add_edge("s1", "s2", value=4.0)
+    G.add_edge("prime", "s3", value=3.0)
+    G.add_edge("prime2", "s3", value=None)
+    return G
+
+
+def test_dominated_sets_and_values():
+    result = compute_criticality(_supply_chain())
+    rows = {r["id"]: r for r in result.top(10)}
+    # prime is the only path to s1 and s2; s3 is also funded via prime2
+    assert rows["prime"]["dominated_count"] == 2
+    assert rows["prime"]["dominated_value"] == 14.0
+    assert sorted(result.dominated_by("prime")) == ["s1", "s2"]
+    assert result.dominated_by("orphan") == []
+    with pytest.raises(KeyError):
+        result.dominated_by("missing")
+    assert rows["s3"]["immediate_dominator"] == "agency"
+    assert rows["agency"]["dominated_count"] == 5
+    assert rows["agency"]["immediate_dominator"] is None
+    assert "orphan" not in rows
+    assert result.top(1)[0]["id"] == "agency"
+
+
+def test_matches_node_removal_brute_force():
+    rng = random.Random(7)
+    G = nx.gnp_random_graph(60, 0.05, seed=3, directed=True)
+    for u, v in G.edges:
+        G.edges[u, v]["value"] = rng.randint(1, 9)
+    roots = [0, 1]
+    result = compute_criticality(G, roots=roots)
+    reach = set(roots).union(*(nx.descendants(G, r) for r in roots))
+    for v in reach - set(roots):
+        H = G.copy()
+        H.remove_node(v)
+        still = set(roots).union(*(nx.descendants(H, r) for r in roots))
+        lost = reach - still - {v}
+        assert set(result.dominated_by(v)) == lost
+        expected_value = sum(d["value"] for _, t, d in G.edges(data=True) if t in lost)
+        assert result.dominated_value[result.nodes.index(v)] == expected_value
+
+
+def test_graph_builder_caches_per_version():
+    builder = GraphBuilder()
+    builder.add_nodes([NodeModel(id="agency", type="funding_agency", name="Agency"),
+                       NodeModel(id="prime", type="prime_contractor", name="Prime")])
+    builder.add_edges([EdgeModel(source="agency", target="prime", value=5.0)])
+    first = builder.derived("criticality", compute_criticality)
+    assert builder.derived("criticality", compute_criticality) is first
+    builder.add_edges([EdgeModel(source="prime", target="sub", value=1.0)])
+    second = builder.derived("criticality", compute_criticality)
+    assert second is not first
+    assert sorted(second.dominated_by("prime")) == ["sub"]
@@ -0,0 +1,101 @@
+import sys, os
+import numpy as np
+import networkx as nx
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.disruption_sim import DisruptionModel, failure_probabilities, simulate
+from app.services.process_pool import process_pool
+
+
+def _random_graph():
+    rng = np.random.default_rng(1)
+    G = nx.gnp_random_graph(80, 0.04, seed=5, directed=True)
+    for u, v in G.edges:
+        G.edges[u, v]["value"] = float(rng.integers(1, 10))
+    return G
+
+
+def _bfs_loss(G, sources, failed):
+    H = G.subgraph(n for n in G if n not in failed)
+    reached = set()
+    for s in sources:
+        if s in H:
+            reached |= {s} | nx.descendants(H, s)
+    value = sum(d["value"] for u, v, d in G.edges(data=True) if u in reached and v in reached)
+    return len(reached), value
+
+
+def test_batch_matches_bfs():
+    G = _random_graph()
+    sources = [0, 1, 2]
+    model = DisruptionModel.from_networkx(G, {n: 0.2 for n in G}, sources=sources)
+    base_reach, base_value = _bfs_loss(G, sources, set())
+    assert model.baseline_union_reach == base_reach
+    assert model.baseline_union_value == base_value
+
+    rng = np.random.default_rng(0)
+    failed = rng.random((len(model), 16)) < 0.2
+    failed[model.sources] = False
+    reach, value = model.evaluate_union(~failed)
+    per_source_reach, per_source_value = model.evaluate(~failed)
+    for b in range(16):
+        down = {model.nodes[i] for i in np.flatnonzero(failed[:, b])}
+        assert (reach[b], value[b]) == _bfs_loss(G, sources, down)
+        for j, s in enumerate(sources):
+            assert (per_source_reach[b, j], per_source_value[b, j]) == _bfs_loss(G, [s], down)
+
+
+def test_deterministic_across_workers():
+    G = _random_graph()
+    model = DisruptionModel.from_networkx(G, {n: 0.1 for n in G}, sources=[0, 1])
+    single = simulate(model, scenarios=500, seed=42, batch_size=64, workers=1)
+    pooled = simulate(model, scenarios=500, seed=42, batch_size=64, workers=2)
+    assert single.num_scenarios == pooled.num_scenarios == 500
+    np.testing.assert_array_equal(single.lost_value, pooled.lost_value)
+    np.testing.assert_array_equal(single.failed_count, pooled.failed_count)
+    assert single.to_dict()["lost_value"] == pooled.to_dict()["lost_value"]
+
+
+def test_pooled_runs_share_one_forkserver_pool():
+    G = _random_graph()
+    model = DisruptionModel.from_networkx(G, {n: 0.1 for n in G}, sources=[0, 1])
+    try:
+        first = simulate(model, scenarios=200, seed=7, batch_size=50, workers=2)
+        executor = process_pool.executor
+        assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        # A second model on the same workers, and an early stop, leave the pool usable
+        other = DisruptionModel.from_networkx(G, {n: 0.3 for n in G}, sources=[0])
+        stopped = simulate(other, scenarios=100000, seed=7, batch_size=50, workers=2, time_budget=1e-9)
+        assert stopped.stop_reason == "time_budget"
+        again = simulate(model, scenarios=200, seed=7, batch_size=50, workers=2)
+        assert process_pool.executor is executor
+        np.testing.assert_array_equal(first.lost_value, again.lost_value)
+    finally:
+        process_pool.shutdown()
+
+
+def test_early_stop_and_contributions():
+    G = nx.DiGraph()
+    G.add_node("agency", type="funding_agency", name="Agency")
+    G.add_edge("agency", "prime", value=100.0)
+    G.add_edge("prime", "sub", value=10.0)
+    G.add_edge("agency", "other", value=1.0)
+    probabilities = {"prime": 0.3, "sub": 0.3, "other": 0.3}
+    model = DisruptionModel.from_networkx(G, probabilities)
+    result = simulate(model, scenarios=100000, seed=1, batch_size=200, workers=1,
+                      rel_tol=0.05, min_scenarios=400)
+    assert result.stop_reason == "converged"
+    assert 400 <= result.num_scenarios < 100000
+    summary = result.to_dict(top_k=3)
+    assert summary["baseline"] == {"reach": 4, "value": 111.0}
+    assert summary["lost_value"]["p99"] <= 111.0
+    assert [c["id"] for c in summary["contributions"]][0] == "prime"
+    assert summary["by_source"][0]["id"] == "agency"
+
+    budget = simulate(model, scenarios=100000, seed=1, batch_size=100, workers=1, time_budget=1e-9)
+    assert budget.stop_reason == "time_budget"
+    assert budget.num_scenarios == 100
+
+
+def test_failure_probabilities_scale_to_max():
+    p = failure_probabilities([0.0, 1.0, 4.0, np.nan], max_probability=0.2)
+    np.testing.assert_allclose(p, [0.0, 0.05, 0.2, 0.0])
@@ -0,0 +1,63 @@
+import sys, os
+import json
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app")))
+import analytics_engine
+from app.services.edge_store import EdgeStore
+from app.services.sparse_analytics import SparseAnalyticsEngine
+
+NODES = [{"id": "agency", "type": "funding_agency", "name": "Agency"},
+         {"id": "prime", "type": "prime_contractor", "name": "Prime"}]
+EDGES = [
+    {"source": "agency", "target": "prime", "type": "prime_contract", "value": 100.0, "award_id": "A1"},
+    {"source": "prime", "target": "s1", "type": "subcontract", "value": 5.0, "subaward_id": None},
+    {"source": "agency", "target": "prime", "type": "prime_contract", "value": 40.0, "award_id": "A2"},
+    {"source": "prime", "target": "s1", "type": "subcontract", "value": None, "subaward_id": "S9"},
+    {"source": "prime", "target": "s1", "type": "subcontract", "value": 2.0, "subaward_id": None},
+]
+
+def _check_store(store):
+    agg = store.aggregates
+    assert len(store) == 5
+    assert len(agg) == 2
+    summary = store.pair_summary("agency", "prime")
+    assert summary == {"source": "agency", "target": "prime", "sum": 140.0, "count": 2,
+                       "min": 40.0, "max": 100.0, "latest": 40.0}
+    summary = store.pair_summary("prime", "s1")
+    assert summary["sum"] == 7.0 and summary["count"] == 3
+    assert summary["min"] == 2.0 and summary["max"] == 5.0 and summary["latest"] == 2.0
+    records = store.records("prime", "s1")
+    assert [r["value"] for r in records] == [5.0, None, 2.0]
+    assert [r["subaward_id"] for r in records] == [None, "S9", None]
+    assert store.records("prime", "agency") == []
+    assert store.pair_summary("missing", "prime") is None
+
+def test_from_records():
+    _check_store(EdgeStore.from_records(EDGES, NODES))
+
+def test_from_snapshot(tmp_path):
+    nodes_path = str(tmp_path / "nodes.json")
+    edges_path = str(tmp_path / "edges.json")
+    with open(nodes_path, "w") as f: json.dump(NODES, f)
+    with open(edges_path, "w") as f: json.dump(EDGES, f)
+    store = analytics_engine.load_edge_store(nodes_path, edges_path)
+    _check_store(store)
+    assert "award_id" not in store.records("prime", "s1")[0]
+    assert store.records("agency", "prime")[1]["award_id"] == "A2"
+
+def test_engine_uses_summed_weights():
+    store = EdgeStore.from_records(EDGES, NODES)
+    engine = SparseAnalyticsEngine.from_edge_store(store)
+    i, j = store.node_ids.index("agency"), store.node_ids.index("prime")
+    assert engine.W[i, j] == 140.0
+    assert engine.A[i, j] == 1.0
+    counts = SparseAnalyticsEngine.from_edge_store(store, weight="count")
+    assert counts.W[j, store.node_ids.index("s1")] == 3.0
+    with pytest.raises(ValueError):
+        store.aggregates.column("median")
+
+def test_empty_store():
+    store = EdgeStore.from_records([])
+    assert len(store.aggregates) == 0
+    assert store.records("a", "b") == []
@@ -0,0 +1,116 @@
+import sys, os
+import threading
+import networkx as nx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.graph_builder import GraphBuilder
+from app.models.ingestion import NodeModel, EdgeModel
+
+
+def _node(i, **kwargs):
+    return NodeModel(id=str(i), type="supplier", name=f"Supplier {i}", **kwargs)
+
+
+def test_snapshots_are_isolated_from_later_writes():
+    builder = GraphBuilder()
+    builder.build_from_data([_node(1), _node(2)], [EdgeModel(source="1", target="2", value=5.0)])
+    before = builder.snapshot()
+    builder.update_graph([_node(1, attributes={"state": "VA"})],
+                         [EdgeModel(source="1", target="2", value=7.0), EdgeModel(source="1", target="3")])
+    after = builder.snapshot()
+
+    assert after.version == before.version + 1
+    assert before.graph.number_of_edges() == 1 and "3" not in before.graph
+    assert before.graph.edges["1", "2"]["value"] == 5.0
+    assert "state" not in before.graph.nodes["1"]
+    assert after.graph.edges["1", "2"]["value"] == 7.0
+    assert after.graph.nodes["1"]["state"] == "VA"
+    assert set(after.graph.predecessors("3")) == {"1"}
+    assert set(before.graph.successors("1")) == {"2"}
+    assert nx.utils.graphs_equal(after.graph, nx.DiGraph(after.graph))
+    with pytest.raises(nx.NetworkXError):
+        after.graph.add_node("x")
+
+
+def test_derived_results_belong_to_their_version():
+    builder = GraphBuilder()
+    builder.add_nodes([_node(1)])
+    snapshot = builder.snapshot()
+    first = snapshot.derived("size", lambda G: G.number_of_nodes())
+    builder.add_nodes([_node(2)])
+    assert snapshot.cached("size") == first == 1
+    assert builder.cached("size") is None
+    assert builder.derived("size", lambda G: G.number_of_nodes()) == 2
+
+
+def test_concurrent_writers_and_readers():
+    builder = GraphBuilder()
+    errors = []
+    done = threading.Event()
+
+    def write(offset):
+        for i in range(50):
+            builder.add_edges([EdgeModel(source=f"w{offset}", target=f"w{offset}-{i}", value=float(i))])
+
+    def read():
+        while not done.is_set():
+            G = builder.to_networkx()
+            try:
+                # A snapshot is internally consistent: every edge's endpoints exist
+                for u, v in G.edges:
+                    assert u in G and v in G
+                assert G.number_of_edges() == sum(1 for _ in G.edges)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    writers = [threading.Thread(target=write, args=(k,)) for k in range(4)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    done.set()
+    for t in readers:
+        t.join()
+    assert not errors
+    assert builder.graph.number_of_edges() == 200
+    assert builder.version == 200
+    assert builder.analytics.num_edges == 200
+
+
+def test_failed_batches_never_reach_the_analytics():
+    builder = GraphBuilder()
+    builder.add_nodes([_node(1)])
+    bad = type("Node", (), {"id": "2", "type": "supplier", "name": "Bad", "attributes": 7})()
+    with pytest.raises(TypeError):
+        builder.update_graph([_node(3), bad], [EdgeModel(source="1", target="3")])
+    assert builder.version == 1 and "3" not in builder.graph
+    assert builder.analytics.node_ids == ["1"] and builder.analytics.num_edges == 0
+
+
+def test_metrics_and_their_snapshot_match_under_writes():
+    builder = GraphBuilder()
+    builder.add_edges([EdgeModel(source="hub", target="s0")])
+    errors = []
+    done = threading.Event()
+
+    def write():
+        for i in range(1, 100):
+            # Each batch adds a node and two edges; half of it alone would skew the degrees
+            builder.update_graph([_node(f"s{i}")], [EdgeModel(source="hub", target=f"s{i}"),
+                                                    EdgeModel(source=f"s{i}", target=f"s{i - 1}")])
+        done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not done.is_set():
+        snapshot, metrics = builder.analytics.centrality_snapshot()
+        try:
+            assert set(metrics["degree_centrality"]) == set(snapshot.graph)
+            assert metrics["degree_centrality"] == pytest.approx(nx.degree_centrality(snapshot.graph))
+        except AssertionError as e:  # pragma: no cover - reported below
+            errors.append(e)
+    writer.join()
+    assert not errors
+    snapshot, _ = builder.analytics.centrality_snapshot()
+    assert snapshot is builder.snapshot()
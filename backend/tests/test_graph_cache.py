@@ -0,0 +1,84 @@
+import sys, os
+import json
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app")))
+import analytics_engine
+from app.services.graph_cache import GraphCache
+
+NODES = [{"id": "A", "type": "Supplier", "name": "Alpha"}, {"id": "B", "type": "Prime", "name": "Beta"}]
+EDGES = [{"source": "A", "target": "B", "type": "subcontract", "value": 1.0}]
+
+def _write(tmp, nodes=NODES, edges=EDGES):
+    nodes_path = os.path.join(tmp, "nodes.json")
+    edges_path = os.path.join(tmp, "edges.json")
+    with open(nodes_path, "w") as f: json.dump(nodes, f)
+    with open(edges_path, "w") as f: json.dump(edges, f)
+    return nodes_path, edges_path
+
+class CountingLoader:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, nodes_path, edges_path):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return analytics_engine.build_graph(nodes_path, edges_path)
+
+def test_cache_hit_and_invalidation(tmp_path):
+    nodes_path, edges_path = _write(str(tmp_path))
+    cache = GraphCache()
+    loader = CountingLoader()
+    first = cache.get(nodes_path, edges_path, loader)
+    second = cache.get(nodes_path, edges_path, loader)
+    assert first is second
+    assert loader.calls == 1
+    # Ingestion rewrites the edges file -> new version
+    _write(str(tmp_path), edges=EDGES + [{"source": "B", "target": "A"}])
+    os.utime(edges_path, ns=(1, 1))
+    third = cache.get(nodes_path, edges_path, loader)
+    assert loader.calls == 2
+    assert third.version > first.version
+    assert third.graph.number_of_edges() == 2
+    # Holders of the old version still see the old graph
+    assert first.graph.number_of_edges() == 1
+
+def test_content_hash_ignores_touch(tmp_path):
+    nodes_path, edges_path = _write(str(tmp_path))
+    cache = GraphCache(use_content_hash=True)
+    loader = CountingLoader()
+    cache.get(nodes_path, edges_path, loader)
+    os.utime(edges_path, ns=(1, 1))
+    cache.get(nodes_path, edges_path, loader)
+    assert loader.calls == 1
+
+def test_single_flight_build(tmp_path):
+    nodes_path, edges_path = _write(str(tmp_path))
+    cache = GraphCache()
+    loader = CountingLoader(delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(nodes_path, edges_path, loader)))
+               for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert loader.calls == 1
+    assert len({id(r) for r in results}) == 1
+
+def test_derived_computed_once_per_version(tmp_path):
+    nodes_path, edges_path = _write(str(tmp_path))
+    cache = GraphCache()
+    entry = cache.get(nodes_path, edges_path, analytics_engine.build_graph)
+    calls = []
+    def compute(G):
+        calls.append(1)
+        time.sleep(0.1)
+        return G.number_of_nodes()
+    threads = [threading.Thread(target=entry.derived, args=("count", compute)) for _ in range(5)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert entry.derived("count", compute) == 2
+    assert len(calls) == 1
@@ -0,0 +1,99 @@
+import sys, os
+import networkx as nx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.graph_index import GraphIndex, encode_cursor
+from app.services.graph_builder import GraphBuilder
+from app.models.ingestion import NodeModel, EdgeModel
+
+
+def _graph():
+    G = nx.DiGraph()
+    for i in range(30):
+        G.add_node(f"n{i}", type="prime_contractor" if i % 3 == 0 else "sub_contractor", name=f"N{i}")
+    for i in range(30):
+        for j in (1, 4, 7):
+            G.add_edge(f"n{i}", f"n{(i + j) % 30}", type="subcontract" if j > 1 else "prime_contract",
+                       value=None if i == 5 else float((i * j) % 10))
+    return G
+
+
+def _drain(page_fn, limit):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page = page_fn(limit, cursor)
+        rows.extend(page.rows.tolist())
+        pages += 1
+        if page.next_cursor is None:
+            return rows, pages
+        cursor = page.next_cursor
+
+
+def test_node_pages_cover_each_node_once():
+    G = _graph()
+    index = GraphIndex.from_graph(G)
+    rows, pages = _drain(lambda limit, cursor: index.page_nodes(limit, cursor), 7)
+    assert [index.node_ids[r] for r in rows] == list(G)
+    assert pages == 5
+    rows, _ = _drain(lambda limit, cursor: index.page_nodes(limit, cursor, node_type="prime_contractor"), 4)
+    assert [index.node_ids[r] for r in rows] == [n for n, t in G.nodes(data="type") if t == "prime_contractor"]
+    assert index.page_nodes(5, skip=28).rows.tolist() == [28, 29]
+    assert index.page_nodes(5, node_type="missing").total == 0
+
+
+def test_edge_pages_filters_and_value_order():
+    G = _graph()
+    index = GraphIndex.from_graph(G)
+    rows, _ = _drain(lambda limit, cursor: index.page_edges(limit, cursor), 11)
+    assert sorted(index.edge_endpoints(r) for r in rows) == sorted(G.edges)
+    assert len(rows) == G.number_of_edges()
+
+    rows, _ = _drain(lambda limit, cursor: index.page_edges(limit, cursor, edge_type="prime_contract"), 4)
+    assert {index.edge_endpoints(r) for r in rows} == {
+        (u, v) for u, v, t in G.edges(data="type") if t == "prime_contract"}
+
+    page_fn = lambda limit, cursor: index.page_edges(limit, cursor, edge_type="subcontract",
+                                                     min_value=2.0, max_value=6.0)
+    rows, _ = _drain(page_fn, 3)
+    got = [index.edge_endpoints(r) for r in rows]
+    expected = [(u, v) for u, v, d in G.edges(data=True)
+                if d["type"] == "subcontract" and d["value"] is not None and 2.0 <= d["value"] <= 6.0]
+    assert sorted(got) == sorted(expected)
+    values = [G.edges[e]["value"] for e in got]
+    assert values == sorted(values)
+    assert page_fn(3, None).total == len(expected)
+
+
+def test_cursor_survives_later_versions():
+    builder = GraphBuilder()
+    builder.add_nodes([NodeModel(id=f"n{i}", type="supplier", name=str(i)) for i in range(10)])
+    builder.add_edges([EdgeModel(source=f"n{i}", target=f"n{(i + 1) % 10}", value=1.0) for i in range(10)])
+    first = builder.derived("graph_index", GraphIndex.from_graph).page_edges(4)
+    seen = [GraphIndex.from_graph(builder.graph).edge_endpoints(r) for r in first.rows.tolist()]
+
+    # New edges before and after the cursor position, plus a new node
+    builder.add_edges([EdgeModel(source="n0", target="n5"), EdgeModel(source="n9", target="new")])
+    index = builder.derived("graph_index", GraphIndex.from_graph)
+    rows, _ = _drain(lambda limit, cursor: index.page_edges(limit, cursor or first.next_cursor), 4)
+    rest = [index.edge_endpoints(r) for r in rows]
+    assert not set(seen) & set(rest)
+    assert ("n9", "new") in rest
+    assert set(seen) | set(rest) | {("n0", "n5")} == set(builder.graph.edges)
+
+
+def test_bad_cursors_are_rejected():
+    index = GraphIndex.from_graph(_graph())
+    with pytest.raises(ValueError):
+        index.page_nodes(5, cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        index.page_edges(5, cursor=encode_cursor("node", 3))
+    # Well-formed cursors whose keys are not (in-range) ints
+    for cursor in (encode_cursor("node", "x"), encode_cursor("node", -1), encode_cursor("node", 2 ** 64),
+                   encode_cursor("node", 1, 2), encode_cursor("node", True)):
+        with pytest.raises(ValueError):
+            index.page_nodes(5, cursor=cursor)
+    with pytest.raises(ValueError):
+        index.page_edges(5, cursor=encode_cursor("edge", 1.5))
+    for cursor in (encode_cursor("edge-value", "x", 3), encode_cursor("edge-value", 1.0, None)):
+        with pytest.raises(ValueError):
+            index.page_edges(5, cursor=cursor, min_value=0)
@@ -0,0 +1,70 @@
+import sys, os
+import json
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app")))
+import analytics_engine
+from app.services import graph_snapshot
+
+NODES = [
+    {"id": "agency:DoD", "type": "funding_agency", "name": "DoD"},
+    {"id": "prime:1", "type": "prime_contractor", "name": "Prime One"},
+    {"id": "supplier:1", "type": "supplier", "name": "Supplier One"},
+]
+EDGES = [
+    {"source": "agency:DoD", "target": "prime:1", "type": "prime_contract", "value": 100.0, "award_id": "A1"},
+    {"source": "prime:1", "target": "supplier:1", "type": "subcontract", "value": 5.0, "subaward_id": None},
+    {"source": "prime:1", "target": "supplier:1", "type": "subcontract", "value": 7.5, "subaward_id": "S2"},
+    {"source": "prime:1", "target": "supplier:2", "type": "subcontract", "value": None, "subaward_id": None},
+]
+
+def _write_json(tmp, nodes=NODES, edges=EDGES):
+    nodes_path = os.path.join(tmp, "nodes.json")
+    edges_path = os.path.join(tmp, "edges.json")
+    with open(nodes_path, "w") as f: json.dump(nodes, f)
+    with open(edges_path, "w") as f: json.dump(edges, f)
+    return nodes_path, edges_path
+
+def test_snapshot_matches_json_graph(tmp_path):
+    nodes_path, edges_path = _write_json(str(tmp_path))
+    snap = analytics_engine.load_snapshot(nodes_path, edges_path)
+    assert snap.num_nodes == 4
+    assert snap.num_edges == 4  # parallel records are kept in the CSR
+    G_json = analytics_engine.build_graph(nodes_path, edges_path)
+    G_snap = snap.to_networkx()
+    assert dict(G_snap.nodes(data=True)) == dict(G_json.nodes(data=True))
+    assert sorted(G_snap.edges(data=True)) == sorted(G_json.edges(data=True))
+    # Last record wins for a parallel pair, as with build_graph
+    assert G_snap.edges["prime:1", "supplier:1"]["subaward_id"] == "S2"
+    assert "subaward_id" not in G_snap.edges["agency:DoD", "prime:1"]
+
+def test_snapshot_csr_and_degrees(tmp_path):
+    nodes_path, edges_path = _write_json(str(tmp_path))
+    snap = analytics_engine.load_snapshot(nodes_path, edges_path)
+    ids = snap.node_ids()
+    assert ids[:3] == ["agency:DoD", "prime:1", "supplier:1"]
+    assert snap.out_degree().tolist() == [1, 3, 0, 0]
+    assert snap.in_degree().tolist() == [0, 1, 2, 1]
+    assert snap.decoded_column("edge", "value") == [100.0, 5.0, 7.5, None]
+
+def test_snapshot_freshness(tmp_path):
+    nodes_path, edges_path = _write_json(str(tmp_path))
+    path = graph_snapshot.default_snapshot_path(nodes_path)
+    assert not graph_snapshot.is_fresh(path, nodes_path, edges_path)
+    analytics_engine.load_snapshot(nodes_path, edges_path)
+    assert graph_snapshot.is_fresh(path, nodes_path, edges_path)
+    _write_json(str(tmp_path), edges=EDGES[:1])
+    os.utime(edges_path, ns=(0, 0))
+    assert not graph_snapshot.is_fresh(path, nodes_path, edges_path)
+    G = analytics_engine.load_graph(nodes_path, edges_path)
+    assert G.number_of_edges() == 1
+
+def test_snapshot_invalid_node(tmp_path):
+    with pytest.raises(ValueError):
+        graph_snapshot.write_snapshot([{"type": "Supplier", "name": "Alpha"}], [], str(tmp_path / "snap"))
+
+def test_snapshot_empty_graph(tmp_path):
+    path = graph_snapshot.write_snapshot([], [], str(tmp_path / "snap"))
+    snap = graph_snapshot.GraphSnapshot.load(path)
+    assert snap.num_nodes == 0
+    assert snap.to_networkx().number_of_nodes() == 0
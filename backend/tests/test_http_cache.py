@@ -0,0 +1,119 @@
+import sys, os
+import asyncio
+import httpx
+import pytest
+import requests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services import http_cache as http_cache_module
+from app.services.http_cache import (
+    CachingTransport, HttpCache, OfflineCacheMiss, install_requests_cache, request_key, uninstall_requests_cache,
+)
+
+
+class _Origin:
+    """Counts requests; answers 304 to a matching If-None-Match."""
+
+    def __init__(self, etag='"v1"'):
+        self.calls = []
+        self.etag = etag
+
+    async def __call__(self, request):
+        self.calls.append(request)
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        return httpx.Response(200, json={"path": request.url.path}, headers={"ETag": self.etag})
+
+
+def _get(cache, origin, url, **kwargs):
+    async def run():
+        transport = CachingTransport(cache, httpx.MockTransport(origin))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.request(kwargs.pop("method", "GET"), url, **kwargs)
+    return asyncio.run(run())
+
+
+def test_key_ignores_credentials_order_and_json_layout():
+    a = request_key("get", "https://finnhub.io/api/v1/stock/profile2?symbol=RTX&token=abc", {}, None)
+    b = request_key("GET", "https://FINNHUB.io/api/v1/stock/profile2?token=xyz&symbol=RTX", {}, None)
+    assert a == b
+    assert request_key("POST", "https://api.usaspending.gov/x", {}, b'{"a": 1, "b": 2}') == \
+        request_key("POST", "https://api.usaspending.gov/x", {}, b'{"b":2,"a":1}')
+    assert a != request_key("GET", "https://finnhub.io/api/v1/stock/profile2?symbol=LMT", {}, None)
+
+
+def test_ttl_revalidation_and_offline_replay(tmp_path, monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr(http_cache_module.time, "time", lambda: clock[0])
+    cache = HttpCache(str(tmp_path), ttls={"finnhub": 60})
+    origin = _Origin()
+    url = "https://finnhub.io/api/v1/stock/profile2?symbol=RTX&token=secret"
+
+    assert _get(cache, origin, url).json() == {"path": "/api/v1/stock/profile2"}
+    assert _get(cache, origin, url.replace("secret", "other")).status_code == 200
+    assert len(origin.calls) == 1  # fresh hit, credentials not part of the key
+
+    clock[0] += 120
+    assert _get(cache, origin, url).json() == {"path": "/api/v1/stock/profile2"}
+    assert len(origin.calls) == 2 and origin.calls[-1].headers["If-None-Match"] == '"v1"'
+    assert _get(cache, origin, url).status_code == 200
+    assert len(origin.calls) == 2  # the 304 renewed the entry
+
+    offline = HttpCache(str(tmp_path), offline=True)
+    clock[0] += 10 ** 9
+    assert _get(offline, origin, url).json() == {"path": "/api/v1/stock/profile2"}
+    with pytest.raises(OfflineCacheMiss):
+        _get(offline, origin, "https://finnhub.io/api/v1/stock/profile2?symbol=LMT")
+    assert len(origin.calls) == 2
+    # Unknown hosts bypass the cache entirely
+    _get(offline, origin, "http://localhost/health")
+    assert len(origin.calls) == 3
+
+
+def test_identical_bodies_are_stored_once_and_lru_evicted(tmp_path):
+    cache = HttpCache(str(tmp_path), max_bytes=10 ** 6)
+    origin = _Origin()
+    same = lambda request: httpx.Response(200, content=b"x" * 1000)
+    for i in range(3):
+        _get(cache, same, f"https://query.wikidata.org/sparql?query={i}")
+    assert cache.stats()["entries"] == 3 and cache.stats()["bodies"] == 1
+
+    small = HttpCache(str(tmp_path / "small"), max_bytes=2500)
+    for i in range(3):
+        _get(small, lambda request, i=i: httpx.Response(200, content=bytes([i]) * 1000),
+             f"https://data.sec.gov/f{i}")
+    _get(small, origin, "https://data.sec.gov/f1")  # hit: f1 becomes most recent
+    _get(small, lambda request: httpx.Response(200, content=b"z" * 1000), "https://data.sec.gov/f3")
+    reopened = HttpCache(str(tmp_path / "small"), max_bytes=2500, offline=True)
+    assert reopened.stats()["bytes"] <= 2500
+    assert _get(reopened, origin, "https://data.sec.gov/f1").content == b"\x01" * 1000
+    with pytest.raises(OfflineCacheMiss):
+        _get(reopened, origin, "https://data.sec.gov/f0")
+
+
+def test_requests_sessions_replay_offline(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_send(session, request, **kwargs):
+        calls.append(request.url)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = b'{"results": [1, 2]}'
+        return response
+
+    monkeypatch.setattr(requests.Session, "send", fake_send)
+    url = "https://api.usaspending.gov/api/v2/search/spending_by_award/"
+    install_requests_cache(HttpCache(str(tmp_path)))
+    try:
+        assert requests.Session().post(url, json={"page": 1}).json() == {"results": [1, 2]}
+    finally:
+        uninstall_requests_cache()
+    install_requests_cache(HttpCache(str(tmp_path), offline=True))
+    try:
+        assert requests.Session().post(url, json={"page": 1}).json() == {"results": [1, 2]}
+        with pytest.raises(OfflineCacheMiss):
+            requests.Session().post(url, json={"page": 2})
+    finally:
+        uninstall_requests_cache()
+    assert calls == [url]
+    assert requests.Session.send is fake_send
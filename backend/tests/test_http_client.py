@@ -0,0 +1,93 @@
+import sys, os
+import asyncio
+import httpx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services import http_client as http_client_module
+from app.services.finnhub_service import FinnhubService, enrich_companies
+from app.services.http_cache import HttpCache
+from app.services.http_client import HostPolicy, SharedHttpClient, TokenBucket
+
+
+class _Finnhub:
+    """Profiles for any symbol but BAD; the first request per symbol in `limited` gets a 429."""
+
+    def __init__(self, limited=()):
+        self.limited = set(limited)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.002)
+        self.in_flight -= 1
+        symbol = request.url.params["symbol"]
+        if symbol in self.limited:
+            self.limited.discard(symbol)
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if symbol == "BAD":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"ticker": symbol, "name": f"{symbol} Corp"})
+
+
+def _client(origin, tmp_path, policy):
+    return SharedHttpClient(policies={"finnhub.io": policy}, transport=httpx.MockTransport(origin),
+                            cache=HttpCache(str(tmp_path), enabled=False))
+
+
+def test_enrich_companies_respects_in_flight_cap_and_retries_429(tmp_path):
+    origin = _Finnhub(limited={"S3"})
+    client = _client(origin, tmp_path, HostPolicy(max_in_flight=8))
+
+    async def run():
+        try:
+            return await enrich_companies(
+                [f"s{i}" for i in range(200)] + ["S1", "BAD"], FinnhubService("key", client=client))
+        finally:
+            await client.close()
+
+    profiles, errors, stats = asyncio.run(run())
+    assert len(profiles) == 200 and profiles["S7"] == {"ticker": "S7", "name": "S7 Corp"}
+    assert list(errors) == ["BAD"]
+    assert (stats.requested, stats.found, stats.failed) == (201, 200, 1)
+    assert origin.calls == 202  # one retried 429
+    assert origin.max_in_flight == 8
+    assert stats.to_dict()["profiles_per_sec"] > 0
+
+
+def test_rate_policy_paces_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_client_module, "RATE_LIMIT_BACKOFF", 0)
+    origin = _Finnhub()
+    client = _client(origin, tmp_path, HostPolicy(rate=200, burst=5))
+
+    async def run():
+        service = FinnhubService("key", client=client)
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*(service.get_company_profile(f"S{i}") for i in range(25)))
+        await client.close()
+        return asyncio.get_running_loop().time() - start
+
+    # 5 in the burst, the other 20 at 200/s
+    assert asyncio.run(run()) >= 20 / 200 * 0.9
+
+
+def test_token_bucket_limits_rate(monkeypatch):
+    clock = [0.0]
+
+    async def fake_sleep(seconds):
+        clock[0] += seconds
+
+    monkeypatch.setattr(http_client_module.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(http_client_module.asyncio, "sleep", fake_sleep)
+
+    async def run():
+        bucket = TokenBucket(rate=2, capacity=2)
+        for _ in range(6):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    # Burst of two, then one token every half second
+    assert clock[0] == pytest.approx(2.0)
@@ -0,0 +1,72 @@
+import sys, os
+import numpy as np
+import networkx as nx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.graph_builder import GraphBuilder
+from app.models.ingestion import NodeModel, EdgeModel
+
+
+def _edges(G):
+    return [EdgeModel(source=str(u), target=str(v), value=1.0) for u, v in G.edges]
+
+
+def _builder(G):
+    builder = GraphBuilder()
+    builder.add_nodes([NodeModel(id=str(n), type="supplier" if n % 3 else "prime_contractor", name=str(n))
+                       for n in G])
+    builder.add_edges(_edges(G))
+    return builder
+
+
+def test_degrees_and_type_counts_track_updates():
+    G = nx.gnp_random_graph(50, 0.05, seed=1, directed=True)
+    builder = _builder(G)
+    analytics = builder.analytics
+    builder.add_edges([EdgeModel(source="0", target="new", value=2.0),
+                       EdgeModel(source="0", target="new", value=3.0)])
+    builder.add_nodes([NodeModel(id="new", type="sub_contractor", name="New")])
+    expected = nx.degree_centrality(builder.graph)
+    got = dict(zip(analytics.node_ids, analytics.degree_centrality()))
+    assert got == pytest.approx(expected)
+    types = {}
+    for _, t in builder.graph.nodes(data="type"):
+        types[t] = types.get(t, 0) + 1
+    assert analytics.summary()["type_counts"] == types
+    assert analytics.num_edges == builder.graph.number_of_edges()
+
+
+def test_small_delta_warm_starts():
+    G = nx.gnp_random_graph(400, 0.01, seed=3, directed=True)
+    builder = _builder(G)
+    analytics = builder.analytics
+    assert analytics.refresh()["mode"] == "full"
+    assert analytics.refresh()["mode"] == "cached"
+    builder.add_edges([EdgeModel(source="1", target="2"), EdgeModel(source="5", target="extra")])
+    warm = analytics.refresh()
+    assert warm["mode"] == "warm" and warm["dirty_nodes"] == 4
+    metrics = analytics.centrality_dicts()
+    expected = nx.pagerank(builder.graph, tol=1e-10)
+    assert max(abs(metrics["pagerank"][n] - expected[n]) for n in expected) < 1e-4
+    eigen = nx.eigenvector_centrality(builder.graph, max_iter=1000)
+    assert max(abs(metrics["eigenvector_centrality"][n] - eigen[n]) for n in eigen) < 1e-3
+
+    cold = GraphBuilder()
+    cold.add_nodes([NodeModel(id=n, type="x", name=n) for n in builder.graph])
+    cold.add_edges([EdgeModel(source=u, target=v) for u, v in builder.graph.edges])
+    cold.analytics.refresh()
+    assert warm["iterations"]["pagerank"] < cold.analytics.last_refresh["iterations"]["pagerank"]
+
+
+def test_large_delta_and_reattributed_edges():
+    builder = _builder(nx.gnp_random_graph(40, 0.05, seed=2, directed=True))
+    analytics = builder.analytics
+    analytics.refresh()
+    u, v = next(iter(builder.graph.edges))
+    builder.add_edges([EdgeModel(source=u, target=v, value=99.0)])
+    assert analytics.refresh()["mode"] == "cached"
+    builder.add_edges([EdgeModel(source=f"n{i}", target=f"m{i}") for i in range(40)])
+    assert analytics.refresh()["mode"] == "full"
+    risk = analytics.risk_scores()
+    assert len(risk.risk_score) == builder.graph.number_of_nodes()
+    assert np.isfinite(risk.risk_score).all()
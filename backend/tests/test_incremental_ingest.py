@@ -0,0 +1,127 @@
+import sys, os
+import asyncio
+import json
+import httpx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.incremental_ingest import IngestState, ingest_incremental
+
+
+class _World:
+    """A mutable USAspending: awards per agency and subawards per award, served like spending_by_award."""
+
+    def __init__(self):
+        self.awards = {"DOD": [], "NASA": []}
+        self.subawards = {}
+        self.requests = 0
+        self.fail_agency = None
+        for agency in self.awards:
+            for i in range(4):
+                self.add(agency, i, amount=1000.0 - i, modified="2024-01-0%d" % (i + 1),
+                         suppliers=[f"{agency}-S{i}", "Shared Parts"])
+
+    def add(self, agency, i, amount, modified, suppliers):
+        key = f"{agency}_{i}"
+        self.awards[agency] = [a for a in self.awards[agency] if a["generated_internal_id"] != key]
+        self.awards[agency].append({
+            "Award ID": f"{agency}-{i}", "Recipient Name": f"{agency} Prime {i}", "Recipient UEI": f"{agency}P{i}",
+            "Award Amount": amount, "Awarding Agency": agency, "generated_internal_id": key,
+            "Last Modified Date": modified,
+        })
+        self.subawards[key] = [{"Sub-Award ID": f"{key}-{s}", "Sub-Awardee Name": s, "Sub-Award Amount": 1.0}
+                               for s in suppliers]
+
+    async def __call__(self, request):
+        self.requests += 1
+        body = json.loads(request.content)
+        filters, page, size = body["filters"], body["page"], body["limit"]
+        if body.get("subawards"):
+            rows = self.subawards[filters["award_unique_id"]]
+        else:
+            agency = filters["agencies"][0]["name"]
+            if agency == self.fail_agency:
+                return httpx.Response(400)
+            rows = sorted(self.awards[agency], key=lambda a: a[body["sort"]], reverse=True)
+        start = (page - 1) * size
+        return httpx.Response(200, json={"results": rows[start:start + size],
+                                         "page_metadata": {"hasNext": start + size < len(rows)}})
+
+
+def _run(world, tmp_path, name="delta.json", limit=3):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(world)) as client:
+            return await ingest_incremental([2024], ["DOD", "NASA"], limit=limit,
+                                            state_path=str(tmp_path / "state.json"),
+                                            delta_path=str(tmp_path / name), client=client,
+                                            rate=10_000, backoff=0, page_size=2)
+    return asyncio.run(run())
+
+
+def test_incremental_runs_fetch_only_changes(tmp_path):
+    world = _World()
+    delta, stats = _run(world, tmp_path)
+    assert stats.awards == 6  # top 3 by amount per agency
+    assert len(delta["edges"]["added"]) == 6 + 12 and not delta["edges"]["removed"]
+    assert "supplier:Shared Parts" in {n["id"] for n in delta["nodes"]["added"]}
+
+    # Nothing modified since: each partition reads one page of awards, re-fetches nothing new
+    world.requests = 0
+    world.awards["DOD"] = [dict(a, **{"Last Modified Date": "2023-12-01"}) for a in world.awards["DOD"]]
+    world.awards["NASA"] = [dict(a, **{"Last Modified Date": "2023-12-01"}) for a in world.awards["NASA"]]
+    delta, stats = _run(world, tmp_path, "empty.json")
+    assert stats.awards == 0 and world.requests == 2
+    assert delta["run"]["counts"]["edges"] == {"added": 0, "changed": 0, "removed": 0}
+
+    # DOD-0 drops its own supplier, NASA-9 is new
+    today = json.load(open(tmp_path / "state.json"))["watermarks"]["2024|DOD"]
+    world.add("DOD", 0, amount=1000.0, modified=today, suppliers=["Shared Parts", "New Machining"])
+    world.add("NASA", 9, amount=5.0, modified=today, suppliers=["Shared Parts"])
+    world.requests = 0
+    delta, stats = _run(world, tmp_path, "nightly.json")
+    assert stats.awards == 2 and world.requests == 4
+    nodes, edges = delta["nodes"], delta["edges"]
+    assert nodes["removed"] == ["supplier:DOD-S0"]
+    assert sorted(n["id"] for n in nodes["added"]) == ["prime:NASAP9", "supplier:New Machining"]
+    assert edges["removed"] == [{"source": "prime:DODP0", "target": "supplier:DOD-S0", "type": "subcontract",
+                                 "subaward_id": "DOD_0-DOD-S0"}]
+    assert len(edges["added"]) == 1 + 2 and not edges["changed"]
+    assert json.load(open(tmp_path / "nightly.json"))["nodes"]["removed"] == ["supplier:DOD-S0"]
+
+    nodes, edges = IngestState.load(str(tmp_path / "state.json")).records()
+    assert "supplier:DOD-S0" not in {n["id"] for n in nodes}
+    assert len(edges) == 6 + 12 + 3 - 1
+
+
+def test_crashed_run_resumes_and_emits_one_delta(tmp_path):
+    world = _World()
+    world.fail_agency = "NASA"
+    with pytest.raises(httpx.HTTPStatusError):
+        _run(world, tmp_path)
+    state = IngestState.load(str(tmp_path / "state.json"))
+    assert state.run["done"] == ["2024|DOD"] and not (tmp_path / "delta.json").exists()
+
+    world.fail_agency = None
+    world.requests = 0
+    delta, stats = _run(world, tmp_path)
+    assert (stats.partitions, stats.skipped) == (1, 1)
+    assert world.requests == 2 + 3  # NASA only: one award page (3 rows over 2 pages) + 3 subaward pages
+    # The delta covers the DOD partition committed before the crash too
+    assert {e["source"] for e in delta["edges"]["added"]} >= {"prime:DODP0", "prime:NASAP0"}
+    assert IngestState.load(str(tmp_path / "state.json")).run is None
+
+
+def test_every_changed_award_is_fetched_beyond_a_page(tmp_path):
+    world = _World()
+    _run(world, tmp_path)
+    today = json.load(open(tmp_path / "state.json"))["watermarks"]["2024|DOD"]
+    # Five changed awards span three award pages; older ones must not be dropped behind the watermark
+    for i in range(4, 9):
+        world.add("DOD", i, amount=10.0 + i, modified=today, suppliers=[f"G{i}"])
+    delta, stats = _run(world, tmp_path, "nightly.json")
+    assert stats.awards == 5
+    assert sorted(n["id"] for n in delta["nodes"]["added"] if n["type"] == "supplier") == [
+        f"supplier:G{i}" for i in range(4, 9)]
+    delta, stats = _run(world, tmp_path, "again.json")
+    assert not delta["nodes"]["added"] and not delta["nodes"]["removed"]
+    awards = IngestState.load(str(tmp_path / "state.json")).awards
+    assert {f"DOD_{i}" for i in range(4, 9)} <= set(awards)
@@ -0,0 +1,130 @@
+import sys, os
+import asyncio
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.graph_builder import GraphBuilder
+from app.services.ingest_orchestrator import IngestOrchestrator, Source
+
+DELAY = 0.3
+
+
+async def _awards(params, graph):
+    await asyncio.sleep(DELAY)
+    return ([{"id": "agency:DOD", "type": "funding_agency", "name": "DOD"},
+             {"id": "prime:1", "type": "prime_contractor", "name": params.get("name", "LOCKHEED MARTIN CORP")}],
+            [{"source": "agency:DOD", "target": "prime:1", "type": "prime_contract", "value": 100.0}])
+
+
+def _filings(params, graph):
+    time.sleep(DELAY)  # a blocking SDK call
+    return [{"id": "prime:1", "type": "public_company", "name": "Lockheed Martin Corp", "cik": "936468"}], []
+
+
+async def _market(params, graph):
+    await asyncio.sleep(DELAY)
+    return [{"id": "prime:1", "name": "Lockheed Martin", "cik": "0000936468", "market_cap": 110000.0,
+             "industry": "Aerospace"}], []
+
+
+async def _broken(params, graph):
+    raise RuntimeError("upstream down")
+
+
+def _orchestrator():
+    sources = {"awards": Source("awards", _awards), "filings": Source("filings", _filings, blocking=True),
+               "market": Source("market", _market), "broken": Source("broken", _broken)}
+    return IngestOrchestrator(GraphBuilder(), sources, precedence=("awards", "filings", "market"))
+
+
+def test_sources_run_concurrently_and_merge_by_precedence():
+    orchestrator = _orchestrator()
+    result = asyncio.run(orchestrator.refresh({"awards": {}, "filings": {}, "market": {}, "broken": {}}))
+    # Three sources of DELAY each, blocking one included: wall time ~ the slowest, not the sum
+    assert result["seconds"] < 2.5 * DELAY
+    runs = {r["source"]: r for r in result["sources"]}
+    assert runs["awards"]["nodes"] == 2 and runs["awards"]["edges"] == 1
+    assert runs["broken"] == {"source": "broken", "status": "error", "nodes": 0, "edges": 0,
+                              "seconds": runs["broken"]["seconds"], "error": "upstream down"}
+
+    G = orchestrator.builder.to_networkx()
+    prime = dict(G.nodes["prime:1"])
+    assert prime.pop("_origin") == {"type": "awards", "name": "awards", "cik": "filings",
+                                    "market_cap": "market", "industry": "market"}
+    assert prime == {"type": "prime_contractor", "name": "LOCKHEED MARTIN CORP", "cik": "936468",
+                     "market_cap": 110000.0, "industry": "Aerospace"}
+    assert G.edges["agency:DOD", "prime:1"] == {"type": "prime_contract", "value": 100.0,
+                                                "_origin": {"type": "awards", "value": "awards"}}
+    merge = result["merge"]
+    assert (merge["nodes_added"], merge["edges_added"], merge["version"]) == (2, 1, 1)
+    # market's name and cik, and filings' type and name, lose to higher sources
+    assert merge["overruled"] == 4
+
+
+def test_precedence_holds_across_refreshes():
+    orchestrator = _orchestrator()
+    asyncio.run(orchestrator.refresh({"awards": {}}))
+    # A lower-precedence source alone cannot overwrite what awards set, but fills in the rest
+    result = asyncio.run(orchestrator.refresh({"market": {}}))
+    G = orchestrator.builder.to_networkx()
+    assert G.nodes["prime:1"]["name"] == "LOCKHEED MARTIN CORP"
+    assert G.nodes["prime:1"]["market_cap"] == 110000.0
+    assert result["merge"]["nodes_updated"] == 1 and result["merge"]["overruled"] == 1
+    # The owning source may update its own values; a per-request precedence can reorder sources
+    asyncio.run(orchestrator.refresh({"awards": {"name": "LOCKHEED MARTIN CORPORATION"}}))
+    assert orchestrator.builder.to_networkx().nodes["prime:1"]["name"] == "LOCKHEED MARTIN CORPORATION"
+    asyncio.run(orchestrator.refresh({"market": {}}, precedence=["market", "awards"]))
+    assert orchestrator.builder.to_networkx().nodes["prime:1"]["name"] == "Lockheed Martin"
+
+
+def test_provenance_lives_in_the_graph_and_only_commits_with_it():
+    orchestrator = _orchestrator()
+    builder = orchestrator.builder
+    real_update = builder.update_graph
+
+    def failing_update(nodes, edges):
+        raise RuntimeError("write failed")
+
+    builder.update_graph = failing_update
+    try:
+        asyncio.run(orchestrator.refresh({"awards": {}}))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+    builder.update_graph = real_update
+    # The failed awards merge left no provenance behind, so market's name is not outranked
+    asyncio.run(orchestrator.refresh({"market": {}}))
+    assert builder.to_networkx().nodes["prime:1"]["name"] == "Lockheed Martin"
+    # Provenance travels with the graph: a new orchestrator over it keeps honouring it
+    asyncio.run(orchestrator.refresh({"awards": {}}))
+    fresh = IngestOrchestrator(builder, orchestrator.sources, precedence=orchestrator.precedence)
+    result = asyncio.run(fresh.refresh({"market": {}}))
+    assert builder.to_networkx().nodes["prime:1"]["name"] == "LOCKHEED MARTIN CORP"
+    assert result["merge"]["overruled"] == 1
+
+
+async def _enrich(params, graph):
+    # Like wikidata: only companies already in the graph are enriched
+    return [{"id": n, "headquarters": "Bethesda"} for n, t in graph.nodes(data="type") if t == "prime_contractor"], []
+
+
+def test_graph_reading_sources_see_the_same_refresh():
+    orchestrator = _orchestrator()
+    orchestrator.sources["enrich"] = Source("enrich", _enrich, reads_graph=True)
+    result = asyncio.run(orchestrator.refresh({"enrich": {}, "awards": {}}))
+    # First refresh on an empty graph: enrichment still reaches the prime awards just added
+    assert orchestrator.builder.to_networkx().nodes["prime:1"]["headquarters"] == "Bethesda"
+    assert [r["source"] for r in result["sources"]] == ["enrich", "awards"]
+    merge = result["merge"]
+    assert (merge["nodes_added"], merge["nodes_updated"], merge["version"]) == (2, 1, 2)
+
+
+def test_unknown_sources_are_rejected():
+    orchestrator = _orchestrator()
+    try:
+        asyncio.run(orchestrator.refresh({"awards": {}, "nope": {}}))
+    except ValueError as e:
+        assert "nope" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+    assert orchestrator.builder.version == 0
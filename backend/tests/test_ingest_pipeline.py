@@ -0,0 +1,105 @@
+import sys, os
+import datetime
+import decimal
+import gzip
+import threading
+import httpx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services import streaming_loader
+from app.services.ingest_pipeline import (
+    BoundedIdSet, PipelineStats, collect, dedupe, iter_async, normalize, records_from, run_pipeline,
+    tail_records,
+)
+from app.services.usaspending_fetcher import USAspendingFetcher
+from test_usaspending_fetcher import _Replay
+
+
+def _source(n, offset=0):
+    for i in range(offset, offset + n):
+        yield "node", {"id": f"prime:P{i % 50}", "type": "prime_contractor", "name": f"Prime {i % 50}"}
+        yield "edge", {"source": "agency:DOD", "target": f"prime:P{i % 50}", "type": "prime_contract",
+                       "value": decimal.Decimal("1.5"), "award_id": f"A{i}"}
+
+
+def test_normalize_and_bounded_dedupe():
+    stats = PipelineStats()
+    records = [("node", {"id": 7, "type": None, "signed": datetime.date(2024, 1, 2)}),
+               ("node", {"name": "no id"}), ("edge", {"source": "a", "target": None}),
+               ("edge", {"source": "a", "target": "b", "value": decimal.Decimal("2.25")})]
+    out = list(normalize(records, stats))
+    assert out == [("node", {"id": "7", "type": "unknown", "name": "7", "signed": "2024-01-02"}),
+                   ("edge", {"source": "a", "target": "b", "value": 2.25, "type": "contract"})]
+    assert (stats.read, stats.invalid) == (4, 2)
+
+    seen = BoundedIdSet(capacity=2)
+    assert [seen.add(k) for k in ("a", "b", "a", "c", "a", "b")] == [True, True, False, True, False, True]
+    assert len(seen) == 2
+    stats = PipelineStats()
+    kept = list(dedupe(normalize(_source(200)), capacity=100, stats=stats))
+    assert stats.duplicates == 150 and len(kept) == 250
+
+
+def test_pipeline_writes_gzip_chunks_readable_by_loader(tmp_path):
+    nodes, edges = str(tmp_path / "nodes.ndjson.gz"), str(tmp_path / "edges.ndjson.gz")
+    stats = run_pipeline([_source(300), _source(100, offset=1000)], nodes, edges, chunk_records=64)
+    assert (stats.nodes, stats.edges, stats.duplicates) == (50, 400, 350)
+    assert stats.chunks == 1 + 7  # 50 nodes in one chunk, 400 edges in 64-record chunks
+
+    # One gzip member per chunk, still a single valid .gz file
+    with open(edges, "rb") as f:
+        assert f.read().count(b"\x1f\x8b\x08") >= 7
+    assert len(gzip.open(edges).read().splitlines()) == 400
+    loaded_nodes, loaded_edges = collect(records_from(streaming_loader.iter_records(nodes),
+                                                      streaming_loader.iter_records(edges)))
+    assert len(loaded_nodes) == 50 and loaded_edges[0]["value"] == 1.5
+    assert {e["award_id"] for e in loaded_edges} == {f"A{i}" for i in range(300)} | {f"A{i}" for i in range(1000, 1100)}
+
+
+def test_tail_follows_chunks_while_writing(tmp_path):
+    nodes, edges = str(tmp_path / "nodes.ndjson.gz"), str(tmp_path / "edges.ndjson.gz")
+    release = threading.Event()
+
+    def source():
+        yield from _source(100)
+        release.wait(5)
+        yield from _source(100, offset=100)
+
+    writer = threading.Thread(target=run_pipeline, args=([source()], nodes, edges),
+                              kwargs={"chunk_records": 25})
+    writer.start()
+    tailed = []
+    for edge in tail_records(edges, poll_interval=0.01, timeout=5):
+        tailed.append(edge)
+        if len(tailed) == 100:
+            # The first four chunks were read while the source was still blocked
+            assert not release.is_set()
+            release.set()
+    writer.join()
+    assert [e["award_id"] for e in tailed] == [f"A{i}" for i in range(200)]
+
+
+def test_iter_async_streams_partitions_and_stops_early():
+    replay = _Replay(awards_per_search=4, subawards_per_award=2, page_size=2)
+
+    async def partitions():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(replay)) as client:
+            fetcher = USAspendingFetcher(client=client, rate=10_000, backoff=0, page_size=2)
+            async for partition in fetcher.iter_partitions([2023, 2024], ["DOD", "NASA"], limit=3, window=2):
+                yield partition
+
+    got = {(fy, agency): rows for fy, agency, rows in iter_async(partitions(), maxsize=1)}
+    assert set(got) == {(2023, "DOD"), (2023, "NASA"), (2024, "DOD"), (2024, "NASA")}
+    assert all(len(rows) == 3 and len(rows[0][1]) == 2 for rows in got.values())
+
+    # Leaving the loop early shuts the producer down
+    for first in iter_async(partitions(), maxsize=1):
+        break
+    assert first[2]
+
+    async def failing():
+        yield 1
+        raise ValueError("source failed")
+
+    with pytest.raises(ValueError):
+        list(iter_async(failing()))
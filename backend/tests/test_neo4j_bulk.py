@@ -0,0 +1,182 @@
+import sys, os
+import json
+import asyncio
+import networkx as nx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services import neo4j_bulk
+from app.services.neo4j_bulk import BulkLoader, group_nodes, group_edges, quote_identifier
+
+
+class _Result:
+    def __init__(self, records=()):
+        self.records = list(records)
+
+    async def consume(self):
+        pass
+
+    async def single(self):
+        return self.records[0]
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for record in self.records:
+            yield record
+
+
+class _Recorder:
+    """Stands in for an async driver, session and transaction; records every statement."""
+
+    def __init__(self):
+        self.statements = []
+        self.transactions = 0
+
+    def session(self, **kwargs):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, parameters=None, **params):
+        self.statements.append((query, {**(parameters or {}), **params}))
+        return _Result([{"deleted": 0}])
+
+    async def execute_write(self, fn, *args):
+        self.transactions += 1
+        return await fn(self, *args)
+
+
+def _graph():
+    G = nx.DiGraph()
+    for i in range(7):
+        G.add_node(f"p{i}", type="prime_contractor", name=f"P{i}", uei=None)
+    for i in range(5):
+        G.add_node(f"s{i}", type="sub_contractor", name=f"S{i}")
+    for i in range(7):
+        G.add_edge(f"p{i}", f"s{i % 5}", type="subcontract", value=float(i))
+    G.add_edge("p0", "p1", value=None)
+    return G
+
+
+def test_groups_drop_nulls_and_default_types():
+    G = _graph()
+    nodes = group_nodes(G)
+    assert sorted(nodes) == ["prime_contractor", "sub_contractor"]
+    row = nodes["prime_contractor"][0]
+    assert row["id"] == "p0"
+    assert {k: v for k, v in row["props"].items() if not k.startswith("sync_")} == {
+        "type": "prime_contractor", "name": "P0"}
+    assert 0 <= row["props"]["sync_bucket"] < neo4j_bulk.NUM_BUCKETS
+    edges = group_edges(G)
+    assert len(edges["subcontract"]) == 7
+    (row,) = edges[neo4j_bulk.DEFAULT_REL_TYPE]
+    assert (row["src"], row["tgt"], sorted(row["props"])) == ("p0", "p1", ["sync_bucket", "sync_hash"])
+    assert quote_identifier("odd`type") == "`odd``type`"
+    with pytest.raises(ValueError):
+        quote_identifier("")
+
+
+def test_load_graph_batches_per_group_with_fixed_queries():
+    G = _graph()
+    recorder = _Recorder()
+    stats = asyncio.run(BulkLoader(recorder, batch_size=3).load_graph(G))
+    assert (stats.nodes, stats.edges) == (12, 8)
+    # Schema statements run before any data
+    schema = len(neo4j_bulk.SCHEMA_STATEMENTS)
+    assert [q for q, _ in recorder.statements[:schema]] == list(neo4j_bulk.SCHEMA_STATEMENTS)
+    writes = recorder.statements[schema:]
+    # ceil(7/3) + ceil(5/3) node batches, ceil(7/3) + 1 edge batches
+    assert len(writes) == stats.batches == recorder.transactions == 3 + 2 + 3 + 1
+    assert all(len(params["rows"]) <= 3 for _, params in writes)
+    node_writes = writes[:5]
+    assert {q for q, _ in node_writes[:3]} == {neo4j_bulk.node_query("prime_contractor")}
+    assert [r["id"] for _, p in node_writes for r in p["rows"]] == list(G)
+    edge_queries = {q for q, _ in writes[5:]}
+    assert edge_queries == {neo4j_bulk.edge_query("subcontract"), neo4j_bulk.edge_query("CONNECTED")}
+    assert all(":Entity {id: row.src}" in q for q in edge_queries)
+    assert stats.to_dict()["rows_per_sec"] > 0
+
+
+def test_diff_sync_writes_only_changes(tmp_path):
+    from app.services.neo4j_diff import SyncState, compute_diff, sync_graph
+    G = _graph()
+    state_path = str(tmp_path / "state.json")
+    SyncState.from_graph(G).save(state_path)
+
+    H = G.copy()
+    H.nodes["p0"]["name"] = "Renamed"           # update
+    H.nodes["s1"]["type"] = "prime_contractor"  # update with label change
+    H.remove_node("p6")                          # delete, with its edge
+    H.add_node("s9", type="sub_contractor", name="S9")
+    H.add_edge("s9", "p0", type="subcontract", value=1.0)
+    H.edges["p1", "s1"]["value"] = 99.0
+    H.edges["p0", "p1"]["type"] = "subcontract"  # relationship type change
+
+    diff, _ = compute_diff(H, SyncState.load(state_path))
+    assert diff.summary() == {
+        "nodes": {"created": 1, "updated": 2, "deleted": 1, "unchanged": 9},
+        "edges": {"created": 2, "updated": 1, "deleted": 2, "unchanged": 5},
+    }
+    assert [r["id"] for r in diff.node_updates[("prime_contractor", "sub_contractor")]] == ["s1"]
+
+    recorder = _Recorder()
+    stats = asyncio.run(sync_graph(BulkLoader(recorder, batch_size=100), H, state_path))
+    assert stats.to_dict()["diff"] == diff.summary()
+    queries = [q for q, _ in recorder.statements]
+    assert not any("DETACH DELETE n RETURN" in q for q in queries)
+    assert any("REMOVE n:`sub_contractor` SET n:`prime_contractor`" in q for q in queries)
+    assert recorder.statements[-1][1]["rows"] == ["p6"]
+    # The saved state now matches H, so a second sync has nothing to write
+    diff, _ = compute_diff(H, SyncState.load(state_path))
+    assert diff.empty
+
+
+@pytest.mark.parametrize("old_version", [1, 2])
+def test_unstamped_state_versions_are_rewritten(tmp_path, old_version):
+    from app.services.neo4j_diff import SyncState
+    state_path = str(tmp_path / "state.json")
+    SyncState.from_graph(_graph()).save(state_path)
+    with open(state_path) as f:
+        data = json.load(f)
+    # Saved before rows were stamped (1), or stamped with the older hash (2)
+    data["version"] = old_version
+    with open(state_path, "w") as f:
+        json.dump(data, f)
+    # No usable state: sync_graph falls back to the database with unknown hashes, rewriting every row
+    assert SyncState.load(state_path) is None
+
+
+def test_pool_tracks_sessions_and_latency():
+    from prometheus_client import REGISTRY
+    from app.services.neo4j_pool import Neo4jPool
+
+    class _Record:
+        def data(self):
+            return {"n": 1}
+
+    class _Tx:
+        async def run(self, query, parameters):
+            return _Result([_Record()])
+
+    class _Session(_Recorder):
+        async def execute_read(self, fn, *args):
+            return await fn(_Tx(), *args)
+
+    class _Driver:
+        def session(self, **kwargs):
+            assert gauge() == 1
+            return _Session()
+
+    gauge = lambda: REGISTRY.get_sample_value("neo4j_pool_sessions_in_use")
+    count = lambda: REGISTRY.get_sample_value("neo4j_query_latency_seconds_count", {"mode": "read"}) or 0
+    pool = Neo4jPool()
+    pool._driver = _Driver()
+    before = count()
+    assert asyncio.run(pool.read("MATCH (n) RETURN 1 AS n")) == [{"n": 1}]
+    assert count() == before + 1
+    assert gauge() == 0
@@ -0,0 +1,90 @@
+import sys, os
+import asyncio
+import pytest
+from neo4j.exceptions import TransientError
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services import neo4j_service
+from app.services.neo4j_service import Neo4jService, EDGE_BATCH_QUERY, NODE_BATCH_QUERY, partition_of
+from app.models.ingestion import NodeModel, EdgeModel
+
+
+class _Result:
+    async def consume(self):
+        pass
+
+
+class _FakePool:
+    """Records committed batches; writes touching a listed source fail transiently (once, unless sticky)."""
+
+    def __init__(self, fail_sources=(), sticky=False):
+        self.committed = []
+        self.fail_sources = set(fail_sources)
+        self.sticky = sticky
+
+    def session(self):
+        pool = self
+
+        class _Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def run(self, query, parameters=None):
+                return _Result()
+
+            async def execute_write(self, fn, query, rows):
+                failing = {r.get("source") for r in rows} & pool.fail_sources
+                if failing:
+                    if not pool.sticky:
+                        pool.fail_sources -= failing
+                    raise TransientError("deadlock detected")
+                await asyncio.sleep(0)
+                pool.committed.append((query, rows))
+
+        return _Session()
+
+
+def _rows(num_nodes=50, fanout=4):
+    nodes = [NodeModel(id=f"n{i}", type="supplier", name=f"N{i}") for i in range(num_nodes)]
+    edges = [EdgeModel(source=f"n{i}", target=f"n{(i * 7 + j) % num_nodes}", value=float(j))
+             for i in range(num_nodes) for j in range(fanout)]
+    return nodes, edges
+
+
+def test_batches_are_partitioned_by_source_and_nodes_come_first(monkeypatch):
+    monkeypatch.setattr(neo4j_service, "RETRY_BACKOFF", 0)
+    nodes, edges = _rows()
+    pool = _FakePool(fail_sources={"n3"})
+    stats = asyncio.run(Neo4jService(pool, batch_size=7, concurrency=3).persist_graph(nodes, edges))
+    assert (stats.nodes, stats.edges, stats.retries) == (50, 200, 1)
+    assert stats.batches == len(pool.committed)
+    kinds = [q for q, _ in pool.committed]
+    first_edge = kinds.index(EDGE_BATCH_QUERY)
+    assert set(kinds[:first_edge]) == {NODE_BATCH_QUERY} and set(kinds[first_edge:]) == {EDGE_BATCH_QUERY}
+    assert sorted(r["id"] for _, rows in pool.committed[:first_edge] for r in rows) == sorted(n.id for n in nodes)
+    written = [r for _, rows in pool.committed[first_edge:] for r in rows]
+    assert sorted((r["source"], r["target"], r["value"]) for r in written) == sorted(
+        (e.source, e.target, e.value) for e in edges)
+    for _, rows in pool.committed[first_edge:]:
+        assert len(rows) <= 7
+        assert len({partition_of(r["source"], 3) for r in rows}) == 1
+
+
+def test_streamed_rows_and_persistent_failures(monkeypatch):
+    monkeypatch.setattr(neo4j_service, "RETRY_BACKOFF", 0)
+    nodes, edges = _rows(10, 2)
+
+    async def stream():
+        for row in nodes + edges:
+            await asyncio.sleep(0)
+            yield row
+
+    pool = _FakePool()
+    stats = asyncio.run(Neo4jService(pool, batch_size=4, concurrency=2).persist_rows(stream()))
+    assert (stats.nodes, stats.edges) == (10, 20)
+
+    with pytest.raises(TransientError):
+        asyncio.run(Neo4jService(_FakePool({"n1"}, sticky=True), batch_size=4, concurrency=2)
+                    .persist_graph(nodes, edges))
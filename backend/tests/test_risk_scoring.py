@@ -0,0 +1,48 @@
+import sys, os
+import time
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.risk_scoring import MacroTable, score_risk, DEFAULT_MACRO
+
+def test_default_table_matches_placeholder_formula():
+    ids = ["A", "B"]
+    centralities = {"degree_centrality": np.array([0.5, 1.0]),
+                    "eigenvector_centrality": np.array([0.1, 0.2]),
+                    "authority": None}
+    risk = score_risk(ids, centralities)
+    macro = (0.2 * DEFAULT_MACRO["unemployment_rate"] + 0.3 * DEFAULT_MACRO["financial_health"]
+             + 0.2 * DEFAULT_MACRO["location_risk"] + 0.3 * DEFAULT_MACRO["demand_score"])
+    assert risk.risk_score.tolist() == pytest.approx([0.6 + macro, 1.2 + macro])
+    assert risk.risk_forecast.tolist() == pytest.approx((risk.risk_score * 1.05).tolist())
+    assert risk.to_dicts()["risk_score"]["A"] == pytest.approx(0.6 + macro)
+
+def test_join_by_id_and_region():
+    table = MacroTable.from_records([{"id": "B", "unemployment_rate": 0.5, "financial_health": 0.1,
+                                      "location_risk": 0.9, "demand_score": 0.0}])
+    macro = table.align(["A", "B"])
+    assert macro[0].tolist() == pytest.approx(table.default.tolist())
+    assert macro[1].tolist() == pytest.approx([0.5, 0.1, 0.9, 0.0])
+    by_region = MacroTable.from_records([{"region": "TX", "location_risk": 0.6}], key="region")
+    macro = by_region.align(["A", "B"], regions=["TX", None])
+    assert macro[0, 2] == pytest.approx(0.6)
+    assert macro[1, 2] == pytest.approx(DEFAULT_MACRO["location_risk"])
+
+def test_rescore_reuses_columns():
+    ids = ["A", "B"]
+    risk = score_risk(ids, {"degree_centrality": np.array([1.0, 0.0])})
+    heavier = risk.rescore({"degree_centrality": 3.0})
+    assert heavier.centrality is risk.centrality
+    assert heavier.risk_score[0] - risk.risk_score[0] == pytest.approx(2.0)
+    assert heavier.risk_score[1] == pytest.approx(risk.risk_score[1])
+
+def test_million_nodes_is_fast():
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    ids = np.arange(n)
+    centralities = {name: rng.random(n) for name in ("degree_centrality", "eigenvector_centrality", "authority")}
+    start = time.perf_counter()
+    risk = score_risk(ids, centralities)
+    risk.rescore({"authority": 2.0})
+    assert time.perf_counter() - start < 1.0
+    assert risk.risk_score.shape == (n,)
@@ -0,0 +1,62 @@
+import sys, os
+import pytest
+import networkx as nx
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.sparse_analytics import SparseAnalyticsEngine
+
+def _assert_close(actual, expected, tol=1e-6):
+    assert set(actual) == set(expected)
+    for node, value in expected.items():
+        assert actual[node] == pytest.approx(value, abs=tol)
+
+@pytest.fixture
+def strongly_connected():
+    G = nx.gnp_random_graph(200, 0.05, directed=True, seed=7)
+    for u, v in G.edges:
+        G.edges[u, v]["value"] = float((u * 31 + v) % 97 + 1)
+    return G
+
+def test_matches_networkx(strongly_connected):
+    G = strongly_connected
+    engine = SparseAnalyticsEngine.from_networkx(G)
+    _assert_close(engine.to_dict(engine.degree_centrality()), nx.degree_centrality(G))
+    _assert_close(engine.to_dict(engine.eigenvector_centrality()), nx.eigenvector_centrality(G))
+    hubs, authorities = engine.hits()
+    nx_hubs, nx_authorities = nx.hits(G)
+    _assert_close(engine.to_dict(hubs), nx_hubs)
+    _assert_close(engine.to_dict(authorities), nx_authorities)
+    _assert_close(engine.to_dict(engine.pagerank()), nx.pagerank(G, weight=None))
+
+def test_weighted_variants(strongly_connected):
+    G = strongly_connected
+    engine = SparseAnalyticsEngine.from_networkx(G, weight="value")
+    _assert_close(engine.to_dict(engine.pagerank(weighted=True)), nx.pagerank(G, weight="value"))
+    _assert_close(engine.to_dict(engine.eigenvector_centrality(weighted=True, max_iter=1000)),
+                  nx.eigenvector_centrality(G, weight="value", max_iter=1000))
+    results = engine.compute(weighted=True)
+    assert {"eigenvector_centrality_weighted", "authority_weighted", "hub_weighted",
+            "pagerank_weighted", "degree_centrality_weighted"} <= set(results)
+
+def test_supply_chain_dag():
+    G = nx.DiGraph()
+    G.add_edge("agency", "prime1", value=100.0)
+    G.add_edge("agency", "prime2", value=50.0)
+    for i in range(5):
+        G.add_edge("prime1", f"s{i}", value=float(i + 1))
+    G.add_edge("prime2", "s0", value=None)
+    engine = SparseAnalyticsEngine.from_networkx(G)
+    results = engine.compute(weighted=True)
+    nx_hubs, nx_authorities = nx.hits(G)
+    _assert_close(results["hub"], nx_hubs)
+    _assert_close(results["authority"], nx_authorities)
+    assert max(results["hub"], key=results["hub"].get) == "prime1"
+
+def test_empty_and_single_node():
+    engine = SparseAnalyticsEngine.from_networkx(nx.DiGraph())
+    assert engine.compute() == {"degree_centrality": {}, "eigenvector_centrality": {},
+                                "authority": {}, "hub": {}, "pagerank": {}}
+    G = nx.DiGraph()
+    G.add_node("A")
+    results = SparseAnalyticsEngine.from_networkx(G).compute()
+    assert results["degree_centrality"] == {"A": 1.0}
+    assert results["pagerank"]["A"] == pytest.approx(1.0)
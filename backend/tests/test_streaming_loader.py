@@ -0,0 +1,93 @@
+import sys, os
+import gzip
+import json
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services import streaming_loader
+from app.services.edge_store import EdgeStore
+
+NODES = [{"id": f"n{i}", "type": "supplier", "name": f"Näme {i} \"quoted\" [x]"} for i in range(50)]
+EDGES = [{"source": f"n{i % 7}", "target": f"n{(i * 3) % 50}", "type": "subcontract",
+          "value": None if i % 5 == 0 else i * 1.5, "subaward_id": None if i % 2 else f"S{i}"}
+         for i in range(200)]
+
+def _write_json(path, records):
+    with open(path, "w") as f:
+        json.dump(records, f, indent=2)
+
+def _write_ndjson_gz(path, records):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+
+def test_json_array_across_tiny_chunks(tmp_path):
+    path = str(tmp_path / "edges.json")
+    _write_json(path, EDGES)
+    stats = streaming_loader.LoaderStats()
+    records = list(streaming_loader.iter_records(path, stats, chunk_bytes=7))
+    assert records == EDGES
+    assert stats.records == len(EDGES)
+    # Buffer stays around one record, not the whole file
+    assert stats.peak_buffer_chars < os.path.getsize(path) / 20
+
+def test_batches_are_bounded(tmp_path):
+    path = str(tmp_path / "edges.ndjson.gz")
+    _write_ndjson_gz(path, EDGES)
+    stats = streaming_loader.LoaderStats()
+    batches = list(streaming_loader.iter_batches(path, batch_size=32, stats=stats))
+    assert [r for b in batches for r in b] == EDGES
+    assert stats.peak_batch_records == 32
+    assert stats.batches == 7
+
+def test_load_networkx_matches_json_load(tmp_path):
+    nodes_path = str(tmp_path / "nodes.json")
+    edges_path = str(tmp_path / "edges.ndjson.gz")
+    _write_json(nodes_path, NODES)
+    _write_ndjson_gz(edges_path, EDGES)
+    G = streaming_loader.load_networkx(nodes_path, edges_path, batch_size=16)
+    assert G.number_of_nodes() == 50
+    expected = {}
+    for e in EDGES:
+        expected[(e["source"], e["target"])] = {k: v for k, v in e.items() if k not in ("source", "target")}
+    assert {(u, v): d for u, v, d in G.edges(data=True)} == expected
+
+def test_validation_and_malformed_input(tmp_path):
+    nodes_path = str(tmp_path / "nodes.json")
+    edges_path = str(tmp_path / "edges.json")
+    _write_json(nodes_path, [{"id": "A", "type": "t"}])
+    _write_json(edges_path, [])
+    with pytest.raises(ValueError):
+        streaming_loader.load_networkx(nodes_path, edges_path)
+    with open(edges_path, "w") as f:
+        f.write('[{"source": "A", "target": ')
+    with pytest.raises(ValueError):
+        list(streaming_loader.iter_records(edges_path))
+    with open(edges_path, "w") as f:
+        f.write('{"source": "A"}')
+    with pytest.raises(ValueError):
+        list(streaming_loader.iter_records(edges_path))
+
+def test_record_larger_than_buffer(tmp_path):
+    path = str(tmp_path / "edges.json")
+    _write_json(path, [{"source": "A", "target": "B", "note": "x" * 5000}])
+    with pytest.raises(ValueError):
+        list(streaming_loader.iter_records(path, chunk_bytes=512, max_buffer_bytes=1024))
+
+def test_streamed_edge_store_matches_in_memory(tmp_path):
+    nodes_path = str(tmp_path / "nodes.json")
+    edges_path = str(tmp_path / "edges.ndjson.gz")
+    _write_json(nodes_path, NODES)
+    _write_ndjson_gz(edges_path, EDGES)
+    streamed = streaming_loader.load_edge_store(edges_path, nodes_path, batch_size=13)
+    in_memory = EdgeStore.from_records(EDGES, NODES)
+    assert streamed.node_ids == in_memory.node_ids
+    assert streamed.aggregates.sum.tolist() == in_memory.aggregates.sum.tolist()
+    assert streamed.records("n1", "n3") == in_memory.records("n1", "n3")
+
+def test_zstd_ndjson(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = str(tmp_path / "edges.jsonl.zst")
+    payload = "".join(json.dumps(r) + "\n" for r in EDGES).encode()
+    with open(path, "wb") as f:
+        f.write(zstandard.ZstdCompressor().compress(payload))
+    assert list(streaming_loader.iter_records(path)) == EDGES
@@ -0,0 +1,125 @@
+import sys, os
+import asyncio
+import json
+import httpx
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.usaspending_fetcher import USAspendingFetcher, build_records, fetch_records
+
+
+def _award(fy, agency, i):
+    return {
+        "Award ID": f"C-{fy}-{agency}-{i}", "Recipient Name": f"Prime {i % 5}",
+        "Recipient DUNS Number": None, "Recipient UEI": f"UEI{i % 5}", "Award Amount": 1000.0 - i,
+        "Awarding Agency": agency, "Awarding Sub Agency": f"{agency} Sub", "Awarding Sub Agency Code": "97",
+        "generated_internal_id": f"CONT_AWD_{fy}_{agency}_{i}",
+    }
+
+
+class _Replay:
+    """Serves award and subaward pages like spending_by_award; flaky awards fail once with a 503."""
+
+    def __init__(self, awards_per_search=7, subawards_per_award=3, page_size=3, flaky=()):
+        self.awards_per_search = awards_per_search
+        self.subawards_per_award = subawards_per_award
+        self.page_size = page_size
+        self.flaky = set(flaky)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _page(self, rows, page):
+        start = (page - 1) * self.page_size
+        return {"results": rows[start:start + self.page_size],
+                "page_metadata": {"page": page, "hasNext": start + self.page_size < len(rows)}}
+
+    async def __call__(self, request):
+        body = json.loads(request.content)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        filters = body["filters"]
+        if body.get("subawards"):
+            key = filters["award_unique_id"]
+            if key in self.flaky:
+                self.flaky.discard(key)
+                return httpx.Response(503, headers={"Retry-After": "0"})
+            rows = [{"Sub-Award ID": f"{key}-S{j}", "Sub-Awardee Name": f"Supplier {j}",
+                     "Sub-Recipient UEI": f"SUB{j}", "Sub-Award Amount": 10.0 * j, "Prime Award ID": key}
+                    for j in range(self.subawards_per_award)]
+        else:
+            fy = int(filters["time_period"][0]["end_date"][:4])
+            agency = filters["agencies"][0]["name"]
+            rows = [_award(fy, agency, i) for i in range(self.awards_per_search)]
+        return httpx.Response(200, json=self._page(rows, body["page"]))
+
+
+def _fetch(replay, **options):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(replay)) as client:
+            fetcher = USAspendingFetcher(client=client, rate=10_000, backoff=0, page_size=replay.page_size,
+                                         **options)
+            return await fetcher.fetch([2022, 2023], ["DOD", "NASA"], limit=5), fetcher.stats
+    return asyncio.run(run())
+
+
+def test_fan_out_is_bounded_and_output_ordered():
+    replay = _Replay(flaky={"CONT_AWD_2023_NASA_1"})
+    fetched, stats = _fetch(replay, concurrency=4)
+    assert [(fy, agency, a["Award ID"]) for fy, agency, a, _ in fetched] == [
+        (fy, agency, f"C-{fy}-{agency}-{i}") for fy in (2022, 2023) for agency in ("DOD", "NASA")
+        for i in range(5)]
+    assert all(len(subs) == 3 for *_, subs in fetched)
+    assert 1 < replay.max_in_flight <= 4
+    # 4 searches x 2 award pages, 20 awards x 1 subaward page, 1 retry
+    assert (stats.requests, stats.retries, stats.awards, stats.subawards) == (29, 1, 20, 60)
+
+    sequential, _ = _fetch(_Replay(), concurrency=1)
+    assert [(a, s) for *_, a, s in sequential] == [(a, s) for *_, a, s in fetched]
+
+
+def test_build_records_matches_extract_awards_shape():
+    nodes, edges = build_records([(2023, "NASA", _award(2023, "NASA", 0), [
+        {"Sub-Award ID": "S1", "Sub-Awardee Name": "Widgets", "Sub-Recipient UEI": None, "Sub-Award Amount": 5.0}])])
+    assert {n["id"]: n["type"] for n in nodes} == {
+        "agency:NASA": "funding_agency", "program:97": "program_office",
+        "prime:UEI0": "prime_contractor", "supplier:Widgets": "supplier"}
+    assert edges == [
+        {"source": "program:97", "target": "prime:UEI0", "type": "prime_contract", "value": 1000.0,
+         "award_id": "C-2023-NASA-0"},
+        {"source": "prime:UEI0", "target": "supplier:Widgets", "type": "subcontract", "value": 5.0,
+         "subaward_id": "S1"},
+    ]
+
+
+def test_supplier_ids_match_the_orm_path():
+    from usaspending import USASpendingClient
+    from usaspending.models.subaward import SubAward
+    # A contract subaward row as returned by spending_by_award (cf. "Data Link Solutions LLC" in usaspending_nodes.json)
+    row = {"Sub-Award ID": "SA-7", "Sub-Awardee Name": "Data Link Solutions LLC",
+           "sub_award_recipient_id": "c98b136d-0e1d-f50a-801c-a39f5aca7224-C",
+           "Sub-Recipient UEI": "KQ5NL7B4DJ47", "Sub-Award Amount": 12.5, "Prime Award ID": "C-2023-NASA-0"}
+    client = USASpendingClient()  # models hold only a weak reference to it
+    recipient = SubAward(row, client).recipient
+    orm_id = f"supplier:{recipient.duns or recipient.uei or recipient.name}"
+    nodes, _ = build_records([(2023, "NASA", _award(2023, "NASA", 0), [row])])
+    assert orm_id == "supplier:c98b136d-0e1d-f50a-801c-a39f5aca7224-C"
+    assert orm_id in {n["id"] for n in nodes}
+    # Without the recipient hash both paths fall back to the UEI
+    row = dict(row, sub_award_recipient_id=None)
+    recipient = SubAward(row, client).recipient
+    nodes, _ = build_records([(2023, "NASA", _award(2023, "NASA", 0), [row])])
+    assert f"supplier:{recipient.duns or recipient.uei or recipient.name}" in {n["id"] for n in nodes}
+
+
+def test_persistent_errors_surface_after_retries():
+    async def failing(request):
+        return httpx.Response(500)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(failing)) as client:
+            await fetch_records([2023], ["DOD"], 5, client=client, max_retries=2, backoff=0, rate=10_000)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
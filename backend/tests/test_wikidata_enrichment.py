@@ -0,0 +1,148 @@
+import sys, os
+import asyncio
+import json
+import re
+import httpx
+import networkx as nx
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.services.wikidata_enrichment import (
+    AdaptiveBatchSize, QidCache, WikidataEnricher, enrich_graph, enrich_nodes, enrich_stage,
+)
+
+LABELS = {"Lockheed Martin Corporation": "Q1", "Acme Widgets": "Q7", "Boeing": "Q66"}
+DUNS = {"123456789": "Q1"}
+# Items that share a label with a company but are not organisations (a city, a family name)
+NON_ORGANISATIONS = {"Phoenix": "Q16556", "Springfield": "Q28515"}
+ATTRS = {"Q1": ("Bethesda", "Q999", "Holding", "aerospace"), "Q7": ("Springfield", None, None, "machining"),
+         "Q66": ("Arlington", None, None, "aerospace"), "Q500": ("Tempe", None, None, "electronics"),
+         "Q16556": ("Maricopa County", None, None, None), "Q28515": (None, None, None, None)}
+
+
+class _FakeWdqs:
+    """Answers the resolve / attribute queries; VALUES blocks larger than `max_values` time out."""
+
+    def __init__(self, max_values=1000):
+        self.max_values = max_values
+        self.queries = []
+
+    async def query(self, sparql, timeout=None):
+        self.queries.append(sparql)
+        values = re.search(r"VALUES \?\w+ \{ (.*) \}", sparql).group(1)
+        if "wd:" in values:
+            keys = re.findall(r"wd:(Q\d+)", values)
+        else:
+            keys = re.findall(r'"((?:[^"\\]|\\.)*)"', values)
+        if len(keys) > self.max_values:
+            raise httpx.ReadTimeout("query timed out")
+        if "P2771" in sparql:
+            rows = [{"key": {"value": k}, "item": {"value": f"http://www.wikidata.org/entity/{DUNS[k]}"}}
+                    for k in keys if k in DUNS]
+        elif "rdfs:label" in sparql:
+            labels = [(k, LABELS[k]) for k in keys if k in LABELS]
+            if "wd:Q43229" not in sparql:  # no organisation filter: places and names match too
+                labels += [(k, NON_ORGANISATIONS[k]) for k in keys if k in NON_ORGANISATIONS]
+            rows = [{"key": {"value": k}, "item": {"value": f"http://www.wikidata.org/entity/{q}"}}
+                    for k, q in labels]
+        else:
+            rows = []
+            for q in keys:
+                hq, parent, parent_label, industry = ATTRS[q]
+                row = {"item": {"value": f"http://www.wikidata.org/entity/{q}"},
+                       "hqLabel": {"value": hq}, "industryLabel": {"value": industry}}
+                if parent:
+                    row["parent"] = {"value": f"http://www.wikidata.org/entity/{parent}"}
+                    row["parentLabel"] = {"value": parent_label}
+                rows.append(row)
+        return {"results": {"bindings": rows}}
+
+
+def _nodes():
+    return [
+        {"id": "agency:DOD", "type": "funding_agency", "name": "DOD"},
+        {"id": "prime:123456789", "type": "prime_contractor", "name": "LOCKHEED MARTIN CORP"},
+        {"id": "supplier:ABCDEF123456", "type": "supplier", "name": "ACME WIDGETS"},
+        {"id": "supplier:Boeing", "type": "supplier", "name": "Boeing"},
+        {"id": "supplier:Nobody", "type": "supplier", "name": "Nobody Inc"},
+    ] + [{"id": f"supplier:s{i}", "type": "supplier", "name": f"Unknown {i}"} for i in range(60)]
+
+
+def test_batched_enrichment_and_qid_cache(tmp_path):
+    path = str(tmp_path / "qids.json")
+    wdqs = _FakeWdqs()
+    nodes, stats = asyncio.run(enrich_nodes(_nodes(), WikidataEnricher(wdqs, QidCache(path))))
+    by_id = {n["id"]: n for n in nodes}
+    assert by_id["prime:123456789"]["wikidata_qid"] == "Q1"          # via DUNS
+    assert by_id["prime:123456789"]["parent_company"] == "Holding"
+    assert by_id["supplier:ABCDEF123456"]["wikidata_qid"] == "Q7"     # via title-cased label
+    assert by_id["supplier:Boeing"]["headquarters"] == "Arlington"
+    assert "wikidata_qid" not in by_id["supplier:Nobody"] and "wikidata_qid" not in by_id["agency:DOD"]
+    assert "parent_qid" not in by_id["supplier:Boeing"]
+    assert (stats.companies, stats.enriched) == (64, 3)
+    assert len(wdqs.queries) == 3  # one query per stage at the default batch size
+
+    # Second run: only identifiers never seen before are resolved
+    again = _FakeWdqs()
+    nodes = _nodes() + [{"id": "supplier:new", "type": "supplier", "name": "BOEING"}]
+    nodes, stats = asyncio.run(enrich_nodes(nodes, WikidataEnricher(again, QidCache(path))))
+    resolve_queries = [q for q in again.queries if "wd:" not in q.split("VALUES")[1].split("}")[0]]
+    assert len(resolve_queries) == 1 and '"BOEING"@en' in resolve_queries[0]
+    assert '"Boeing"@en' not in resolve_queries[0]
+    assert {n["id"]: n.get("wikidata_qid") for n in nodes}["supplier:new"] == "Q66"
+
+
+def test_batch_size_shrinks_on_timeouts_and_grows_when_fast(tmp_path):
+    wdqs = _FakeWdqs(max_values=40)
+    batch = AdaptiveBatchSize(size=200, minimum=10, maximum=500)
+    enricher = WikidataEnricher(wdqs, QidCache(None), batch)
+    G = nx.DiGraph()
+    for n in _nodes():
+        G.add_node(n["id"], type=n["type"], name=n["name"])
+    stats = asyncio.run(enrich_graph(G, enricher))
+    assert G.nodes["supplier:Boeing"]["industry"] == "aerospace"
+    # 66 distinct labels time out once; later batches stay below that size
+    assert (stats.timeouts, stats.failed) == (1, 0)
+    assert batch.size <= batch.ceiling == 65
+
+    batch = AdaptiveBatchSize(size=100, target_seconds=10)
+    batch.succeeded(0.1)
+    assert batch.size == 150
+    batch.succeeded(30)
+    assert batch.size == 75
+
+
+def test_failed_chunks_are_not_cached(tmp_path):
+    wdqs = _FakeWdqs(max_values=5)
+    cache = QidCache(None)
+    enricher = WikidataEnricher(wdqs, cache, AdaptiveBatchSize(size=50, minimum=10))
+    asyncio.run(enricher.resolve("label", [f"Unknown {i}" for i in range(30)]))
+    assert enricher.stats.failed == 30 and cache.qids == {}
+
+
+def test_enrich_stage_batches_company_nodes():
+    wdqs = _FakeWdqs()
+    enricher = WikidataEnricher(wdqs, QidCache(None))
+    records = [("node", n) for n in _nodes()] + [("edge", {"source": "agency:DOD", "target": "supplier:Boeing"})]
+    out = list(enrich_stage(iter(records), batch_size=40, enricher=enricher))
+    assert sorted(map(repr, out)) == sorted(map(repr, records))  # same records, enriched in place
+    assert {r["id"]: r.get("wikidata_qid") for k, r in out if k == "node"}["supplier:Boeing"] == "Q66"
+    assert enricher.stats.companies == 64 and enricher.stats.enriched == 3
+    assert len(wdqs.queries) == 3 + 1  # the second batch has no DUNS ids and no matches
+
+
+def test_labels_only_resolve_to_organisations(tmp_path):
+    # A cache written before the organisation filter must not be trusted
+    path = tmp_path / "qids.json"
+    path.write_text(json.dumps({"label:Phoenix": "Q16556", "label:Springfield": "Q28515"}))
+    LABELS["Phoenix"] = "Q500"
+    try:
+        nodes = [{"id": "supplier:PHX", "type": "supplier", "name": "PHOENIX"},
+                 {"id": "supplier:SPR", "type": "supplier", "name": "SPRINGFIELD"}]
+        nodes, stats = asyncio.run(enrich_nodes(nodes, WikidataEnricher(_FakeWdqs(), QidCache(str(path)))))
+    finally:
+        del LABELS["Phoenix"]
+    by_id = {n["id"]: n for n in nodes}
+    # The older city item shares the label; only the company is a match
+    assert by_id["supplier:PHX"]["wikidata_qid"] == "Q500"
+    assert by_id["supplier:PHX"]["headquarters"] == "Tempe"
+    assert "wikidata_qid" not in by_id["supplier:SPR"]
+    assert stats.enriched == 1